@@ -0,0 +1 @@
+"""Benchmark scripts for export-code (run with ``python -m benchmarks.<name>``)."""
@@ -0,0 +1,100 @@
+"""
+Đo tốc độ ghi bundle (file/giây) trên cây có rất nhiều file nhỏ.
+
+So sánh cách ghi cũ (nhiều lần ``write`` nhỏ cho mỗi file qua file text mặc định) với
+``open_bundle_writer`` (mục file dựng sẵn, một lần ``write`` cho mỗi file, bộ đệm nhị phân
+lớn), rồi đo toàn bộ ``create_code_bundle``:
+
+    python -m benchmarks.bench_bundle_writer --files 200000 --median-size 200
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+from benchmarks.synthetic_repo import generate_repo
+from core import bundler
+from core.utils import DEFAULT_EXCLUDE_DIRS, find_project_files
+
+
+class _Translator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+def _legacy_text_entry(outfile: Any, relative_path: str, content: str) -> None:
+    outfile.write(f"--- FILE: {relative_path} ---\n")
+    outfile.write(content)
+    outfile.write("\n" + "=" * 80 + "\n\n")
+
+
+def _legacy_md_entry(outfile: Any, relative_path: str, content: str) -> None:
+    ext = Path(relative_path).suffix.lstrip('.')
+    outfile.write("<details>\n")
+    outfile.write(f"<summary><code>{relative_path}</code></summary>\n\n")
+    outfile.write(f"```{ext}\n")
+    outfile.write(content)
+    outfile.write("\n```\n\n")
+    outfile.write("</details>\n\n")
+
+
+def _write_legacy(path: Path, entries: List[Tuple[str, str]], output_format: str) -> None:
+    # Cùng vòng lặp _write_entries, chỉ thay hàm ghi mục file và luồng output bằng bản cũ.
+    saved = bundler._write_text_file_entry, bundler._write_md_file_entry
+    bundler._write_text_file_entry, bundler._write_md_file_entry = _legacy_text_entry, _legacy_md_entry
+    try:
+        with path.open('w', encoding='utf-8') as outfile:
+            bundler._write_entries(outfile, _Translator(), entries, output_format)
+    finally:
+        bundler._write_text_file_entry, bundler._write_md_file_entry = saved
+
+
+def _write_buffered(path: Path, entries: List[Tuple[str, bytes]], output_format: str, buffer_size: int) -> None:
+    with bundler.open_bundle_writer(path, buffer_size=buffer_size) as outfile:
+        bundler._write_entries(outfile, _Translator(), entries, output_format)
+
+
+def _best(fn: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--median-size", type=int, default=200, help="Median file size in bytes.")
+    parser.add_argument("--buffer-size", type=int, default=bundler.DEFAULT_WRITE_BUFFER)
+    parser.add_argument("--format", choices=['txt', 'md'], default='txt')
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp) / "project"
+        print(f"generating {options.files} files (median {options.median_size} bytes)...")
+        generate_repo(str(project), files=options.files, files_per_dir=50, median_size=options.median_size, size_sigma=0.5,
+                      binary_ratio=0.0, scene_ratio=0.0, ignored_ratio=0.0)
+        files = sorted(find_project_files(str(project), set(DEFAULT_EXCLUDE_DIRS), False, ['.py', '.js', '.ts', '.gd', '.md', '.json', '.css']))
+        entries = [(Path(f).relative_to(project).as_posix(), Path(f).read_bytes()) for f in files]
+        text_entries = [(path, data.decode('utf-8')) for path, data in entries]
+        count = len(entries)
+
+        legacy_s = _best(lambda: _write_legacy(Path(tmp) / "legacy", text_entries, options.format), options.repeat)
+        buffered_s = _best(lambda: _write_buffered(Path(tmp) / "buffered", entries, options.format, options.buffer_size), options.repeat)
+        assert (Path(tmp) / "legacy").read_bytes().replace(b"\r\n", b"\n") == (Path(tmp) / "buffered").read_bytes()
+        bundle_s = _best(lambda: bundler.create_code_bundle(_Translator(), str(project), str(Path(tmp) / "bundle"), set(DEFAULT_EXCLUDE_DIRS),
+                                                            file_list=files, include_tree=False, output_format=options.format), options.repeat)
+
+    print(f"write phase, legacy writer:   {count / legacy_s:12,.0f} files/s  ({legacy_s:.3f} s)")
+    print(f"write phase, buffered writer: {count / buffered_s:12,.0f} files/s  ({buffered_s:.3f} s, {legacy_s / buffered_s:.2f}x)")
+    print(f"create_code_bundle (no tree): {count / bundle_s:12,.0f} files/s  ({bundle_s:.3f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+So sánh bộ nhớ của ``FileIndex`` với danh sách đường dẫn tuyệt đối mà ``find_project_files``
+trả về (cộng với bản ``sorted`` mà bundler/analyzer trước đây tạo thêm).
+
+Mặc định đường dẫn được sinh trong bộ nhớ (không ghi file) theo hình dạng của một cây sâu,
+để đo được cả triệu file:
+
+    python -m benchmarks.bench_file_index --files 1000000
+    python -m benchmarks.bench_file_index --project /path/to/repo
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from core.file_index import FileIndex
+from core.utils import DEFAULT_EXCLUDE_DIRS, find_file_index, find_project_files
+
+
+def _synthetic_paths(root: str, files: int, files_per_dir: int, depth: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    words = ['src', 'lib', 'core', 'components', 'utils', 'services', 'internal', 'modules', 'shared', 'platform']
+    exts = ['.py', '.ts', '.js', '.gd', '.md', '.json', '.css']
+    paths, dir_count = [], 0
+    while len(paths) < files:
+        parts = [f"{rng.choice(words)}_{rng.randrange(100)}" for _ in range(rng.randint(1, depth))]
+        directory = os.path.join(root, *parts, f"pkg_{dir_count}")
+        dir_count += 1
+        for i in range(min(files_per_dir, files - len(paths))):
+            paths.append(os.path.join(directory, f"module_{i}_{rng.randrange(10**6)}{rng.choice(exts)}"))
+    return paths
+
+
+def _measure(build: Callable[[], object]) -> Tuple[int, float, object]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--files-per-dir", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--project", help="Measure a real project tree instead of synthetic paths.")
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if options.project:
+        exts = ['.py', '.ts', '.js', '.gd', '.md', '.json', '.css']
+        exclude = set(DEFAULT_EXCLUDE_DIRS)
+        list_bytes, list_s, paths = _measure(lambda: sorted(find_project_files(options.project, exclude, False, exts)))
+        index_bytes, index_s, index = _measure(lambda: find_file_index(options.project, exclude, False, exts).sorted())
+    else:
+        root = os.path.abspath(os.sep + os.path.join("home", "user", "projects", "big-repo"))
+        source = _synthetic_paths(root, options.files, options.files_per_dir, options.depth, options.seed)
+        # Mỗi chuỗi phải là một đối tượng riêng như khi đọc từ ổ đĩa, không dùng chung với ``source``.
+        list_bytes, list_s, paths = _measure(lambda: sorted(''.join(path) for path in source))
+        index_bytes, index_s, index = _measure(lambda: FileIndex.from_paths(root, source).sorted())
+
+    count = len(index)
+    assert len(paths) == count
+    print(f"files: {count:,}")
+    print(f"List[str] (sorted):  {list_bytes / 2**20:9.1f} MiB  {list_bytes / max(count, 1):6.0f} B/file  ({list_s:.2f} s)")
+    print(f"FileIndex (sorted):  {index_bytes / 2**20:9.1f} MiB  {index_bytes / max(count, 1):6.0f} B/file  ({index_s:.2f} s)"
+          f"  {list_bytes / max(index_bytes, 1):.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+So sánh backend git bằng subprocess với GitPython khi lấy danh sách file đã staged.
+
+    python -m benchmarks.bench_git_backend --changed 50000
+"""
+import argparse
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from core import git_utils
+
+
+class _Translator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+def _git(repo: Path, *args: str) -> None:
+    env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com")
+    subprocess.run(["git", *args], cwd=str(repo), env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def _make_repo(repo: Path, changed: int) -> None:
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    for i in range(changed):
+        directory = repo / f"dir{i % 200}"
+        directory.mkdir(exist_ok=True)
+        (directory / f"file_{i}.txt").write_text(f"base {i}\n", encoding="utf-8")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "base")
+    for i in range(changed):
+        (repo / f"dir{i % 200}" / f"file_{i}.txt").write_text(f"changed {i}\n", encoding="utf-8")
+    _git(repo, "add", "-A")
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        git_utils._find_repo_root.cache_clear()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--changed", type=int, default=50000, help="Number of staged changed paths.")
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    t = _Translator()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp) / "repo"
+        print(f"creating repository with {options.changed} staged changes...")
+        _make_repo(repo, options.changed)
+
+        subprocess_s = _time(lambda: git_utils.get_staged_files(t, str(repo)), options.repeat)
+        gitpython_s = _time(lambda: git_utils._get_staged_files_gitpython(t, str(repo)), options.repeat)
+        assert len(git_utils.get_staged_files(t, str(repo))) == options.changed
+
+    print(f"git subprocess backend: {subprocess_s:8.3f} s")
+    print(f"GitPython backend:      {gitpython_s:8.3f} s  ({gitpython_s / subprocess_s:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+So sánh ``IgnoreRules.ignores`` với ``GitIgnoreSpec.match_file`` (chạy regex của từng pattern)
+trên một file .gitignore lớn.
+
+Pattern và đường dẫn được sinh trong bộ nhớ; ``--negations`` thêm các pattern ``!`` để đo cả
+nhánh phải xét lại theo thứ tự ưu tiên:
+
+    python -m benchmarks.bench_ignore --patterns 1000 --paths 200000
+    python -m benchmarks.bench_ignore --patterns 1000 --paths 200000 --negations 20
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+
+import pathspec
+
+from core.ignore import IgnoreRules
+
+
+def _patterns(rng: random.Random, count: int, negations: int) -> List[str]:
+    lines = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.35:
+            lines.append(f"generated_{i}")
+        elif kind < 0.55:
+            lines.append(f"*.ext{i}")
+        elif kind < 0.7:
+            lines.append(f"cache_{i}/")
+        elif kind < 0.85:
+            lines.append(f"src/module_{i}/*.tmp")
+        else:
+            lines.append(f"/out_{i}/**/[Dd]ebug*")
+    for i in range(negations):
+        lines.insert(rng.randrange(len(lines) + 1), f"!keep_{i}.ext{rng.randrange(count)}")
+    return lines
+
+
+def _paths(rng: random.Random, count: int, patterns: int) -> List[str]:
+    words = ['src', 'lib', 'core', 'app', 'tests', f"generated_{rng.randrange(patterns)}", f"cache_{rng.randrange(patterns)}"]
+    paths = []
+    for i in range(count):
+        parts = [rng.choice(words[:5]) if rng.random() < 0.97 else rng.choice(words) for _ in range(rng.randint(1, 6))]
+        ext = f".ext{rng.randrange(patterns)}" if rng.random() < 0.02 else rng.choice(['.py', '.ts', '.md'])
+        paths.append('/'.join(parts + [f"file_{i}{ext}"]))
+    return paths
+
+
+def _timed(fn: Callable[[], List[bool]]) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patterns", type=int, default=1000)
+    parser.add_argument("--paths", type=int, default=200000)
+    parser.add_argument("--negations", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    options = parser.parse_args()
+
+    rng = random.Random(options.seed)
+    lines = _patterns(rng, options.patterns, options.negations)
+    paths = _paths(rng, options.paths, options.patterns)
+    spec = pathspec.GitIgnoreSpec.from_lines(lines)
+
+    build_s, rules = _timed(lambda: IgnoreRules([], spec))
+    pathspec_s, expected = _timed(lambda: [spec.match_file(path) for path in paths])
+    rules_s, actual = _timed(lambda: [rules.ignores(path) for path in paths])
+    assert expected == actual
+
+    print(f"patterns: {len(lines):,} ({options.negations} negated), paths: {len(paths):,}, ignored: {sum(actual):,}")
+    print(f"GitIgnoreSpec.match_file: {pathspec_s:8.3f} s  ({len(paths) / pathspec_s:12,.0f} paths/s)")
+    print(f"IgnoreRules.ignores:      {rules_s:8.3f} s  ({len(paths) / rules_s:12,.0f} paths/s, {pathspec_s / rules_s:.1f}x, "
+          f"compile {build_s * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Đo chi phí xử lý đường dẫn cho mỗi file trên cây sâu nhiều file.
+
+So sánh cách cũ (``Path(f).resolve() != output_path`` để loại file output, rồi
+``Path(f).relative_to(root)`` cho từng file) với cách hiện tại (so ``(st_dev, st_ino)`` chỉ
+với các file trùng tên output, đường dẫn tương đối ghép sẵn từ ``FileIndex``):
+
+    python -m benchmarks.bench_path_handling --files 200000 --depth 12
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.synthetic_repo import generate_repo
+from core import bundler
+from core.utils import DEFAULT_EXCLUDE_DIRS, find_file_index
+
+EXTENSIONS = ['.py', '.js', '.ts', '.gd', '.md', '.json', '.css']
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _legacy(root: Path, paths: list, output_path: Path) -> list:
+    kept = [f for f in paths if Path(f).resolve() != output_path]
+    return [(Path(f).relative_to(root).as_posix(), f) for f in kept]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--depth", type=int, default=12)
+    parser.add_argument("--files-per-dir", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project = (Path(tmp) / "project").resolve()
+        print(f"generating {options.files} files (depth {options.depth})...")
+        generate_repo(str(project), files=options.files, files_per_dir=options.files_per_dir, depth=options.depth, median_size=16,
+                      size_sigma=0.1, binary_ratio=0.0, scene_ratio=0.0, ignored_ratio=0.0, gitignore_ratio=0.0)
+        # File output nằm trong dự án, như khi chạy ``export-code . -o all_code``.
+        output_path = project / "all_code.md"
+        output_path.write_text("previous bundle\n", encoding="utf-8")
+
+        discovery_s = _best(lambda: find_file_index(str(project), set(DEFAULT_EXCLUDE_DIRS), False, EXTENSIONS + ['.md']),
+                            options.repeat)
+        index = find_file_index(str(project), set(DEFAULT_EXCLUDE_DIRS), False, EXTENSIONS + ['.md'])
+        paths = list(index.paths())
+        count = len(paths)
+
+        legacy_s = _best(lambda: _legacy(project, paths, output_path), options.repeat)
+        current_s = _best(lambda: list(bundler._without_output(index, output_path).items()), options.repeat)
+        assert _legacy(project, paths, output_path) == list(bundler._without_output(index, output_path).items())
+
+    print(f"files: {count:,}")
+    print(f"discovery (find_file_index):       {discovery_s:8.3f} s")
+    print(f"resolve + relative_to per file:    {legacy_s:8.3f} s  ({count / legacy_s:12,.0f} files/s)")
+    print(f"inode check + FileIndex.items():   {current_s:8.3f} s  ({count / current_s:12,.0f} files/s, {legacy_s / current_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+So sánh N plugin dùng hook theo file (một lượt đọc chung) với N plugin tự duyệt dự án.
+
+    python -m benchmarks.bench_plugin_hooks --files 5000 --plugins 8
+"""
+import argparse
+import logging
+import random
+import tempfile
+import time
+from argparse import Namespace
+from pathlib import Path
+
+from core.file_hooks import run_file_hooks
+from core.plugin_base import ExportCodePlugin
+from core.translator import Translator
+from core.utils import DEFAULT_EXCLUDE_DIRS, find_project_files
+
+
+class _CountingPlugin(ExportCodePlugin):
+    parallel_safe = False
+
+    def __init__(self, index):
+        self.index = index
+        self.lines = 0
+
+    @property
+    def command(self):
+        return f"--bench-{self.index}"
+
+    def register_command(self, parser):
+        parser.add_argument(self.command, action="store_true")
+
+    def on_file(self, path, content):
+        self.lines += content.count("\n")
+
+
+def _make_tree(root: Path, file_count: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    for i in range(file_count):
+        directory = root / f"pkg{i % 50}" / f"mod{i % 7}"
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = "\n".join(f"value_{j} = {rng.randint(0, 10**6)}" for j in range(rng.randint(5, 120)))
+        (directory / f"file_{i}.py").write_text(lines + "\n", encoding="utf-8")
+
+
+def _standalone(project: Path, plugins) -> float:
+    start = time.perf_counter()
+    for plugin in plugins:
+        for file_path in find_project_files(str(project), set(DEFAULT_EXCLUDE_DIRS), False, ['.py']):
+            with open(file_path, 'r', encoding='utf-8') as infile:
+                plugin.on_file(file_path, infile.read())
+    return time.perf_counter() - start
+
+
+def _hooked(t, project: Path, plugins) -> float:
+    start = time.perf_counter()
+    files = find_project_files(str(project), set(DEFAULT_EXCLUDE_DIRS), False, ['.py'])
+    run_file_hooks(t, Namespace(), plugins, str(project), files)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--plugins", type=int, default=8)
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project = Path(tmp) / "project"
+        _make_tree(project, options.files)
+        t = Translator(settings_dir=str(Path(tmp) / "settings"))
+
+        standalone = _standalone(project, [_CountingPlugin(i) for i in range(options.plugins)])
+        hooked = _hooked(t, project, [_CountingPlugin(i) for i in range(options.plugins)])
+
+    print(f"files={options.files} plugins={options.plugins}")
+    print(f"standalone walk+read per plugin: {standalone:8.3f} s")
+    print(f"shared hook pass:                {hooked:8.3f} s  ({standalone / hooked:.1f}x)")
+    print("(the OS page cache is warm after the first pass, so this mostly measures walk/decode CPU)")
+
+
+if __name__ == "__main__":
+    main()
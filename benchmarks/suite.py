@@ -0,0 +1,248 @@
+"""
+Bộ đo hiệu năng cho các luồng chính của export-code trên một cây dự án giả lập.
+
+Mỗi kịch bản được chạy ``--repeat`` lần trên cùng một cây (sinh bởi
+``benchmarks.synthetic_repo``); kết quả được ghi ra JSON và có thể so sánh với
+một lần chạy trước để phát hiện hồi quy:
+
+    python -m benchmarks.suite --files 5000 --output before.json
+    python -m benchmarks.suite --files 5000 --output after.json --compare before.json --threshold 0.15
+
+Mã thoát là 1 nếu có kịch bản chậm hơn baseline quá ngưỡng cho phép.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic_repo import DEFAULT_SHAPE, generate_repo
+from core.translator import Translator
+from core.utils import DEFAULT_EXCLUDE_DIRS, find_project_files, load_profiles
+
+RESULTS_VERSION = 1
+# Chênh lệch tuyệt đối nhỏ hơn mức này (giây) được coi là nhiễu, kể cả khi vượt ngưỡng tương đối.
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def _scenario_walk(ctx: Dict[str, Any]) -> None:
+    find_project_files(ctx['project'], set(DEFAULT_EXCLUDE_DIRS), True, [])
+
+
+def _setup_dir_cache(ctx: Dict[str, Any]) -> None:
+    """Lùi mtime các thư mục ra khỏi cửa sổ "racy" rồi chạy một lượt để cache đã sẵn sàng."""
+    import os
+    from core.dir_cache import use_directory_cache
+    past = time.time_ns() - 60 * 10**9
+    for dirpath, _, _ in os.walk(ctx['project']):
+        os.utime(dirpath, ns=(past, past))
+    with use_directory_cache(ctx['project'], str(Path(ctx['work']) / 'dir_cache')):
+        _scenario_walk(ctx)
+
+
+def _scenario_walk_dir_cache(ctx: Dict[str, Any]) -> None:
+    from core.dir_cache import use_directory_cache
+    with use_directory_cache(ctx['project'], str(Path(ctx['work']) / 'dir_cache')):
+        _scenario_walk(ctx)
+
+
+def _scenario_tree(ctx: Dict[str, Any]) -> None:
+    from core.tree_generator import generate_tree
+    generate_tree(ctx['project'], set(DEFAULT_EXCLUDE_DIRS))
+
+
+def _bundle(ctx: Dict[str, Any], output_format: str) -> None:
+    from core.bundler import create_code_bundle
+    create_code_bundle(ctx['t'], ctx['project'], str(Path(ctx['work']) / f"bundle_{output_format}"),
+                       set(DEFAULT_EXCLUDE_DIRS), use_all_text_files=True, output_format=output_format)
+
+
+def _setup_apply(ctx: Dict[str, Any]) -> None:
+    """Tạo bản sao của dự án với một phần file bị sửa, để lần áp dụng có cả file mới lẫn file đổi."""
+    target = Path(ctx['work']) / 'apply_target'
+    if target.exists():
+        shutil.rmtree(target)
+    shutil.copytree(ctx['project'], target)
+    for i, file_path in enumerate(sorted(find_project_files(str(target), set(DEFAULT_EXCLUDE_DIRS), True, []))):
+        if i % 5 == 0:
+            Path(file_path).unlink()
+        elif i % 5 == 1:
+            with open(file_path, 'a', encoding='utf-8') as f:
+                f.write("\n# local edit\n")
+
+
+def _scenario_apply(ctx: Dict[str, Any]) -> None:
+    from core import applier
+    # Chọn tất cả các file thay vì hỏi người dùng.
+    applier.inquirer = SimpleNamespace(Checkbox=lambda name, **kwargs: kwargs,
+                                       prompt=lambda questions, **kwargs: {'files_to_apply': questions[0]['choices']})
+    applier.apply_changes(ctx['t'], str(Path(ctx['work']) / 'apply_target'), ctx['apply_bundle'])
+
+
+def _scenario_stats(ctx: Dict[str, Any]) -> None:
+    from core.stats_generator import export_project_stats
+    export_project_stats(ctx['t'], ctx['project'], str(Path(ctx['work']) / 'stats.txt'), set(DEFAULT_EXCLUDE_DIRS))
+
+
+def _scenario_todo(ctx: Dict[str, Any]) -> None:
+    from core.todo_finder import export_todo_report
+    export_todo_report(ctx['t'], ctx['project'], str(Path(ctx['work']) / 'todo.txt'), set(DEFAULT_EXCLUDE_DIRS))
+
+
+def _scenario_api_map(ctx: Dict[str, Any]) -> None:
+    from core.api_mapper import export_api_map
+    export_api_map(ctx['t'], ctx['project'], str(Path(ctx['work']) / 'api_map.txt'), set(DEFAULT_EXCLUDE_DIRS), ctx['profiles'])
+
+
+def _scenario_scene_tree(ctx: Dict[str, Any]) -> None:
+    from core.tree_generator import export_godot_scene_trees
+    export_godot_scene_trees(ctx['t'], ctx['project'], str(Path(ctx['work']) / 'scenes.txt'), set(DEFAULT_EXCLUDE_DIRS))
+
+
+# Tên kịch bản -> (hàm chuẩn bị không tính giờ hoặc None, hàm được đo).
+SCENARIOS: Dict[str, Any] = {
+    'walk': (None, _scenario_walk),
+    'walk_dir_cache': (_setup_dir_cache, _scenario_walk_dir_cache),
+    'tree': (None, _scenario_tree),
+    'bundle_txt': (None, lambda ctx: _bundle(ctx, 'txt')),
+    'bundle_md': (None, lambda ctx: _bundle(ctx, 'md')),
+    'apply': (_setup_apply, _scenario_apply),
+    'stats': (None, _scenario_stats),
+    'todo': (None, _scenario_todo),
+    'api_map': (None, _scenario_api_map),
+    'scene_tree': (None, _scenario_scene_tree),
+}
+
+
+def _time_scenario(ctx: Dict[str, Any], setup: Optional[Callable], run: Callable, repeat: int) -> Dict[str, Any]:
+    wall, cpu = [], []
+    for _ in range(repeat):
+        if setup:
+            setup(ctx)
+        # Thanh tiến trình của tqdm ghi ra stderr; bỏ đi để không ảnh hưởng tới phép đo.
+        with contextlib.redirect_stderr(io.StringIO()):
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            run(ctx)
+            wall.append(time.perf_counter() - start_wall)
+            cpu.append(time.process_time() - start_cpu)
+    return {'median': statistics.median(wall), 'min': min(wall), 'cpu_median': statistics.median(cpu), 'runs': wall}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(Path(__file__).resolve().parent.parent),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        return result.stdout.decode('ascii').strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(shape: Dict[str, Any], scenarios: List[str], repeat: int = 3, workdir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Sinh cây dự án theo ``shape`` rồi đo các kịch bản đã chọn.
+
+    Returns:
+        Dict kết quả gồm ``meta`` (phiên bản Python, commit, cây đã sinh) và ``results``
+        (thời gian median/min/CPU của từng kịch bản, tính bằng giây).
+    """
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        project = str(Path(tmp) / 'project')
+        work = Path(tmp) / 'work'
+        work.mkdir()
+        repo_info = generate_repo(project, **shape)
+        ctx = {
+            'project': project,
+            'work': str(work),
+            't': Translator(settings_dir=str(Path(tmp) / 'settings')),
+            'profiles': load_profiles(project),
+        }
+        if 'apply' in scenarios:
+            from core.bundler import create_code_bundle
+            with contextlib.redirect_stderr(io.StringIO()):
+                create_code_bundle(ctx['t'], project, str(work / 'apply_bundle'), set(DEFAULT_EXCLUDE_DIRS), use_all_text_files=True)
+            ctx['apply_bundle'] = str(work / 'apply_bundle.txt')
+
+        results = {}
+        for name in scenarios:
+            setup, run = SCENARIOS[name]
+            results[name] = _time_scenario(ctx, setup, run, repeat)
+            print(f"{name:<12} median {results[name]['median']:8.3f} s   min {results[name]['min']:8.3f} s", file=sys.stderr)
+
+    return {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'repo': repo_info,
+        },
+        'results': results,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, metric: str = 'min') -> List[Dict[str, Any]]:
+    """
+    So sánh thời gian của từng kịch bản với baseline theo ``metric`` (``min`` hoặc ``median``).
+
+    Mặc định dùng ``min`` vì thời gian nhanh nhất ít bị nhiễu bởi tải nền của máy hơn.
+
+    Returns:
+        Danh sách dòng so sánh (``scenario``, ``baseline``, ``current``, ``ratio``, ``regressed``).
+    """
+    rows = []
+    for name, result in current.get('results', {}).items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        ratio = result[metric] / base[metric] if base[metric] else float('inf')
+        regressed = ratio > 1 + threshold and result[metric] - base[metric] > MIN_REGRESSION_SECONDS
+        rows.append({'scenario': name, 'baseline': base[metric], 'current': result[metric], 'ratio': ratio, 'regressed': regressed})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for key, value in DEFAULT_SHAPE.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value, help=f"(default: {value})")
+    parser.add_argument("--scenarios", nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", help="Directory for the temporary tree (default: system temp dir).")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a previous results JSON file.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown ratio before a scenario counts as a regression.")
+    parser.add_argument("--metric", choices=['min', 'median'], default='min', help="Timing compared against the baseline.")
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    shape = {key: getattr(options, key) for key in DEFAULT_SHAPE}
+    data = run_suite(shape, options.scenarios, max(1, options.repeat), options.workdir)
+    if options.output:
+        Path(options.output).write_text(json.dumps(data, indent=2), encoding='utf-8')
+    else:
+        print(json.dumps(data, indent=2))
+
+    if options.compare:
+        baseline = json.loads(Path(options.compare).read_text(encoding='utf-8'))
+        if baseline.get('meta', {}).get('repo') != data['meta']['repo']:
+            print("warning: baseline was measured on a different synthetic tree", file=sys.stderr)
+        rows = compare_results(data, baseline, options.threshold, options.metric)
+        for row in rows:
+            flag = "REGRESSION" if row['regressed'] else ""
+            print(f"{row['scenario']:<12} {row['baseline']:8.3f} s -> {row['current']:8.3f} s  ({row['ratio']:.2f}x) {flag}", file=sys.stderr)
+        if any(row['regressed'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
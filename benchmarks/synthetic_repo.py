@@ -0,0 +1,191 @@
+"""
+Sinh một cây dự án giả lập có tính tất định để đo hiệu năng.
+
+Cùng tham số và ``seed`` luôn cho ra cùng một cây (tên, kích thước và nội dung file),
+nên kết quả đo giữa các commit có thể so sánh với nhau.
+
+    python -m benchmarks.synthetic_repo /tmp/synthetic --files 5000 --depth 6
+"""
+import argparse
+import json
+import math
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+DEFAULT_SHAPE: Dict[str, Any] = {
+    'files': 2000,
+    'depth': 5,             # độ sâu tối đa của thư mục
+    'files_per_dir': 12,    # số file trung bình trong một thư mục
+    'median_size': 2048,    # kích thước trung vị (byte), phân phối log-normal
+    'size_sigma': 1.0,      # độ lệch của phân phối kích thước
+    'max_size': 512 * 1024,
+    'binary_ratio': 0.05,
+    'scene_ratio': 0.05,    # tỉ lệ file .tscn của Godot
+    'gitignore_ratio': 0.1, # tỉ lệ thư mục có .gitignore riêng
+    'ignored_ratio': 0.05,  # tỉ lệ file rơi vào các mẫu bị ignore
+    'seed': 0,
+}
+
+_SOURCE_EXTENSIONS = ['.py', '.py', '.js', '.ts', '.gd', '.gd', '.md', '.json', '.css']
+_ROOT_GITIGNORE = "*.log\n*.tmp\nbuild/\n__generated__/\n"
+_NESTED_GITIGNORE = "*.cache\nlocal_*.json\n"
+
+
+def _python_block(rng: random.Random, n: int) -> str:
+    name = f"handler_{n}_{rng.randint(0, 9999)}"
+    lines = [f"def {name}(request, limit={rng.randint(1, 100)}):", f"    \"\"\"Xử lý yêu cầu số {n}.\"\"\""]
+    if rng.random() < 0.1:
+        lines.append("    # TODO: kiểm tra lại giới hạn")
+    lines += [f"    total = sum(range(limit)) + {rng.randint(0, 10**6)}", "    return total", "", ""]
+    return "\n".join(lines)
+
+
+def _js_block(rng: random.Random, n: int) -> str:
+    lines = [f"export function compute{n}(items, factor = {rng.randint(1, 9)}) {{"]
+    if rng.random() < 0.1:
+        lines.append("  // FIXME: xử lý mảng rỗng")
+    lines += [f"  return items.map((x) => x * factor + {rng.randint(0, 999)});", "}", "", ""]
+    return "\n".join(lines)
+
+
+def _gd_block(rng: random.Random, n: int) -> str:
+    lines = [f"func _on_signal_{n}(value: int, scale: float = {rng.random():.2f}) -> float:"]
+    if rng.random() < 0.1:
+        lines.append("\t# NOTE: gọi từ scene chính")
+    lines += [f"\treturn value * scale + {rng.randint(0, 99)}", "", ""]
+    return "\n".join(lines)
+
+
+def _text_block(rng: random.Random, n: int) -> str:
+    words = ["export", "bundle", "project", "scene", "tree", "file", "token", "shard", "index", "cache"]
+    return " ".join(rng.choice(words) for _ in range(rng.randint(8, 20))) + f" ({n})\n\n"
+
+
+_BLOCKS = {'.py': _python_block, '.js': _js_block, '.ts': _js_block, '.gd': _gd_block}
+
+
+def _source_content(rng: random.Random, ext: str, size: int) -> str:
+    block = _BLOCKS.get(ext, _text_block)
+    if ext == '.json':
+        items = []
+        length = 2
+        while length < size:
+            item = f'"key_{len(items)}": {rng.randint(0, 10**6)}'
+            items.append(item)
+            length += len(item) + 4
+        return "{\n  " + ",\n  ".join(items) + "\n}\n"
+    parts, length, n = [], 0, 0
+    while length < size:
+        part = block(rng, n)
+        parts.append(part)
+        length += len(part)
+        n += 1
+    return "".join(parts)
+
+
+def _scene_content(rng: random.Random, name: str, size: int) -> str:
+    lines = ['[gd_scene load_steps=3 format=3 uid="uid://b{0}"]'.format(rng.randint(10**6, 10**7)), ""]
+    lines.append('[ext_resource type="PackedScene" uid="uid://c{0}" path="res://scenes/child_{0}.tscn" id="1_child"]'.format(rng.randint(0, 999)))
+    lines += ["", f'[node name="{name}" type="Node2D"]', ""]
+    parents, length, n = ["."], sum(len(line) for line in lines), 0
+    while length < size:
+        parent = rng.choice(parents)
+        node_type = rng.choice(["Sprite2D", "Area2D", "CollisionShape2D", "Label", "Timer"])
+        if rng.random() < 0.1:
+            line = f'[node name="Child{n}" parent="{parent}" instance=ExtResource("1_child")]'
+        else:
+            line = f'[node name="Node{n}" type="{node_type}" parent="{parent}"]'
+        lines += [line, f"position = Vector2({rng.randint(0, 999)}, {rng.randint(0, 999)})", ""]
+        parents.append(f"Node{n}" if parent == "." else f"{parent}/Node{n}")
+        length += len(line) + 30
+        n += 1
+    return "\n".join(lines) + "\n"
+
+
+def _make_dirs(rng: random.Random, count: int, depth: int) -> List[str]:
+    dirs = [""]
+    while len(dirs) < count:
+        parent = rng.choice(dirs)
+        level = parent.count("/") + 1 if parent else 0
+        if level >= depth:
+            continue
+        name = f"{rng.choice(['src', 'lib', 'pkg', 'mod', 'core', 'ui', 'scenes', 'util'])}_{len(dirs)}"
+        dirs.append(f"{parent}/{name}" if parent else name)
+    return dirs
+
+
+def generate_repo(root: str, **shape: Any) -> Dict[str, Any]:
+    """
+    Sinh cây dự án giả lập tại ``root``.
+
+    Args:
+        root: Thư mục đích (sẽ được tạo nếu chưa có).
+        **shape: Ghi đè các khóa trong ``DEFAULT_SHAPE``.
+
+    Returns:
+        Dict mô tả cây đã sinh: tham số đã dùng cùng số file, số byte và số thư mục.
+    """
+    unknown = set(shape) - set(DEFAULT_SHAPE)
+    if unknown:
+        raise ValueError(f"Unknown shape option(s): {', '.join(sorted(unknown))}")
+    config = dict(DEFAULT_SHAPE, **shape)
+    rng = random.Random(config['seed'])
+    root_path = Path(root)
+    root_path.mkdir(parents=True, exist_ok=True)
+
+    dirs = _make_dirs(rng, max(1, config['files'] // max(1, config['files_per_dir'])), config['depth'])
+    for directory in dirs:
+        (root_path / directory).mkdir(parents=True, exist_ok=True)
+    (root_path / '.gitignore').write_text(_ROOT_GITIGNORE, encoding='utf-8')
+    nested_gitignores = 0
+    for directory in dirs[1:]:
+        if rng.random() < config['gitignore_ratio']:
+            (root_path / directory / '.gitignore').write_text(_NESTED_GITIGNORE, encoding='utf-8')
+            nested_gitignores += 1
+
+    counts = {'source': 0, 'binary': 0, 'scene': 0, 'ignored': 0}
+    total_bytes = 0
+    mu = math.log(max(1, config['median_size']))
+    for i in range(config['files']):
+        directory = root_path / rng.choice(dirs)
+        size = min(config['max_size'], max(16, int(rng.lognormvariate(mu, config['size_sigma']))))
+        roll = rng.random()
+        if roll < config['binary_ratio']:
+            data = bytes([0x89, 0x50, 0x4E, 0x47, 0, 0]) + rng.getrandbits(size * 8).to_bytes(size, 'little')
+            (directory / f"asset_{i}.png").write_bytes(data)
+            counts['binary'] += 1
+            total_bytes += len(data)
+            continue
+        roll -= config['binary_ratio']
+        if roll < config['scene_ratio']:
+            path, content = directory / f"scene_{i}.tscn", _scene_content(rng, f"Scene{i}", size)
+            counts['scene'] += 1
+        elif roll - config['scene_ratio'] < config['ignored_ratio']:
+            target = directory / rng.choice(['build', '__generated__'])
+            target.mkdir(exist_ok=True)
+            path, content = target / f"out_{i}.js", _source_content(rng, '.js', size)
+            counts['ignored'] += 1
+        else:
+            ext = rng.choice(_SOURCE_EXTENSIONS)
+            path, content = directory / f"file_{i}{ext}", _source_content(rng, ext, size)
+            counts['source'] += 1
+        data = content.encode('utf-8')
+        path.write_bytes(data)
+        total_bytes += len(data)
+
+    return dict(config, directories=len(dirs), nested_gitignores=nested_gitignores, total_bytes=total_bytes, **counts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root")
+    for key, value in DEFAULT_SHAPE.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    options = vars(parser.parse_args())
+    root = options.pop('root')
+    print(json.dumps(generate_repo(root, **options), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,24 +2,15 @@ import os
 import argparse
 import logging
 import sys
-import time
+from typing import Any, Optional
 from pathlib import Path
 
+# Chỉ import những module nhẹ cần cho việc phân tích tham số. Các hệ thống con
+# (GitPython, watchdog, tqdm, colorama, ...) được import trễ bên trong từng chế độ
+# để một lệnh đơn giản như `--tree-only` không phải trả chi phí khởi động của chúng.
 from .logger_setup import setup_logging
-from .utils import load_profiles, find_project_files, get_gitignore_spec, get_extensions_from_profiles, DEFAULT_EXCLUDE_DIRS, setup_console_encoding
-from .tree_generator import generate_tree, export_godot_scene_trees
-from .bundler import create_code_bundle
-from .api_mapper import export_api_map
-from .stats_generator import export_project_stats
-from .applier import apply_changes
-from .todo_finder import export_todo_report
-from .quality_checker import run_quality_tool
-from .git_utils import get_staged_files, get_changed_files_since
+from .utils import load_profiles, find_file_index, get_extensions_from_profiles, DEFAULT_EXCLUDE_DIRS, setup_console_encoding
 from .translator import Translator
-from .plugin_loader import load_plugins
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
 
 
 def _ascii_tree_fallback(text):
@@ -30,6 +21,26 @@ def _ascii_tree_fallback(text):
     )
 
 
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"'{value}' không phải là số nguyên dương")
+    return number
+
+
+def _positive_float(value):
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"'{value}' không phải là số dương")
+    return number
+
+
 def _print_tree_output(project_root, tree_structure):
     lines = ["-" * 50, f"{Path(project_root).name}/", tree_structure, "-" * 50]
     try:
@@ -39,45 +50,6 @@ def _print_tree_output(project_root, tree_structure):
         for line in lines:
             print(_ascii_tree_fallback(line))
 
-class ChangeHandler(FileSystemEventHandler):
-    def __init__(self, t, project_path, output_file, extensions, exclude_dirs, use_all_text_files, output_format='txt'):
-        self.t = t
-        self.project_path = project_path
-        self.output_file = output_file
-        self.extensions = extensions
-        self.exclude_dirs = exclude_dirs
-        self.use_all_text_files = use_all_text_files
-        self.output_format = output_format
-        
-        self.output_filepath = Path(output_file).with_suffix(f'.{output_format}').resolve()
-        logging.info(self.t.get("info_watch_start"))
-
-    def on_modified(self, event):
-        if event.is_directory: return
-        src_path = Path(event.src_path).resolve()
-        if src_path == self.output_filepath: return
-        
-        try:
-            rel_path = src_path.relative_to(Path(self.project_path).resolve()).as_posix()
-        except ValueError:
-            return
-
-        if any(rel_path.startswith(excluded + '/') for excluded in self.exclude_dirs): return
-
-        should_rebundle = False
-        if self.use_all_text_files:
-            from .utils import is_text_file
-            if is_text_file(event.src_path): should_rebundle = True
-        elif any(event.src_path.endswith(ext) for ext in self.extensions): should_rebundle = True
-
-        if should_rebundle:
-            logging.info(self.t.get("info_watch_change_detected").format(path=rel_path))
-            try:
-                create_code_bundle(self.t, self.project_path, self.output_file, set(self.exclude_dirs), self.use_all_text_files, self.extensions, include_tree=False, output_format=self.output_format)
-                logging.info(self.t.get("info_watch_success"))
-            except Exception as e: 
-                logging.error(self.t.get("error_watch_rebundle_failed").format(error=e), exc_info=True)
-
 def run_interactive_mode(t):
     import inquirer
     from inquirer.themes import GreenPassion
@@ -89,6 +61,9 @@ def run_interactive_mode(t):
     project_path = ans['project_path']
     
     profiles = load_profiles(project_path)
+    # Tìm file trong nền trong lúc người dùng trả lời các câu hỏi tiếp theo.
+    from .prefetch import DiscoveryPrefetch
+    prefetch = DiscoveryPrefetch(project_path, set(DEFAULT_EXCLUDE_DIRS)).start()
 
     ans = inquirer.prompt([
         inquirer.List('action', message=t.get("prompt_what_to_do"),
@@ -100,19 +75,25 @@ def run_interactive_mode(t):
     if not action or action == 'exit': logging.info(t.get("goodbye")); return
 
     if action in ['stats', 'todo', 'tree_only']:
+        if action == 'tree_only': prefetch.stop()
         output_file = ''
         if action != 'tree_only':
             ans = inquirer.prompt([inquirer.Text('output', message=t.get("prompt_output_filename"))], theme=GreenPassion())
             if not ans: logging.info(t.get("goodbye")); return
             output_file = ans['output']
-        if action == 'stats': export_project_stats(t, project_path, output_file or 'project_stats.txt', set(DEFAULT_EXCLUDE_DIRS))
-        elif action == 'todo': export_todo_report(t, project_path, output_file or 'todo_report.txt', set(DEFAULT_EXCLUDE_DIRS))
+        if action == 'stats':
+            from .stats_generator import export_project_stats
+            export_project_stats(t, project_path, output_file or 'project_stats.txt', set(DEFAULT_EXCLUDE_DIRS), file_list=prefetch.files(True, []))
+        elif action == 'todo':
+            from .todo_finder import export_todo_report
+            export_todo_report(t, project_path, output_file or 'todo_report.txt', set(DEFAULT_EXCLUDE_DIRS), file_list=prefetch.files(True, []))
         elif action == 'tree_only':
+            from .tree_generator import generate_tree
+            from .ignore import load_ignore_rules
             project_root = Path(project_path).resolve()
             logging.warning(t.get("warn_watch_git_mode"))
-            gitignore_spec = get_gitignore_spec(str(project_root))
-            if gitignore_spec: logging.info(t.get("info_found_gitignore"))
-            tree_structure = generate_tree(str(project_root), set(DEFAULT_EXCLUDE_DIRS), gitignore_spec)
+            if load_ignore_rules(str(project_root), DEFAULT_EXCLUDE_DIRS).has_gitignore: logging.info(t.get("info_found_gitignore"))
+            tree_structure = generate_tree(str(project_root), set(DEFAULT_EXCLUDE_DIRS))
             _print_tree_output(str(project_root), tree_structure)
         return
 
@@ -126,6 +107,9 @@ def run_interactive_mode(t):
     if not ans: logging.info(t.get("goodbye")); return
     source_mode = ans.get('source')
 
+    if source_mode in ('staged', 'since'):
+        prefetch.stop()
+        from .git_utils import get_staged_files, get_changed_files_since
     if source_mode == 'staged': initial_file_list = get_staged_files(t, project_path)
     elif source_mode == 'since':
         ans = inquirer.prompt([inquirer.Text('branch', message=t.get("prompt_branch_name"), default='main')], theme=GreenPassion())
@@ -166,7 +150,7 @@ def run_interactive_mode(t):
             extensions_to_use = get_extensions_from_profiles(profiles, profile_names_to_use)
 
     if source_mode == 'walk':
-        final_files_to_process = find_project_files(project_path, set(DEFAULT_EXCLUDE_DIRS), use_all_files, extensions_to_use)
+        final_files_to_process = prefetch.files(use_all_files, extensions_to_use)
     else:
         if use_all_files:
             from .utils import is_text_file
@@ -180,19 +164,14 @@ def run_interactive_mode(t):
         logging.info(t.get("info_no_files_after_filter")); return
 
     if action == 'format_code' or action == 'lint':
+        from .quality_checker import run_quality_for_profiles
         tool_key = 'formatter' if action == 'format_code' else 'linter'
         if not profile_names_to_use:
             logging.error(t.get("error_profile_needed_lint")); return
 
-        for profile_name in profile_names_to_use:
-            profile_data = profiles.get(profile_name, {})
-            tool_info = profile_data.get(tool_key)
-            if tool_info and tool_info.get('command') and tool_info.get('extensions'):
-                command, exts_for_tool = tool_info['command'], tool_info['extensions']
-                files_for_tool = [f for f in final_files_to_process if f.endswith(tuple(exts_for_tool))]
-                if files_for_tool: run_quality_tool(t, tool_key, command, files_for_tool)
-            else:
-                logging.info(f"Thông báo: Profile '{profile_name}' không có cấu hình cho '{tool_key}'.")
+        if source_mode == 'walk':
+            final_files_to_process = list(final_files_to_process.paths())
+        run_quality_for_profiles(t, tool_key, profiles, profile_names_to_use, final_files_to_process, project_path)
 
     elif action == 'bundle':
         ans = inquirer.prompt([inquirer.Text('output', message=t.get("prompt_output_filename"))], theme=GreenPassion())
@@ -205,28 +184,24 @@ def run_interactive_mode(t):
         ], theme=GreenPassion())
         if not bundle_answers: logging.info(t.get("goodbye")); return
         
+        from .bundler import create_code_bundle
         create_code_bundle(t, project_path, output_filename, set(DEFAULT_EXCLUDE_DIRS), file_list=final_files_to_process, output_format=bundle_answers.get('output_format', 'md'))
         
         if bundle_answers.get('watch') and source_mode == 'walk':
-            event_handler = ChangeHandler(t, project_path, output_filename, extensions_to_use, set(DEFAULT_EXCLUDE_DIRS), use_all_files, output_format=bundle_answers.get('output_format', 'md'))
-            observer = Observer()
-            observer.schedule(event_handler, project_path, recursive=True)
-            observer.start()
-            try:
-                while True: time.sleep(1)
-            except KeyboardInterrupt:
-                observer.stop(); logging.info("\n🛑 Đã dừng theo dõi.")
-            observer.join()
+            from .watcher import watch_and_rebundle
+            watch_and_rebundle(t, project_path, output_filename, extensions_to_use, set(DEFAULT_EXCLUDE_DIRS), use_all_files, output_format=bundle_answers.get('output_format', 'md'))
         elif bundle_answers.get('watch'):
             logging.warning(t.get("warn_watch_git_mode"))
             return
 
 def _get_files_to_process(t, args, profiles):
     """
-    Hàm helper để lấy danh sách file cần xử lý, dùng chung cho cả chế độ CLI và Interactive
+    Hàm helper để lấy danh sách file cần xử lý, dùng chung cho cả chế độ CLI và Interactive.
+    Khi duyệt thư mục, kết quả là ``FileIndex``; với ``--staged``/``--since`` là list đường dẫn.
     """
     final_files_to_process, initial_file_list = [], None
     if args.staged or args.since:
+        from .git_utils import get_staged_files, get_changed_files_since
         if args.staged:
             logging.info(t.get("info_git_mode_staged"))
             initial_file_list = get_staged_files(t, args.project_path)
@@ -242,7 +217,7 @@ def _get_files_to_process(t, args, profiles):
         elif args.profile:
             extensions_to_use_walk = get_extensions_from_profiles(profiles, profile_names_to_use_walk)
         else: extensions_to_use_walk = profiles.get('default', {}).get('extensions', [])
-        initial_file_list = find_project_files(args.project_path, set(args.exclude), use_all_files_walk, extensions_to_use_walk)
+        initial_file_list = find_file_index(args.project_path, set(args.exclude), use_all_files_walk, extensions_to_use_walk)
 
     extensions_to_filter = []
     profile_names_to_use = args.profile or []
@@ -265,6 +240,38 @@ def _get_files_to_process(t, args, profiles):
     return final_files_to_process
 
 
+def _get_git_content_source(t, args, profiles):
+    """
+    Tạo nguồn nội dung đọc từ object của Git cho `--rev`/`--from-index`, áp dụng cùng
+    các bộ lọc thư mục và đuôi file như khi duyệt working tree.
+    """
+    from .git_utils import get_revision_source
+    if args.rev: logging.info(t.get("info_git_mode_rev", rev=args.rev))
+    else: logging.info(t.get("info_git_mode_index"))
+    source = get_revision_source(t, args.project_path, args.rev if args.rev else None)
+    if source is None:
+        return None
+
+    from .ignore import IgnoreRules
+    rules = IgnoreRules(args.exclude)
+    if args.all: extensions = None
+    elif args.ext: extensions = tuple(args.ext)
+    elif args.profile: extensions = tuple(get_extensions_from_profiles(profiles, args.profile))
+    else: extensions = tuple(profiles.get('default', {}).get('extensions', []))
+
+    def keep(relative_path):
+        dir_parts = relative_path.split('/')[:-1]
+        if any(rules.excludes_dir_name(part) for part in dir_parts):
+            return False
+        return extensions is None or relative_path.endswith(extensions)
+
+    source = source.filter(keep)
+    source.skip_binary = bool(args.all)
+    if not source.paths:
+        logging.info(t.get("info_no_files_after_filter")); return None
+    return source
+
+
 def validate_input_paths(t: Any, project_path: str, output_file: Optional[str] = None) -> bool:
     """
     Kiểm tra tính hợp lệ của các đường dẫn đầu vào.
@@ -289,20 +296,106 @@ def validate_input_paths(t: Any, project_path: str, output_file: Optional[str] =
             
     return True
 
+def _run_serve(t, argv):
+    """`export-code serve`: chạy daemon giữ chỉ mục dự án trong bộ nhớ."""
+    from .daemon import default_socket_path, send_request, serve
+    parser = argparse.ArgumentParser(prog="export-code serve", description=t.get("help_serve", default="Run a background daemon that keeps project indexes warm and serves --daemon requests over a Unix socket."))
+    parser.add_argument("--socket", metavar="PATH", default=default_socket_path(), help=t.get("help_serve_socket", default="Unix socket path (default: $EXPORT_CODE_SOCKET or a per-user path)."))
+    parser.add_argument("--stop", action="store_true", help=t.get("help_serve_stop", default="Ask the running daemon to shut down."))
+    parser.add_argument("--lang", choices=['en', 'vi'], help=t.get("help_lang", default="Set the display language."))
+    verbosity_group = parser.add_mutually_exclusive_group()
+    verbosity_group.add_argument("-q", "--quiet", action="store_true", help=t.get("help_quiet", default="Quiet mode."))
+    verbosity_group.add_argument("-v", "--verbose", action="count", default=0, help=t.get("help_verbose", default="Verbose output."))
+    args = parser.parse_args(argv)
+    if args.lang:
+        t.lang = args.lang
+    setup_logging('daemon', args.verbose, args.quiet)
+
+    if args.stop:
+        if send_request('shutdown', socket_path=args.socket) is None:
+            logging.info(t.get("info_daemon_not_running", path=args.socket))
+        return
+    serve(t, args.socket)
+
+
+def _try_daemon(t, args, profiles):
+    """
+    Gửi lệnh tới daemon khi có `--daemon`. Trả về True nếu daemon đã xử lý xong; False nếu
+    lệnh cần chạy trong tiến trình (không có daemon, hoặc chế độ/tùy chọn daemon không hỗ trợ).
+    """
+    if args.timings or args.profile_run or args.metrics_out or args.output == '-':
+        return False
+    payload = {
+        'project': str(Path(args.project_path).resolve()),
+        'exclude': list(args.exclude),
+        'lang': t.lang,
+        'log_level': logging.getLogger().getEffectiveLevel(),
+    }
+    if args.tree_only:
+        command = 'tree'
+    elif args.stats:
+        command, payload['output'] = 'stats', os.path.abspath(args.output or 'project_stats.txt')
+    elif args.todo:
+        command, payload['output'] = 'todo', os.path.abspath(args.output or 'todo_report.txt')
+    elif any([args.apply, args.verify, args.scene_tree, args.api_map, args.format_code, args.lint, args.watch,
+              args.staged, args.since, args.rev, args.from_index, args.delta_from]):
+        return False
+    else:
+        if args.all: extensions = []
+        elif args.ext: extensions = args.ext
+        elif args.profile: extensions = get_extensions_from_profiles(profiles, args.profile)
+        else: extensions = profiles.get('default', {}).get('extensions', [])
+        command = 'bundle'
+        payload.update(output=os.path.abspath(args.output or 'all_code'), format=args.format, use_all=bool(args.all), extensions=extensions,
+                       max_bytes=args.max_bytes, max_tokens=args.max_tokens, dedup=args.dedup,
+                       compression=args.compress, compression_level=args.compress_level, non_utf8=args.non_utf8,
+                       hash_algorithm=None if args.no_manifest else args.hash)
+
+    from .daemon import run_via_daemon
+    response = run_via_daemon(command, payload)
+    if response is None:
+        return False
+    if command == 'tree':
+        _print_tree_output(response['root'], response['tree'])
+    return True
+
+
 def main():
     setup_console_encoding()
     t = Translator()
+    if sys.argv[1:2] == ['serve']:
+        _run_serve(t, sys.argv[2:]); return
     parser = argparse.ArgumentParser(description=t.get("app_description", default="A tool to bundle, analyze, and manage code projects."))
     
     parser.add_argument("project_path", nargs='?', default=".", help=t.get("help_project_path", default="Path to the project."))
-    parser.add_argument("-o", "--output", help=t.get("help_output", default="Output filename."))
+    parser.add_argument("-o", "--output", help=t.get("help_output", default="Output filename ('-' writes the bundle to stdout)."))
     parser.add_argument("--exclude", nargs='+', default=DEFAULT_EXCLUDE_DIRS, help=t.get("help_exclude", default="Directories to exclude."))
     parser.add_argument("--watch", action="store_true", help=t.get("help_watch", default="Automatically re-run on file changes."))
+    parser.add_argument("--watch-poll", type=_positive_float, metavar="SECONDS", help=t.get("help_watch_poll", default="With --watch, poll for changes every SECONDS seconds instead of using OS notifications (for filesystems without inotify)."))
     parser.add_argument("--format", choices=['txt', 'md'], default='txt', help=t.get("help_format", default="Output file format."))
+    parser.add_argument("--max-bytes", type=_positive_int, metavar="N", help=t.get("help_max_bytes", default="Split the bundle into numbered shards of at most N bytes each."))
+    parser.add_argument("--max-tokens", type=_positive_int, metavar="N", help=t.get("help_max_tokens", default="Split the bundle into numbered shards of at most about N tokens each (estimated)."))
+    parser.add_argument("--compress", choices=['gzip', 'xz', 'bz2'], help=t.get("help_compress", default="Compress the bundle while writing it (adds .gz/.xz/.bz2 to the output name)."))
+    parser.add_argument("--compress-level", type=int, metavar="N", help=t.get("help_compress_level", default="Compression level (gzip/xz: 0-9, bz2: 1-9)."))
+    parser.add_argument("--non-utf8", choices=['skip', 'bom', 'surrogateescape'], default='skip', help=t.get("help_non_utf8", default="How to bundle files that are not valid UTF-8: skip them, transcode UTF-16/32 files with a BOM, or copy their bytes unchanged."))
+    parser.add_argument("--hash", choices=['sha256', 'blake2b'], default='sha256', help=t.get("help_hash", default="Hash algorithm of the per-file manifest written at the end of the bundle."))
+    parser.add_argument("--no-manifest", action="store_true", help=t.get("help_no_manifest", default="Do not write the per-file hash manifest at the end of the bundle."))
+    parser.add_argument("--delta-from", metavar="OLD_BUNDLE_OR_MANIFEST", help=t.get("help_delta_from", default="Only bundle files added or modified since an earlier bundle (or its manifest), plus a list of deleted files."))
+    parser.add_argument("--dir-cache", action="store_true", help=t.get("help_dir_cache", default="Reuse directory listings from the previous run for directories whose modification time has not changed."))
+    parser.add_argument("--dedup", action="store_true", help=t.get("help_dedup", default="Write files whose content is identical to an earlier file as a short reference instead of repeating it."))
     parser.add_argument("--review", action="store_true", help=t.get("help_review", default="Show a detailed diff view before applying changes."))
     parser.add_argument("--lang", choices=['en', 'vi'], help=t.get("help_lang", default="Set the display language."))
     parser.add_argument("--set-lang", choices=['en', 'vi'], help="Set and save the default language, then exit.")
-
+    parser.add_argument("--jobs", type=int, metavar="N", help=t.get("help_jobs", default="Maximum number of formatter/linter processes to run in parallel."))
+    parser.add_argument("--full", action="store_true", help=t.get("help_full", default="Run the formatter/linter on every selected file, ignoring the incremental cache."))
+    parser.add_argument("--timings", action="store_true", help=t.get("help_timings", default="Print per-phase wall/CPU times and file/byte counters when the run finishes."))
+    parser.add_argument("--profile-run", metavar="FILE", help=t.get("help_profile_run", default="Profile the run with cProfile and write the pstats dump to FILE."))
+    parser.add_argument("--metrics-out", metavar="FILE", help=t.get("help_metrics_out", default="Write run metrics (phase durations, file/byte counters, cache hit rates, errors, peak RSS) to FILE."))
+    parser.add_argument("--metrics-format", choices=['json', 'prometheus'], help=t.get("help_metrics_format", default="Format of --metrics-out (default: prometheus for *.prom files, otherwise json)."))
+    parser.add_argument("--daemon", action="store_true", help=t.get("help_daemon", default="Send the request to a running `export-code serve` daemon; falls back to running in-process if none is reachable."))
+    parser.add_argument("--tool-timeout", type=float, default=300, metavar="SECONDS", help=t.get("help_tool_timeout", default="Timeout in seconds for each formatter/linter batch (0 = no limit)."))
+
+    from .plugin_loader import load_plugins
     plugin_instances = load_plugins()
     registered_plugins = []
     plugin_registration_errors = []
@@ -319,6 +412,7 @@ def main():
 
     mode_group = parser.add_mutually_exclusive_group()
     mode_group.add_argument("--apply", metavar="BUNDLE_FILE", help=t.get("help_apply", default="Apply code from a bundle file."))
+    mode_group.add_argument("--verify", metavar="BUNDLE_FILE", help=t.get("help_verify", default="Check a bundle against its hash manifest."))
     mode_group.add_argument("--tree-only", action="store_true", help=t.get("help_tree_only", default="Only print the directory tree."))
     mode_group.add_argument("--scene-tree", action="store_true", help=t.get("help_scene_tree", default="Export Godot scene tree structures."))
     mode_group.add_argument("--api-map", action="store_true", help=t.get("help_api_map", default="Create an API/function map."))
@@ -327,17 +421,25 @@ def main():
     mode_group.add_argument("--format-code", action="store_true", help=t.get("help_format_code", default="Automatically format code."))
     mode_group.add_argument("--lint", action="store_true", help=t.get("help_lint", default="Lint code to find potential errors."))
 
-    profiles_for_choices = load_profiles('.')
     file_selection_group = parser.add_mutually_exclusive_group()
     file_selection_group.add_argument("-a", "--all", action="store_true", help=t.get("help_all", default="Select all text files."))
-    file_selection_group.add_argument("-p", "--profile", nargs='+', choices=list(profiles_for_choices.keys()), help=t.get("help_profile", default="Select files by profile."))
+    file_selection_group.add_argument("-p", "--profile", nargs='+', metavar="PROFILE", help=t.get("help_profile", default="Select files by profile."))
     file_selection_group.add_argument("-e", "--ext", nargs='+', help=t.get("help_ext", default="Select files by extension."))
 
     git_group = parser.add_mutually_exclusive_group()
     git_group.add_argument("--staged", action="store_true", help=t.get("help_staged", default="Only process files staged in Git."))
     git_group.add_argument("--since", metavar="BRANCH", help=t.get("help_since", default="Only process files changed since a branch."))
+    git_group.add_argument("--rev", metavar="REV", help=t.get("help_rev", default="Bundle files as they are at a Git revision, read from Git objects without a checkout."))
+    git_group.add_argument("--from-index", action="store_true", help=t.get("help_from_index", default="Bundle the staged (index) version of files, read from Git objects."))
 
     args = parser.parse_args()
+    if args.compress_level is not None:
+        from .compression import level_range
+        if not args.compress:
+            parser.error(t.get("error_compress_level_without_method"))
+        low, high = level_range(args.compress)
+        if not low <= args.compress_level <= high:
+            parser.error(t.get("error_compress_level_range", method=args.compress, low=low, high=high))
 
     if args.set_lang:
         t.set_language(args.set_lang)
@@ -357,66 +459,149 @@ def main():
     if len(sys.argv) == 1 and not (args.verbose or args.quiet):
         run_interactive_mode(t); return
 
-    profiles = load_profiles(args.project_path)
+    from .instrumentation import instrument_run
+    with instrument_run(t, timings=args.timings, profile_path=args.profile_run, metrics_path=args.metrics_out,
+                        metrics_format=args.metrics_format, mode=_run_mode(args, registered_plugins), project=args.project_path):
+        if args.dir_cache:
+            from .dir_cache import use_directory_cache
+            with use_directory_cache(args.project_path):
+                return _run_command(t, parser, args, registered_plugins)
+        return _run_command(t, parser, args, registered_plugins)
+
 
+def _run_mode(args, registered_plugins):
+    """Tên chế độ của lượt chạy, dùng làm nhãn cho metrics."""
     for plugin in registered_plugins:
-        dest = plugin.arg_dest()
-        plugin_flag_value = getattr(args, dest, None)
-        if plugin_flag_value:
-            logging.info(t.get("info_plugin_executing", command=plugin.command))
-            try:
-                plugin.execute(args, t)
-            except Exception as exc:
-                logging.error(t.get("warn_plugin_execute_failed", command=plugin.command, error=exc), exc_info=True)
+        if getattr(args, plugin.arg_dest(), None):
+            return f"plugin:{plugin.command.lstrip('-')}"
+    for flag, mode in (('apply', 'apply'), ('verify', 'verify'), ('tree_only', 'tree'), ('scene_tree', 'scene_tree'), ('api_map', 'api_map'),
+                       ('stats', 'stats'), ('todo', 'todo'), ('format_code', 'format'), ('lint', 'lint')):
+        if getattr(args, flag, None):
+            return mode
+    return 'bundle'
+
+
+def _run_command(t, parser, args, registered_plugins):
+    """Thực thi chế độ được chọn qua dòng lệnh (sau khi đã phân tích tham số và cấu hình log)."""
+    # Cấu hình profile chỉ được đọc khi chế độ được chọn thực sự cần tới nó, và danh sách
+    # profile được kiểm tra sau khi phân tích tham số thay vì qua `choices` của argparse.
+    report_only = any([args.apply, args.verify, args.tree_only, args.scene_tree, args.stats, args.todo])
+    profiles = load_profiles(args.project_path) if (args.profile or args.api_map or not report_only) else {}
+    unknown_profiles = [name for name in (args.profile or []) if name not in profiles]
+    if unknown_profiles:
+        parser.error(t.get("error_unknown_profile", default="Unknown profile(s): {names}. Available: {choices}", names=', '.join(unknown_profiles), choices=', '.join(profiles.keys())))
+
+    active_plugins = [plugin for plugin in registered_plugins if getattr(args, plugin.arg_dest(), None)]
+    # Các plugin dùng hook theo file chia sẻ chung một lượt tìm và đọc file.
+    hook_plugins = [plugin for plugin in active_plugins if plugin.uses_file_hooks()]
+    if hook_plugins:
+        if not validate_input_paths(t, args.project_path, args.output):
             return
+        for plugin in hook_plugins:
+            logging.info(t.get("info_plugin_executing", command=plugin.command))
+        files_for_hooks = _get_files_to_process(t, args, profiles)
+        if files_for_hooks:
+            from .file_hooks import run_file_hooks
+            run_file_hooks(t, args, hook_plugins, args.project_path, files_for_hooks)
+
+    for plugin in active_plugins:
+        if plugin in hook_plugins:
+            continue
+        logging.info(t.get("info_plugin_executing", command=plugin.command))
+        try:
+            plugin.execute(args, t)
+        except Exception as exc:
+            logging.error(t.get("warn_plugin_execute_failed", command=plugin.command, error=exc), exc_info=True)
+        return
+    if active_plugins:
+        return
+
+    if args.daemon and _try_daemon(t, args, profiles):
+        return
     
-    if any([args.apply, args.tree_only, args.scene_tree, args.api_map, args.stats, args.todo]):
+    if any([args.apply, args.verify, args.tree_only, args.scene_tree, args.api_map, args.stats, args.todo]):
         if not validate_input_paths(t, args.project_path, args.output):
             return
 
-        if args.apply: apply_changes(t, args.project_path, args.apply, show_diff=args.review)
+        if args.verify:
+            from .manifest import verify_bundle
+            return 0 if verify_bundle(t, args.verify) else 1
+
+        if args.apply:
+            from .applier import apply_changes
+            apply_changes(t, args.project_path, args.apply, show_diff=args.review)
         if args.tree_only:
+            from .tree_generator import generate_tree
+            from .ignore import load_ignore_rules
             project_root = Path(args.project_path).resolve()
             logging.info(t.get("info_git_mode_staged"))
-            gitignore_spec = get_gitignore_spec(str(project_root))
-            if gitignore_spec: logging.info(t.get("info_found_gitignore"))
-            tree_structure = generate_tree(str(project_root), set(args.exclude), gitignore_spec)
+            if load_ignore_rules(str(project_root), args.exclude).has_gitignore: logging.info(t.get("info_found_gitignore"))
+            tree_structure = generate_tree(str(project_root), set(args.exclude))
             _print_tree_output(str(project_root), tree_structure)
-        if args.scene_tree: export_godot_scene_trees(t, args.project_path, args.output or 'scene_tree.txt', set(args.exclude))
-        if args.api_map: export_api_map(t, args.project_path, args.output or 'api_map.txt', set(args.exclude), profiles)
-        if args.stats: export_project_stats(t, args.project_path, args.output or 'project_stats.txt', set(args.exclude))
-        if args.todo: export_todo_report(t, args.project_path, args.output or 'todo_report.txt', set(args.exclude))
+        if args.scene_tree:
+            from .tree_generator import export_godot_scene_trees
+            export_godot_scene_trees(t, args.project_path, args.output or 'scene_tree.txt', set(args.exclude))
+        if args.api_map:
+            from .api_mapper import export_api_map
+            export_api_map(t, args.project_path, args.output or 'api_map.txt', set(args.exclude), profiles)
+        if args.stats:
+            from .stats_generator import export_project_stats
+            export_project_stats(t, args.project_path, args.output or 'project_stats.txt', set(args.exclude))
+        if args.todo:
+            from .todo_finder import export_todo_report
+            export_todo_report(t, args.project_path, args.output or 'todo_report.txt', set(args.exclude))
         return
 
     if not validate_input_paths(t, args.project_path, args.output):
         return
 
+    if args.rev or args.from_index:
+        if args.format_code or args.lint or args.watch:
+            logging.error(t.get("error_git_source_bundle_only")); return
+        content_source = _get_git_content_source(t, args, profiles)
+        if content_source is None:
+            return
+        from .bundler import create_code_bundle
+        create_code_bundle(t, args.project_path, args.output or 'all_code', set(args.exclude), output_format=args.format, content_source=content_source,
+                           max_bytes=args.max_bytes, max_tokens=args.max_tokens, dedup=args.dedup,
+                           compression=args.compress, compression_level=args.compress_level, non_utf8=args.non_utf8,
+                           hash_algorithm=None if args.no_manifest else args.hash, delta_from=args.delta_from)
+        return
+
     final_files_to_process = _get_files_to_process(t, args, profiles)
     if not final_files_to_process:
         return
     
     if args.format_code or args.lint:
+        from .quality_checker import run_quality_for_profiles
         tool_key = 'formatter' if args.format_code else 'linter'
+        profile_names_to_use = args.profile or []
         if not profile_names_to_use:
             logging.error(t.get("error_profile_needed_lint")); return
         
         logging.info(f"   Sử dụng profile cho '{tool_key}': '{', '.join(profile_names_to_use)}'")
-        for profile_name in profile_names_to_use:
-            profile_data = profiles.get(profile_name, {})
-            tool_info = profile_data.get(tool_key)
-            if tool_info and tool_info.get('command') and tool_info.get('extensions'):
-                command, exts_for_tool = tool_info['command'], tool_info['extensions']
-                files_for_tool = [f for f in final_files_to_process if f.endswith(tuple(exts_for_tool))]
-                if files_for_tool: run_quality_tool(t, tool_key, command, files_for_tool)
-            else: logging.debug(f"Profile '{profile_name}' không có cấu hình cho '{tool_key}'.")
+        if not (args.staged or args.since):
+            final_files_to_process = list(final_files_to_process.paths())
+        run_quality_for_profiles(t, tool_key, profiles, profile_names_to_use, final_files_to_process, args.project_path,
+                                 jobs=args.jobs, chunk_timeout=args.tool_timeout, full=args.full)
         return
 
     output_filename = args.output or 'all_code'
-    create_code_bundle(t, args.project_path, output_filename, set(args.exclude), file_list=final_files_to_process, output_format=args.format)
+    from .bundler import create_code_bundle
+    create_code_bundle(t, args.project_path, output_filename, set(args.exclude), file_list=final_files_to_process, output_format=args.format,
+                       max_bytes=args.max_bytes, max_tokens=args.max_tokens, dedup=args.dedup,
+                       compression=args.compress, compression_level=args.compress_level, non_utf8=args.non_utf8,
+                       hash_algorithm=None if args.no_manifest else args.hash, delta_from=args.delta_from)
     
     if args.watch:
         if args.staged or args.since:
             logging.warning(t.get("warn_watch_incompatible")); return
+        if args.max_bytes or args.max_tokens:
+            logging.warning(t.get("warn_watch_shards_incompatible")); return
+        if output_filename == '-':
+            logging.warning(t.get("warn_watch_stdout_incompatible")); return
+        if args.delta_from:
+            logging.warning(t.get("warn_watch_delta_incompatible")); return
         
         extensions_to_watch, use_all_to_watch = [], False
         if args.all: use_all_to_watch = True
@@ -425,15 +610,10 @@ def main():
             extensions_to_watch = get_extensions_from_profiles(profiles, args.profile)
         else: extensions_to_watch = profiles.get('default', {}).get('extensions', [])
         
-        event_handler = ChangeHandler(t, args.project_path, output_filename, extensions_to_watch, set(args.exclude), use_all_to_watch, output_format=args.format)
-        observer = Observer()
-        observer.schedule(event_handler, args.project_path, recursive=True)
-        observer.start()
-        try:
-            while True: time.sleep(1)
-        except KeyboardInterrupt:
-            observer.stop(); logging.info("\n🛑 Đã dừng theo dõi.")
-        observer.join()
+        from .watcher import watch_and_rebundle
+        watch_and_rebundle(t, args.project_path, output_filename, extensions_to_watch, set(args.exclude), use_all_to_watch, output_format=args.format,
+                           compression=args.compress, compression_level=args.compress_level, non_utf8=args.non_utf8,
+                           hash_algorithm=None if args.no_manifest else args.hash, poll_interval=args.watch_poll)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
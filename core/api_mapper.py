@@ -1,116 +1,118 @@
-import os
-import re
-import codecs
-import logging
-from pathlib import Path
-from tqdm import tqdm
-from .utils import find_project_files, get_extensions_from_profiles
-
-GD_PATTERNS = {
-    "class": re.compile(r"^\s*class_name\s+([A-Za-z0-9_]+)"),
-    "func": re.compile(r"^\s*func\s+([_A-Za-z0-9]+)\s*\(([^)]*)\)(?:\s*->\s*([A-Za-z0-9_]+))?:"),
-    "signal": re.compile(r"^\s*signal\s+([A-Za-z0-9_]+)")
-}
-JS_PATTERNS = {
-    "function": re.compile(r"^\s*(?:export\s+)?(?:async\s+)?function\s+([A-Za-z0-9_]+)\s*\(([^)]*)\)"),
-    "arrow_func": re.compile(r"^\s*(?:export\s+)?const\s+([A-Za-z0-9_]+)\s*=\s*(?:async\s+)?\(([^)]*)\)\s*=>"),
-    "class": re.compile(r"^\s*(?:export\s+)?class\s+([A-Za-z0-9_]+)\s+extends\s+React\.Component")
-}
-
-def parse_gdscript_line(line):
-    """Phân tích một dòng GDScript để tìm signature."""
-    class_match = GD_PATTERNS["class"].match(line)
-    if class_match:
-        return f"class {class_match.group(1)}"
-    
-    func_match = GD_PATTERNS["func"].match(line)
-    if func_match:
-        name, params, ret = func_match.groups()
-        ret_str = f" -> {ret}" if ret else ""
-        return f"  - func {name}({params.strip()}){ret_str}"
-    
-    signal_match = GD_PATTERNS["signal"].match(line)
-    if signal_match:
-        return f"  - signal {signal_match.group(1)}"
-    
-    return None
-
-def parse_javascript_line(line):
-    """Phân tích một dòng JavaScript/TypeScript để tìm signature."""
-    func_match = JS_PATTERNS["function"].match(line)
-    if func_match:
-        return f"  - function {func_match.group(1)}({func_match.group(2)})"
-    
-    arrow_match = JS_PATTERNS["arrow_func"].match(line)
-    if arrow_match:
-        return f"  - const {arrow_match.group(1)} = ({arrow_match.group(2)}) => ..."
-    
-    class_match = JS_PATTERNS["class"].match(line)
-    if class_match:
-        return f"class {class_match.group(1)}"
-    
-    return None
-
-def parse_gdscript(content):
-    signatures = []
-    for line in content.splitlines():
-        sig = parse_gdscript_line(line)
-        if sig: signatures.append(sig)
-    return signatures
-
-def parse_javascript(content):
-    signatures = []
-    for line in content.splitlines():
-        sig = parse_javascript_line(line)
-        if sig: signatures.append(sig)
-    return signatures
-
-def export_api_map(t, project_path, output_file, exclude_dirs, profiles):
-    project_root = Path(project_path).resolve()
-    logging.info(t.get('info_api_map_start', path=str(project_root)))
-    
-    output_path = Path(output_file).resolve()
-    all_extensions = get_extensions_from_profiles(profiles, list(profiles.keys()))
-    
-    files_to_process = find_project_files(str(project_path), exclude_dirs, False, all_extensions)
-
-    if not files_to_process:
-        logging.info(t.get('info_no_files_to_analyze'))
-        return
-
-    logging.info(t.get('info_found_files_for_api_map', count=len(files_to_process)))
-    
-    try:
-        with output_path.open('w', encoding='utf-8') as outfile:
-            outfile.write(f"{t.get('header_api_map_title')}: {project_root.name}\n")
-            outfile.write("=" * 80 + "\n\n")
-
-            try:
-                for file_path in tqdm(sorted(files_to_process), desc=t.get('progress_bar_analyzing'), unit=" file", ncols=100):
-                    file_path_obj = Path(file_path)
-                    relative_path = file_path_obj.relative_to(project_root).as_posix()
-                    signatures = []
-                    try:
-                        is_gd = file_path_obj.suffix == '.gd'
-                        is_js = file_path_obj.suffix in ('.js', '.jsx', '.ts', '.tsx')
-                        
-                        if is_gd or is_js:
-                            with file_path_obj.open('r', encoding='utf-8') as infile:
-                                for line in infile:
-                                    sig = parse_gdscript_line(line) if is_gd else parse_javascript_line(line)
-                                    if sig: signatures.append(sig)
-                    
-                        if signatures:
-                            outfile.write(f"[FILE] {relative_path}\n")
-                            for sig in signatures: outfile.write(f"{sig}\n")
-                            outfile.write("\n")
-                    except Exception as e:
-                        logging.error(t.get('error_cannot_process_file', path=relative_path, error=e))
-            except KeyboardInterrupt:
-                logging.info("\n🛑 Người dùng đã hủy quá trình xử lý.")
-                return
-
-    except (OSError, PermissionError) as e:
-        logging.error(t.get('error_writing_report', error=e))
-
+import os
+import re
+import codecs
+import logging
+from pathlib import Path
+from tqdm import tqdm
+from .utils import find_file_index, get_extensions_from_profiles
+from . import instrumentation
+
+GD_PATTERNS = {
+    "class": re.compile(r"^\s*class_name\s+([A-Za-z0-9_]+)"),
+    "func": re.compile(r"^\s*func\s+([_A-Za-z0-9]+)\s*\(([^)]*)\)(?:\s*->\s*([A-Za-z0-9_]+))?:"),
+    "signal": re.compile(r"^\s*signal\s+([A-Za-z0-9_]+)")
+}
+JS_PATTERNS = {
+    "function": re.compile(r"^\s*(?:export\s+)?(?:async\s+)?function\s+([A-Za-z0-9_]+)\s*\(([^)]*)\)"),
+    "arrow_func": re.compile(r"^\s*(?:export\s+)?const\s+([A-Za-z0-9_]+)\s*=\s*(?:async\s+)?\(([^)]*)\)\s*=>"),
+    "class": re.compile(r"^\s*(?:export\s+)?class\s+([A-Za-z0-9_]+)\s+extends\s+React\.Component")
+}
+
+def parse_gdscript_line(line):
+    """Phân tích một dòng GDScript để tìm signature."""
+    class_match = GD_PATTERNS["class"].match(line)
+    if class_match:
+        return f"class {class_match.group(1)}"
+    
+    func_match = GD_PATTERNS["func"].match(line)
+    if func_match:
+        name, params, ret = func_match.groups()
+        ret_str = f" -> {ret}" if ret else ""
+        return f"  - func {name}({params.strip()}){ret_str}"
+    
+    signal_match = GD_PATTERNS["signal"].match(line)
+    if signal_match:
+        return f"  - signal {signal_match.group(1)}"
+    
+    return None
+
+def parse_javascript_line(line):
+    """Phân tích một dòng JavaScript/TypeScript để tìm signature."""
+    func_match = JS_PATTERNS["function"].match(line)
+    if func_match:
+        return f"  - function {func_match.group(1)}({func_match.group(2)})"
+    
+    arrow_match = JS_PATTERNS["arrow_func"].match(line)
+    if arrow_match:
+        return f"  - const {arrow_match.group(1)} = ({arrow_match.group(2)}) => ..."
+    
+    class_match = JS_PATTERNS["class"].match(line)
+    if class_match:
+        return f"class {class_match.group(1)}"
+    
+    return None
+
+def parse_gdscript(content):
+    signatures = []
+    for line in content.splitlines():
+        sig = parse_gdscript_line(line)
+        if sig: signatures.append(sig)
+    return signatures
+
+def parse_javascript(content):
+    signatures = []
+    for line in content.splitlines():
+        sig = parse_javascript_line(line)
+        if sig: signatures.append(sig)
+    return signatures
+
+@instrumentation.timed('report.api_map')
+def export_api_map(t, project_path, output_file, exclude_dirs, profiles):
+    project_root = Path(project_path).resolve()
+    logging.info(t.get('info_api_map_start', path=str(project_root)))
+    
+    output_path = Path(output_file).resolve()
+    all_extensions = get_extensions_from_profiles(profiles, list(profiles.keys()))
+    
+    files_to_process = find_file_index(str(project_path), exclude_dirs, False, all_extensions)
+
+    if not files_to_process:
+        logging.info(t.get('info_no_files_to_analyze'))
+        return
+
+    logging.info(t.get('info_found_files_for_api_map', count=len(files_to_process)))
+    instrumentation.count('files_analyzed', len(files_to_process))
+    
+    try:
+        with output_path.open('w', encoding='utf-8') as outfile:
+            outfile.write(f"{t.get('header_api_map_title')}: {project_root.name}\n")
+            outfile.write("=" * 80 + "\n\n")
+
+            try:
+                for relative_path, file_path in tqdm(files_to_process.sorted().items(), total=len(files_to_process), desc=t.get('progress_bar_analyzing'), unit=" file", ncols=100):
+                    signatures = []
+                    try:
+                        is_gd = relative_path.endswith('.gd')
+                        is_js = relative_path.endswith(('.js', '.jsx', '.ts', '.tsx'))
+                        
+                        if is_gd or is_js:
+                            with open(file_path, 'r', encoding='utf-8') as infile:
+                                for line in infile:
+                                    sig = parse_gdscript_line(line) if is_gd else parse_javascript_line(line)
+                                    if sig: signatures.append(sig)
+                    
+                        if signatures:
+                            outfile.write(f"[FILE] {relative_path}\n")
+                            for sig in signatures: outfile.write(f"{sig}\n")
+                            outfile.write("\n")
+                    except Exception as e:
+                        logging.error(t.get('error_cannot_process_file', path=relative_path, error=e))
+            except KeyboardInterrupt:
+                logging.info("\n🛑 Người dùng đã hủy quá trình xử lý.")
+                return
+
+    except (OSError, PermissionError) as e:
+        logging.error(t.get('error_writing_report', error=e))
+
+    instrumentation.record_output(output_path)
     logging.info(t.get('info_api_map_complete', path=str(output_path)))
\ No newline at end of file
@@ -1,214 +1,295 @@
-import os
-import sys
-import codecs
-import difflib
-import logging
-from typing import Dict, List, Optional, Any
-from pathlib import Path
-
-from colorama import init, Fore, Style
-
-from .bundle_format import iter_bundle_sections, strip_bundle_header
-
-
-class _InquirerStub:
-    class Checkbox:
-        def __init__(self, *args, **kwargs):
-            self.args = args
-            self.kwargs = kwargs
-
-    @staticmethod
-    def prompt(*args, **kwargs):
-        return None
-
-
-class _GreenPassionStub:
-    pass
-
-
-inquirer = _InquirerStub()
-GreenPassion = _GreenPassionStub
-
-init(autoreset=True)
-
-def _colorize_diff(diff_lines: List[str]) -> str:
-    """Thêm màu sắc cho các dòng diff để hiển thị trên console."""
-    colored_lines = []
-    for line in diff_lines:
-        if line.startswith('+'):
-            colored_lines.append(Fore.GREEN + line)
-        elif line.startswith('-'):
-            colored_lines.append(Fore.RED + line)
-        elif line.startswith('^'):
-            colored_lines.append(Fore.BLUE + line)
-        else:
-            colored_lines.append(line)
-    return "\n".join(colored_lines)
-
-def parse_bundle_file(t: Any, bundle_path: str) -> Optional[Dict[str, str]]:
-    """
-    Phân tích file bundle để lấy danh sách file và nội dung tương ứng.
-    
-    Args:
-        t: Đối tượng Translator.
-        bundle_path: Đường dẫn đến file bundle.
-        
-    Returns:
-        Dict ánh xạ từ đường dẫn file đến nội dung, hoặc None nếu có lỗi.
-    """
-    bundle_path_obj = Path(bundle_path)
-    if not bundle_path_obj.exists():
-        logging.error(t.get('error_file_not_found', path=str(bundle_path_obj)))
-        return None
-
-    logging.info(t.get('info_apply_start', path=str(bundle_path_obj)))
-    file_contents = {}
-    try:
-        with bundle_path_obj.open('r', encoding='utf-8') as f:
-            raw_content = f.read()
-
-        normalized_content = strip_bundle_header(raw_content)
-
-        for relative_path, code_content in iter_bundle_sections(normalized_content):
-            file_contents[relative_path] = code_content
-    except Exception as e:
-        logging.error(t.get('error_read_bundle', error=e), exc_info=True)
-        return None
-        
-    return file_contents
-
-def apply_changes(t: Any, project_root: str, bundle_path: str, show_diff: bool = False) -> None:
-    """
-    Áp dụng các thay đổi từ file bundle vào dự án hiện tại.
-    
-    Args:
-        t: Đối tượng Translator.
-        project_root: Thư mục gốc của dự án.
-        bundle_path: Đường dẫn đến file bundle.
-        show_diff: Nếu True, hiển thị bản xem trước các thay đổi.
-    """
-    global inquirer, GreenPassion
-    if inquirer.prompt == _InquirerStub.prompt:
-        import inquirer as real_inquirer
-        from inquirer.themes import GreenPassion as real_green_passion
-        inquirer = real_inquirer
-        GreenPassion = real_green_passion
-
-    bundle_data = parse_bundle_file(t, bundle_path)
-    if not bundle_data: return
-
-    logging.info(t.get('info_apply_comparing'))
-    
-    modified_files, new_files = [], []
-    bundle_filename = Path(bundle_path).name
-    project_root_path = Path(project_root).resolve()
-
-    for relative_path, new_content in bundle_data.items():
-        if Path(relative_path).name == bundle_filename: continue
-            
-        # Chuẩn hóa và xác thực đường dẫn để ngăn Path Traversal
-        try:
-            project_file_path = (project_root_path / relative_path).resolve()
-        except (ValueError, OSError):
-            logging.warning(f"   ⚠️  Invalid path detected: {relative_path}. Skipping...")
-            continue
-        
-        if project_root_path != project_file_path and project_root_path not in project_file_path.parents:
-            logging.warning(f"   [WARN] Bypass attempt detected for path: {relative_path}. Skipping...")
-            continue
-        
-        if project_file_path.exists():
-            try:
-                with project_file_path.open('r', encoding='utf-8') as f:
-                    current_content_lines = f.read().splitlines()
-                new_content_lines = new_content.splitlines()
-
-                if current_content_lines != new_content_lines:
-                    diff_text = "\n".join(list(difflib.unified_diff(
-                        [l + '\n' for l in current_content_lines],
-                        [l + '\n' for l in new_content_lines],
-                        fromfile=f"a/{relative_path}", tofile=f"b/{relative_path}",
-                    )))
-                    modified_files.append({'path': relative_path, 'diff': diff_text})
-            except Exception:
-                modified_files.append({'path': relative_path, 'diff': t.get('error_read_original_file')})
-        else:
-            new_files.append(relative_path)
-
-    if not modified_files and not new_files:
-        logging.info(t.get('info_apply_no_changes'))
-        return
-
-    if show_diff:
-        print(Style.BRIGHT + f"\n--- {t.get('title_diff_preview')} ---")
-        for file_info in modified_files:
-            print(Style.BRIGHT + Fore.YELLOW + f"\n## {t.get('title_changes_in_file', path=file_info['path'])}")
-            print(_colorize_diff(file_info['diff'].splitlines()))
-        if new_files:
-            print(Style.BRIGHT + Fore.CYAN + f"\n## {t.get('title_new_files')}:")
-            for path in new_files: print(f"+ {path}")
-        print("\n" + "-"*50)
-
-    choices = [f"{info['path']} ({t.get('tag_modified')})" for info in modified_files] + [f"{path} ({t.get('tag_new')})" for path in new_files]
-    questions = [
-        inquirer.Checkbox('files_to_apply',
-                          message=t.get('prompt_apply_select_files'),
-                          choices=choices, default=choices)
-    ]
-    answers = inquirer.prompt(questions, theme=GreenPassion())
-
-    if not answers or not answers['files_to_apply']:
-        logging.info(f"\n👍 {t.get('info_apply_cancelled')}")
-        return
-
-    logging.info(t.get('info_apply_applying'))
-    applied_count = 0
-    write_permission_cache = {}
-    
-    for choice in answers['files_to_apply']:
-        is_new = f"({t.get('tag_new')})" in choice
-        relative_path = choice.replace(f" ({t.get('tag_modified')})", "").replace(f" ({t.get('tag_new')})", "")
-        
-        # Chuẩn hóa và xác thực đường dẫn để ngăn Path Traversal
-        try:
-            project_file_path = (project_root_path / relative_path).resolve()
-        except (ValueError, OSError):
-            logging.warning(f"   ⚠️  Invalid path detected: {relative_path}. Skipping...")
-            continue
-        
-        if project_root_path != project_file_path and project_root_path not in project_file_path.parents:
-            logging.warning(f"   [WARN] Bypass attempt detected for path: {relative_path}. Skipping...")
-            continue
-            
-        try:
-            new_content = bundle_data[relative_path]
-            
-            # Kiểm tra quyền ghi trước khi ghi file
-            output_dir = project_file_path.parent
-            
-            # Triển khai cache quyền ghi
-            if str(output_dir) not in write_permission_cache:
-                check_dir = output_dir
-                while check_dir != check_dir.parent and not check_dir.exists():
-                    check_dir = check_dir.parent
-                
-                write_permission_cache[str(output_dir)] = os.access(str(check_dir), os.W_OK)
-            
-            if not write_permission_cache[str(output_dir)]:
-                logging.error(f"   ❌ {t.get('error_no_write_permission', path=str(output_dir))}")
-                continue
-
-            output_dir.mkdir(parents=True, exist_ok=True)
-            with project_file_path.open('w', encoding='utf-8') as f:
-                f.write(new_content)
-            status = t.get('tag_created') if is_new else t.get('tag_updated')
-            logging.info(f"   ✅ {status}: {relative_path}")
-            applied_count += 1
-        except PermissionError:
-            logging.error(f"   ❌ {t.get('error_no_write_permission', path=project_file_path)}", exc_info=True)
-        except OSError as e:
-            logging.error(f"   ❌ {t.get('error_io_error', path=project_file_path, error=str(e))}", exc_info=True)
-        except Exception as e:
-            logging.error(f"   ❌ {t.get('error_writing_file', path=relative_path, error=e)}", exc_info=True)
-            
+import os
+import sys
+import codecs
+import difflib
+import logging
+from typing import Dict, List, Optional, Any, Set, Tuple
+from pathlib import Path
+
+from colorama import init, Fore, Style
+
+from .bundle_format import iter_bundle_sections, strip_bundle_header
+from . import instrumentation
+
+
+class _InquirerStub:
+    class Checkbox:
+        def __init__(self, *args, **kwargs):
+            self.args = args
+            self.kwargs = kwargs
+
+    @staticmethod
+    def prompt(*args, **kwargs):
+        return None
+
+
+class _GreenPassionStub:
+    pass
+
+
+inquirer = _InquirerStub()
+GreenPassion = _GreenPassionStub
+
+init(autoreset=True)
+
+def _colorize_diff(diff_lines: List[str]) -> str:
+    """Thêm màu sắc cho các dòng diff để hiển thị trên console."""
+    colored_lines = []
+    for line in diff_lines:
+        if line.startswith('+'):
+            colored_lines.append(Fore.GREEN + line)
+        elif line.startswith('-'):
+            colored_lines.append(Fore.RED + line)
+        elif line.startswith('^'):
+            colored_lines.append(Fore.BLUE + line)
+        else:
+            colored_lines.append(line)
+    return "\n".join(colored_lines)
+
+@instrumentation.timed('apply.parse')
+def read_bundle(t: Any, bundle_path: str) -> Optional[Tuple[Dict[str, str], bytes, Optional[Dict[str, Any]]]]:
+    """
+    Đọc file bundle (tự giải nén nếu cần) và tách phần nội dung khỏi manifest ở cuối.
+
+    Returns:
+        ``(nội dung theo đường dẫn, bytes của bundle, manifest hoặc None)``, hoặc None nếu có lỗi.
+    """
+    bundle_path_obj = Path(bundle_path)
+    if not bundle_path_obj.exists():
+        logging.error(t.get('error_file_not_found', path=str(bundle_path_obj)))
+        return None
+
+    logging.info(t.get('info_apply_start', path=str(bundle_path_obj)))
+    file_contents = {}
+    try:
+        # Bundle nén (.gz/.xz/.bz2) được giải nén dạng luồng ngay khi đọc. Byte không phải
+        # UTF-8 (bundle tạo với --non-utf8 surrogateescape) được giữ nguyên để ghi lại đúng như cũ.
+        from .compression import open_binary_reader
+        from .manifest import read_manifest
+        with open_binary_reader(bundle_path_obj) as f:
+            data = f.read()
+        content_end, manifest = read_manifest(data)
+        raw_content = data[:content_end].decode('utf-8', 'surrogateescape')
+
+        normalized_content = strip_bundle_header(raw_content)
+
+        for relative_path, code_content in iter_bundle_sections(normalized_content):
+            file_contents[relative_path] = code_content
+    except Exception as e:
+        logging.error(t.get('error_read_bundle', error=e), exc_info=True)
+        return None
+    return file_contents, data, manifest
+
+def parse_bundle_file(t: Any, bundle_path: str) -> Optional[Dict[str, str]]:
+    """
+    Phân tích file bundle để lấy danh sách file và nội dung tương ứng.
+    
+    Args:
+        t: Đối tượng Translator.
+        bundle_path: Đường dẫn đến file bundle.
+        
+    Returns:
+        Dict ánh xạ từ đường dẫn file đến nội dung, hoặc None nếu có lỗi.
+    """
+    result = read_bundle(t, bundle_path)
+    return result[0] if result is not None else None
+
+def _unchanged_by_manifest(project_root_path: Path, data: bytes, manifest: Optional[Dict[str, Any]]) -> Set[str]:
+    """
+    Các file trong dự án giống hệt bản trong bundle, nhận ra nhờ manifest mà không cần so nội dung.
+
+    Một file được tính là giống khi kích thước và digest của file trên ổ đĩa trùng với manifest,
+    và mục của nó trong bundle vẫn khớp digest đó (tức là chưa bị sửa sau khi tạo bundle).
+    """
+    if not manifest:
+        return set()
+    from .manifest import hash_file, verify_entries
+    candidates = set()
+    for relative_path, (digest, size, _) in manifest['files'].items():
+        if Path(relative_path).is_absolute() or '..' in Path(relative_path).parts:
+            continue
+        file_path = project_root_path / relative_path
+        try:
+            if os.stat(file_path).st_size == size and hash_file(file_path, manifest['algorithm']) == digest:
+                candidates.add(relative_path)
+        except (OSError, ValueError):
+            continue
+    if not candidates:
+        return set()
+    results = verify_entries(data, manifest, candidates)
+    return {path for path in candidates if results.get(path) == 'ok'}
+
+def apply_changes(t: Any, project_root: str, bundle_path: str, show_diff: bool = False) -> None:
+    """
+    Áp dụng các thay đổi từ file bundle vào dự án hiện tại.
+    
+    Args:
+        t: Đối tượng Translator.
+        project_root: Thư mục gốc của dự án.
+        bundle_path: Đường dẫn đến file bundle.
+        show_diff: Nếu True, hiển thị bản xem trước các thay đổi.
+    """
+    global inquirer, GreenPassion
+    if inquirer.prompt == _InquirerStub.prompt:
+        import inquirer as real_inquirer
+        from inquirer.themes import GreenPassion as real_green_passion
+        inquirer = real_inquirer
+        GreenPassion = real_green_passion
+
+    bundle = read_bundle(t, bundle_path)
+    if not bundle: return
+    bundle_data, bundle_bytes, manifest = bundle
+    delta = manifest['delta'] if manifest else None
+    if not bundle_data and not delta: return
+
+    project_root_path = Path(project_root).resolve()
+    if delta is not None:
+        # Bundle delta chỉ đúng khi dự án đang ở trạng thái mà nó được tạo ra từ đó.
+        from .delta import find_base_conflicts
+        with instrumentation.phase('apply.delta_check'):
+            conflicts = find_base_conflicts(project_root_path, manifest)
+        if conflicts:
+            for path in conflicts:
+                logging.error(f"   ❌ {path}")
+            logging.error(t.get('error_delta_base_mismatch', count=len(conflicts)))
+            return
+
+    logging.info(t.get('info_apply_comparing'))
+    
+    modified_files, new_files, deleted_files = [], [], []
+    from .compression import strip_compression_suffix
+    bundle_filename = strip_compression_suffix(Path(bundle_path).name)
+
+    with instrumentation.phase('apply.compare'):
+        unchanged = _unchanged_by_manifest(project_root_path, bundle_bytes, manifest)
+        instrumentation.count('apply.files_unchanged_by_hash', len(unchanged))
+        for relative_path, new_content in bundle_data.items():
+            if relative_path in unchanged: continue
+            if Path(relative_path).name == bundle_filename: continue
+            
+            # Chuẩn hóa và xác thực đường dẫn để ngăn Path Traversal
+            try:
+                project_file_path = (project_root_path / relative_path).resolve()
+            except (ValueError, OSError):
+                logging.warning(f"   ⚠️  Invalid path detected: {relative_path}. Skipping...")
+                continue
+        
+            if project_root_path != project_file_path and project_root_path not in project_file_path.parents:
+                logging.warning(f"   [WARN] Bypass attempt detected for path: {relative_path}. Skipping...")
+                continue
+        
+            if project_file_path.exists():
+                try:
+                    with project_file_path.open('r', encoding='utf-8', errors='surrogateescape') as f:
+                        current_content_lines = f.read().splitlines()
+                    new_content_lines = new_content.splitlines()
+
+                    if current_content_lines != new_content_lines:
+                        diff_text = "\n".join(list(difflib.unified_diff(
+                            [l + '\n' for l in current_content_lines],
+                            [l + '\n' for l in new_content_lines],
+                            fromfile=f"a/{relative_path}", tofile=f"b/{relative_path}",
+                        )))
+                        modified_files.append({'path': relative_path, 'diff': diff_text})
+                except Exception:
+                    modified_files.append({'path': relative_path, 'diff': t.get('error_read_original_file')})
+            else:
+                new_files.append(relative_path)
+
+        for relative_path in (delta['deleted'] if delta else ()):
+            if Path(relative_path).is_absolute() or '..' in Path(relative_path).parts:
+                continue
+            if (project_root_path / relative_path).is_file():
+                deleted_files.append(relative_path)
+
+    if not modified_files and not new_files and not deleted_files:
+        logging.info(t.get('info_apply_no_changes'))
+        return
+
+    if show_diff:
+        print(Style.BRIGHT + f"\n--- {t.get('title_diff_preview')} ---")
+        for file_info in modified_files:
+            print(Style.BRIGHT + Fore.YELLOW + f"\n## {t.get('title_changes_in_file', path=file_info['path'])}")
+            print(_colorize_diff(file_info['diff'].splitlines()))
+        if new_files:
+            print(Style.BRIGHT + Fore.CYAN + f"\n## {t.get('title_new_files')}:")
+            for path in new_files: print(f"+ {path}")
+        if deleted_files:
+            print(Style.BRIGHT + Fore.RED + f"\n## {t.get('title_deleted_files')}:")
+            for path in deleted_files: print(f"- {path}")
+        print("\n" + "-"*50)
+
+    choices = ([f"{info['path']} ({t.get('tag_modified')})" for info in modified_files] + [f"{path} ({t.get('tag_new')})" for path in new_files]
+               + [f"{path} ({t.get('tag_deleted')})" for path in deleted_files])
+    questions = [
+        inquirer.Checkbox('files_to_apply',
+                          message=t.get('prompt_apply_select_files'),
+                          choices=choices, default=choices)
+    ]
+    answers = inquirer.prompt(questions, theme=GreenPassion())
+
+    if not answers or not answers['files_to_apply']:
+        logging.info(f"\n👍 {t.get('info_apply_cancelled')}")
+        return
+
+    logging.info(t.get('info_apply_applying'))
+    applied_count = 0
+    write_permission_cache = {}
+    
+    with instrumentation.phase('apply.write'):
+        for choice in answers['files_to_apply']:
+            is_new = f"({t.get('tag_new')})" in choice
+            is_deleted = f"({t.get('tag_deleted')})" in choice
+            relative_path = (choice.replace(f" ({t.get('tag_modified')})", "").replace(f" ({t.get('tag_new')})", "")
+                             .replace(f" ({t.get('tag_deleted')})", ""))
+        
+            # Chuẩn hóa và xác thực đường dẫn để ngăn Path Traversal
+            try:
+                project_file_path = (project_root_path / relative_path).resolve()
+            except (ValueError, OSError):
+                logging.warning(f"   ⚠️  Invalid path detected: {relative_path}. Skipping...")
+                continue
+        
+            if project_root_path != project_file_path and project_root_path not in project_file_path.parents:
+                logging.warning(f"   [WARN] Bypass attempt detected for path: {relative_path}. Skipping...")
+                continue
+            
+            try:
+                if is_deleted:
+                    project_file_path.unlink()
+                    logging.info(f"   🗑️  {t.get('tag_deleted')}: {relative_path}")
+                    applied_count += 1
+                    continue
+
+                new_content = bundle_data[relative_path]
+            
+                # Kiểm tra quyền ghi trước khi ghi file
+                output_dir = project_file_path.parent
+            
+                # Triển khai cache quyền ghi
+                if str(output_dir) not in write_permission_cache:
+                    check_dir = output_dir
+                    while check_dir != check_dir.parent and not check_dir.exists():
+                        check_dir = check_dir.parent
+                
+                    write_permission_cache[str(output_dir)] = os.access(str(check_dir), os.W_OK)
+            
+                if not write_permission_cache[str(output_dir)]:
+                    logging.error(f"   ❌ {t.get('error_no_write_permission', path=str(output_dir))}")
+                    continue
+
+                output_dir.mkdir(parents=True, exist_ok=True)
+                with project_file_path.open('w', encoding='utf-8', errors='surrogateescape') as f:
+                    f.write(new_content)
+                status = t.get('tag_created') if is_new else t.get('tag_updated')
+                logging.info(f"   ✅ {status}: {relative_path}")
+                applied_count += 1
+            except PermissionError:
+                logging.error(f"   ❌ {t.get('error_no_write_permission', path=project_file_path)}", exc_info=True)
+            except OSError as e:
+                logging.error(f"   ❌ {t.get('error_io_error', path=project_file_path, error=str(e))}", exc_info=True)
+            except Exception as e:
+                logging.error(f"   ❌ {t.get('error_writing_file', path=relative_path, error=e)}", exc_info=True)
+            
+    instrumentation.count('files_applied', applied_count)
     logging.info(t.get('info_apply_complete', count=applied_count))
\ No newline at end of file
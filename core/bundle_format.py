@@ -1,39 +1,90 @@
-"""Shared constants and helpers for export-code bundle formatting."""
-
-from __future__ import annotations
-
-import re
-from typing import Iterable, Tuple
-
-BUNDLE_HEADER_MARKER = "### EXPORT_CODE_BUNDLE_V1 ###"
-SECTION_DIVIDER = "\n" + "=" * 80 + "\n"
-FILE_HEADER_PATTERN = re.compile(r"^--- FILE: (.+) ---", re.MULTILINE)
-
-
-def strip_bundle_header(content: str) -> str:
-    """Remove the standard bundle header marker if present."""
-    if not content:
-        return content
-    normalized = content.lstrip('\ufeff')
-    if normalized.startswith(BUNDLE_HEADER_MARKER):
-        normalized = normalized[len(BUNDLE_HEADER_MARKER):].lstrip("\r\n")
-    return normalized
-
-
-def iter_bundle_sections(content: str) -> Iterable[Tuple[str, str]]:
-    """Yield (path, body) tuples from bundle content."""
-    current_path = None
-    current_body_lines = []
-    for line in content.splitlines():
-        if line == "=" * 80:
-            continue
-        header_match = FILE_HEADER_PATTERN.match(line)
-        if header_match:
-            if current_path is not None:
-                yield current_path, "\n".join(current_body_lines).strip("\r\n")
-            current_path = header_match.group(1).strip().replace('\\', '/')
-            current_body_lines = []
-            continue
-        current_body_lines.append(line)
-    if current_path is not None:
-        yield current_path, "\n".join(current_body_lines).strip("\r\n")
+"""Shared constants and helpers for export-code bundle formatting."""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Iterable, Tuple
+
+BUNDLE_HEADER_MARKER = "### EXPORT_CODE_BUNDLE_V1 ###"
+SECTION_DIVIDER = "\n" + "=" * 80 + "\n"
+FILE_HEADER_PATTERN = re.compile(r"^--- FILE: (.+) ---", re.MULTILINE)
+# Header of an entry whose content is identical to an earlier file in the same bundle.
+DUPLICATE_REFERENCE_PATTERN = re.compile(r"^(.+) \(same as (.+)\)$")
+# Bytes that follow the content of a file entry, per output format.
+TEXT_ENTRY_END = ("\n" + "=" * 80 + "\n\n").encode('utf-8')
+MD_ENTRY_END = b"\n```\n\n</details>\n\n"
+
+
+def format_duplicate_reference(path: str, original_path: str) -> str:
+    """Return the header label for ``path`` whose content equals ``original_path``."""
+    return f"{path} (same as {original_path})"
+
+
+def text_entry_head(path: str) -> bytes:
+    """Bytes written before the content of ``path`` in a text bundle."""
+    return b"".join((b"--- FILE: ", path.encode('utf-8'), b" ---\n"))
+
+
+def md_entry_head(path: str) -> bytes:
+    """Bytes written before the content of ``path`` in a markdown bundle."""
+    ext = os.path.splitext(path)[1][1:]
+    return "".join(("<details>\n<summary><code>", path, "</code></summary>\n\n```", ext, "\n")).encode('utf-8')
+
+
+def text_duplicate_entry(path: str, original_path: str) -> bytes:
+    """Full text-bundle entry for ``path`` whose content equals ``original_path``."""
+    return text_entry_head(format_duplicate_reference(path, original_path)) + TEXT_ENTRY_END
+
+
+def md_duplicate_entry(path: str, original_path: str) -> bytes:
+    """Full markdown-bundle entry for ``path`` whose content equals ``original_path``."""
+    return "".join(("<details>\n<summary><code>", path, "</code> (same as <code>", original_path,
+                    "</code>)</summary>\n\n</details>\n\n")).encode('utf-8')
+
+
+def strip_bundle_header(content: str) -> str:
+    """Remove the standard bundle header marker if present."""
+    if not content:
+        return content
+    normalized = content.lstrip('\ufeff')
+    if normalized.startswith(BUNDLE_HEADER_MARKER):
+        normalized = normalized[len(BUNDLE_HEADER_MARKER):].lstrip("\r\n")
+    return normalized
+
+
+def iter_bundle_sections(content: str) -> Iterable[Tuple[str, str]]:
+    """
+    Yield (path, body) tuples from bundle content.
+
+    Deduplicated entries (``--- FILE: b.js (same as a.js) ---``) are resolved to the body
+    of the earlier file they point to. A header only counts as a reference when that
+    file appeared before it; otherwise it is taken literally as a path.
+    """
+    bodies = {}
+    current_path = None
+    current_body_lines = []
+
+    def finish():
+        body = "\n".join(current_body_lines).strip("\r\n")
+        reference = DUPLICATE_REFERENCE_PATTERN.match(current_path)
+        if reference and not body and reference.group(2) in bodies:
+            path, body = reference.group(1), bodies[reference.group(2)]
+        else:
+            path = current_path
+        bodies[path] = body
+        return path, body
+
+    for line in content.splitlines():
+        if line == "=" * 80:
+            continue
+        header_match = FILE_HEADER_PATTERN.match(line)
+        if header_match:
+            if current_path is not None:
+                yield finish()
+            current_path = header_match.group(1).strip().replace('\\', '/')
+            current_body_lines = []
+            continue
+        current_body_lines.append(line)
+    if current_path is not None:
+        yield finish()
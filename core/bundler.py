@@ -1,134 +1,675 @@
-import os
-import codecs
-import logging
-from typing import List, Optional, Set, Any
-from pathlib import Path
-from tqdm import tqdm
-from .utils import find_project_files, get_gitignore_spec
-from .bundle_format import BUNDLE_HEADER_MARKER
-
-from .tree_generator import generate_tree
-
-def _write_text_header(outfile: Any, t: Any, project_name: str, tree_structure: Optional[str]) -> None:
-    """Ghi phần đầu của bundle định dạng text."""
-    outfile.write(f"{t.get('header_bundle_title')}: {project_name}\n")
-    outfile.write("=" * 80 + "\n\n")
-    if tree_structure:
-        outfile.write(f"{t.get('header_tree_structure')}\n")
-        outfile.write("-" * 80 + "\n")
-        outfile.write(f"{project_name}/\n")
-        outfile.write(tree_structure + "\n")
-        outfile.write("\n" + "=" * 80 + "\n\n")
-
-def _write_text_file_entry(outfile: Any, relative_path: str, content: str) -> None:
-    """Ghi nội dung một file vào bundle định dạng text."""
-    outfile.write(f"--- FILE: {relative_path} ---\n")
-    outfile.write(content)
-    outfile.write("\n" + "=" * 80 + "\n\n")
-
-def _write_md_header(outfile: Any, t: Any, project_name: str, tree_structure: Optional[str]) -> None:
-    """Ghi phần đầu của bundle định dạng markdown."""
-    outfile.write(f"# {t.get('header_bundle_title')}: {project_name}\n\n")
-    if tree_structure:
-        outfile.write(f"## {t.get('header_tree_structure')}\n\n")
-        outfile.write("<details>\n")
-        outfile.write(f"<summary><code>{project_name}/</code></summary>\n\n")
-        outfile.write("```\n")
-        outfile.write(tree_structure + "\n")
-        outfile.write("```\n\n")
-        outfile.write("</details>\n\n")
-    outfile.write(f"## {t.get('header_file_content')}\n\n")
-
-def _write_md_file_entry(outfile: Any, relative_path: str, content: str) -> None:
-    """Ghi nội dung một file vào bundle định dạng markdown."""
-    ext = Path(relative_path).suffix.lstrip('.')
-    outfile.write("<details>\n")
-    outfile.write(f"<summary><code>{relative_path}</code></summary>\n\n")
-    outfile.write(f"```{ext}\n")
-    outfile.write(content)
-    outfile.write("\n```\n\n")
-    outfile.write("</details>\n\n")
-
-def create_code_bundle(
-    t: Any,
-    project_path: str,
-    output_file: str,
-    exclude_dirs: Set[str],
-    use_all_text_files: bool = False,
-    extensions: Optional[List[str]] = None,
-    file_list: Optional[List[str]] = None,
-    include_tree: bool = True,
-    output_format: str = 'txt'
-) -> None:
-    """
-    Tạo một file bundle chứa toàn bộ code của dự án.
-    
-    Sử dụng cơ chế streaming để ghi trực tiếp vào file, giúp tiết kiệm bộ nhớ.
-    """
-    project_root = Path(project_path).resolve()
-    project_name = project_root.name
-    
-    if include_tree: logging.info(t.get('info_bundle_start', path=str(project_root)))
-    
-    gitignore_spec = get_gitignore_spec(str(project_root))
-    if gitignore_spec and include_tree: logging.info(t.get('info_found_gitignore'))
-    
-    output_path = Path(output_file).with_suffix(f'.{output_format}').resolve()
-    
-    try:
-        files_to_process = []
-        if file_list is None:
-            logging.debug("Không có danh sách file nào được cung cấp, đang tự tìm kiếm...")
-            files_to_process = find_project_files(str(project_path), exclude_dirs, use_all_text_files, extensions or [])
-        else:
-            logging.debug(f"Đang sử dụng danh sách {len(file_list)} file được cung cấp sẵn.")
-            files_to_process = file_list
-
-        files_to_process = [f for f in files_to_process if Path(f).resolve() != output_path]
-
-        if include_tree: logging.info(t.get('info_found_files_count', count=len(files_to_process)))
-
-        # Kiểm tra quyền ghi trước khi bắt đầu
-        output_dir = output_path.parent
-        if output_dir.exists() and not os.access(str(output_dir), os.W_OK):
-            logging.error(t.get('error_no_write_permission', path=str(output_dir)))
-            return
-
-        tree_structure = generate_tree(str(project_root), exclude_dirs, gitignore_spec) if include_tree else None
-
-        with output_path.open('w', encoding='utf-8') as outfile:
-            outfile.write(f"{BUNDLE_HEADER_MARKER}\n")
-            
-            if output_format == 'md':
-                _write_md_header(outfile, t, project_name, tree_structure)
-            else:
-                _write_text_header(outfile, t, project_name, tree_structure)
-
-            try:
-                iterable = tqdm(sorted(files_to_process), desc=t.get('progress_bar_processing'), unit=" file", ncols=100, disable=logging.getLogger().getEffectiveLevel() > logging.INFO)
-                for file_path in iterable:
-                    try:
-                        file_path_obj = Path(file_path)
-                        relative_path = file_path_obj.relative_to(project_root).as_posix()
-                        with file_path_obj.open('r', encoding='utf-8') as infile:
-                            content = infile.read()
-                        
-                        if output_format == 'md':
-                            _write_md_file_entry(outfile, relative_path, content)
-                        else:
-                            _write_text_file_entry(outfile, relative_path, content)
-                            
-                    except Exception as e:
-                        logging.error(t.get('error_cannot_read_file', path=relative_path, error=e))
-            except KeyboardInterrupt:
-                logging.info("\n🛑 Người dùng đã hủy quá trình xử lý.")
-                return
-        
-        if include_tree: logging.info(t.get('info_bundle_complete', path=str(output_path)))
-
-    except PermissionError:
-        logging.error(t.get('error_no_write_permission', path=str(output_path)))
-    except OSError as e:
-        logging.error(t.get('error_io_error', path=str(output_path), error=str(e)))
-    except Exception as e:
-        logging.error(t.get('error_fatal', error=e), exc_info=True)
\ No newline at end of file
+import io
+import os
+import sys
+import codecs
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Set, Any, Tuple
+from pathlib import Path
+from tqdm import tqdm
+from .utils import find_file_index
+from .ignore import load_ignore_rules
+from .bundle_format import (BUNDLE_HEADER_MARKER, MD_ENTRY_END, TEXT_ENTRY_END, md_duplicate_entry, md_entry_head,
+                            text_duplicate_entry, text_entry_head)
+from .text_encoding import DEFAULT_NON_UTF8_POLICY, NotUtf8Error, new_counts, normalize_bytes
+from .manifest import DEFAULT_HASH_ALGORITHM, ManifestBuilder
+from .file_index import UNKNOWN, FileIndex, as_file_index
+from . import instrumentation
+
+from .tree_generator import generate_tree, generate_tree_from_paths
+
+# `-o -`: ghi bundle ra stdout thay vì file.
+STDOUT_OUTPUT = '-'
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Kích thước bộ đệm nhị phân của file output; dữ liệu được gom lại rồi mới ghi xuống ổ đĩa.
+DEFAULT_WRITE_BUFFER = 1024 * 1024
+
+
+def open_bundle_writer(path: Any, compression: Optional[str] = None, compression_level: Optional[int] = None,
+                       buffer_size: int = DEFAULT_WRITE_BUFFER) -> Any:
+    """
+    Mở file output của bundle (nén nếu có ``compression``) để ghi bytes.
+
+    Dữ liệu được gom vào một bộ đệm nhị phân ``buffer_size`` byte trước khi ghi xuống file
+    hoặc bộ nén. Nội dung file đi thẳng từ lúc đọc tới đây dưới dạng bytes, không qua bước
+    giải mã/mã hóa lại; chỉ phần đầu bundle và đường dẫn được mã hóa UTF-8.
+    """
+    if compression:
+        from .compression import open_compressed_writer
+        raw = open_compressed_writer(path, compression, compression_level)
+    else:
+        raw = open(path, 'wb', buffering=0)
+    return io.BufferedWriter(raw, buffer_size)
+
+
+def _bundle_title(t: Any, project_name: str, part: Optional[Tuple[int, int]]) -> str:
+    title = f"{t.get('header_bundle_title')}: {project_name}"
+    if part:
+        title += f" ({t.get('header_shard_part', index=part[0], total=part[1])})"
+    return title
+
+def _write_text_header(outfile: Any, t: Any, project_name: str, tree_structure: Optional[str], part: Optional[Tuple[int, int]] = None) -> None:
+    """Ghi phần đầu của bundle định dạng text."""
+    parts = [f"{_bundle_title(t, project_name, part)}\n", "=" * 80 + "\n\n"]
+    if tree_structure:
+        parts += [f"{t.get('header_tree_structure')}\n", "-" * 80 + "\n", f"{project_name}/\n",
+                  tree_structure + "\n", "\n" + "=" * 80 + "\n\n"]
+    outfile.write("".join(parts).encode('utf-8'))
+
+def _write_text_file_entry(outfile: Any, relative_path: str, content: bytes) -> None:
+    """Ghi nội dung một file vào bundle định dạng text (một lần ``write`` cho mỗi file)."""
+    outfile.write(b"".join((text_entry_head(relative_path), content, TEXT_ENTRY_END)))
+
+def _write_text_duplicate_entry(outfile: Any, relative_path: str, original_path: str) -> None:
+    """Ghi một mục tham chiếu tới file có nội dung giống hệt đã ghi trước đó (định dạng text)."""
+    outfile.write(text_duplicate_entry(relative_path, original_path))
+
+def _write_md_header(outfile: Any, t: Any, project_name: str, tree_structure: Optional[str], part: Optional[Tuple[int, int]] = None) -> None:
+    """Ghi phần đầu của bundle định dạng markdown."""
+    parts = [f"# {_bundle_title(t, project_name, part)}\n\n"]
+    if tree_structure:
+        parts += [f"## {t.get('header_tree_structure')}\n\n", "<details>\n", f"<summary><code>{project_name}/</code></summary>\n\n",
+                  "```\n", tree_structure + "\n", "```\n\n", "</details>\n\n"]
+    parts.append(f"## {t.get('header_file_content')}\n\n")
+    outfile.write("".join(parts).encode('utf-8'))
+
+def _write_md_file_entry(outfile: Any, relative_path: str, content: bytes) -> None:
+    """Ghi nội dung một file vào bundle định dạng markdown (một lần ``write`` cho mỗi file)."""
+    outfile.write(b"".join((md_entry_head(relative_path), content, MD_ENTRY_END)))
+
+def _write_md_duplicate_entry(outfile: Any, relative_path: str, original_path: str) -> None:
+    """Ghi một mục tham chiếu tới file có nội dung giống hệt đã ghi trước đó (định dạng markdown)."""
+    outfile.write(md_duplicate_entry(relative_path, original_path))
+
+def _prepare_content(relative_path: str, data: bytes, non_utf8: str, counts: Optional[Dict[str, int]]) -> Any:
+    """Áp dụng chính sách ``non_utf8`` cho bytes của một file; file bị bỏ qua trả về ``NotUtf8Error``."""
+    content, outcome = normalize_bytes(data, non_utf8)
+    if counts is not None:
+        counts[outcome] += 1
+    return content if content is not None else NotUtf8Error(relative_path)
+
+def _count_encodings(counts: Optional[Dict[str, int]]) -> None:
+    if counts is not None:
+        for outcome, n in counts.items():
+            instrumentation.count(f'encoding.{outcome}', n)
+
+def _iter_file_entries(files: FileIndex, read_bytes: Optional[Any] = None,
+                       non_utf8: str = DEFAULT_NON_UTF8_POLICY, counts: Optional[Dict[str, int]] = None,
+                       mtimes: Optional[Dict[str, int]] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Đọc lần lượt các file trên ổ đĩa dưới dạng bytes; lỗi đọc được trả về thay cho nội dung.
+
+    File UTF-8 hợp lệ được chuyển nguyên byte sang bước ghi; file khác được xử lý theo
+    ``non_utf8`` (xem ``text_encoding.normalize_bytes``) và số file theo từng kết quả được
+    cộng vào ``counts``. ``read_bytes`` (nếu có) thay cho việc mở file trực tiếp, ví dụ để
+    đọc qua bộ nhớ đệm nội dung của daemon. ``mtimes`` (nếu có) nhận ``st_mtime_ns`` của
+    từng file lúc đọc, cho manifest.
+    """
+    stats = instrumentation.active()
+    read_time, bytes_read = 0.0, 0
+    try:
+        for relative_path, file_path in files.items():
+            if stats: started = time.perf_counter()
+            try:
+                if read_bytes is not None:
+                    data = read_bytes(file_path)
+                    if mtimes is not None: mtimes[relative_path] = os.stat(file_path).st_mtime_ns
+                else:
+                    with open(file_path, 'rb') as infile:
+                        data = infile.read()
+                        if mtimes is not None: mtimes[relative_path] = os.fstat(infile.fileno()).st_mtime_ns
+                bytes_read += len(data)
+                content = _prepare_content(relative_path, data, non_utf8, counts)
+            except Exception as e:
+                content = e
+            if stats: read_time += time.perf_counter() - started
+            yield relative_path, content
+    finally:
+        if stats:
+            stats.add_time('bundle.read', read_time)
+            stats.count('bytes_read', bytes_read)
+            _count_encodings(counts)
+
+def _iter_source_entries(content_source: Any, non_utf8: str = DEFAULT_NON_UTF8_POLICY,
+                         counts: Optional[Dict[str, int]] = None) -> Iterator[Tuple[str, Any]]:
+    """Chuyển nội dung lấy từ một content source (ví dụ blob của git) sang bước ghi, theo chính sách ``non_utf8``."""
+    try:
+        for relative_path, data in content_source.iter_contents():
+            if data is None:
+                yield relative_path, FileNotFoundError(relative_path)
+                continue
+            instrumentation.count('bytes_read', len(data))
+            yield relative_path, _prepare_content(relative_path, data, non_utf8, counts)
+    finally:
+        _count_encodings(counts)
+
+def _iter_entry_writes(outfile: Any, t: Any, entries: Any, output_format: str, dedup: bool = False,
+                       summary: Optional[Dict[str, int]] = None, manifest: Optional[ManifestBuilder] = None) -> Iterator[None]:
+    """
+    Ghi lần lượt các file vào bundle, dừng lại (``yield``) sau mỗi file để nơi gọi có thể
+    lấy phần đã ghi ra; file không đọc được chỉ bị ghi log lỗi.
+
+    Khi ``dedup`` bật, nội dung được băm ngay trong lượt đọc: file có nội dung trùng với
+    một file đã ghi trong cùng bundle chỉ được ghi dưới dạng tham chiếu ``(same as ...)``.
+    Số file ghi dạng tham chiếu được lưu vào ``summary['duplicates']``.
+
+    Khi có ``manifest`` (``manifest.ManifestBuilder``), digest của từng file được tính trong
+    lúc ghi và manifest được ghi vào cuối sau file cuối cùng.
+    """
+    if output_format == 'md':
+        write_entry, write_duplicate = _write_md_file_entry, _write_md_duplicate_entry
+    else:
+        write_entry, write_duplicate = _write_text_file_entry, _write_text_duplicate_entry
+    first_path_by_digest: Dict[bytes, str] = {}
+    duplicates = written = failed = 0
+    stats = instrumentation.active()
+    write_time = 0.0
+    try:
+        for relative_path, content in entries:
+            if stats: started = time.perf_counter()
+            try:
+                if isinstance(content, Exception):
+                    if not isinstance(content, NotUtf8Error):
+                        failed += 1
+                    raise content
+                original_path = None
+                if dedup:
+                    digest = hashlib.blake2b(content, digest_size=20).digest()
+                    original_path = first_path_by_digest.setdefault(digest, relative_path)
+                    # Chỉ thay bằng tham chiếu khi thực sự tiết kiệm được dung lượng.
+                    if original_path == relative_path or len(content) <= len(original_path) + len(" (same as )"):
+                        original_path = None
+                if original_path is not None:
+                    write_duplicate(outfile, relative_path, original_path)
+                    if manifest is not None: manifest.add_duplicate(relative_path, original_path, len(content))
+                    duplicates += 1
+                else:
+                    write_entry(outfile, relative_path, content)
+                    if manifest is not None: manifest.add(relative_path, content)
+                    written += 1
+            except NotUtf8Error:
+                logging.warning(t.get('warn_skipped_non_utf8', path=relative_path))
+            except Exception as e:
+                logging.error(t.get('error_cannot_read_file', path=relative_path, error=e))
+            finally:
+                if stats: write_time += time.perf_counter() - started
+            yield
+        if manifest is not None:
+            outfile.write(manifest.render(output_format))
+            yield
+    finally:
+        if manifest is not None:
+            manifest.close()
+        if summary is not None:
+            summary['duplicates'] = duplicates
+        if stats:
+            stats.add_time('bundle.write', write_time)
+            stats.count('files_written', written)
+            stats.count('files_duplicate', duplicates)
+            stats.count('errors.read', failed)
+
+def _write_entries(outfile: Any, t: Any, entries: Any, output_format: str, dedup: bool = False,
+                   manifest: Optional[ManifestBuilder] = None) -> int:
+    """
+    Ghi toàn bộ các file vào bundle (xem ``_iter_entry_writes``).
+
+    Returns:
+        Số file được ghi dưới dạng tham chiếu.
+    """
+    summary: Dict[str, int] = {}
+    for _ in _iter_entry_writes(outfile, t, entries, output_format, dedup, summary, manifest):
+        pass
+    return summary['duplicates']
+
+def _write_bundle_start(outfile: Any, t: Any, project_name: str, tree_structure: Optional[str], output_format: str, part: Optional[Tuple[int, int]] = None) -> None:
+    outfile.write(f"{BUNDLE_HEADER_MARKER}\n".encode('utf-8'))
+    if output_format == 'md':
+        _write_md_header(outfile, t, project_name, tree_structure, part)
+    else:
+        _write_text_header(outfile, t, project_name, tree_structure, part)
+
+def _rendered_size(render: Any) -> int:
+    """Số byte mà một hàm ghi tạo ra."""
+    buffer = io.BytesIO()
+    render(buffer)
+    return len(buffer.getvalue())
+
+def _write_sharded_bundle(
+    t: Any,
+    project_root: Path,
+    output_path: Path,
+    files_to_process: Any,
+    content_source: Optional[Any],
+    include_tree: bool,
+    output_format: str,
+    max_bytes: Optional[int],
+    max_tokens: Optional[int],
+    dedup: bool = False,
+    read_bytes: Optional[Any] = None,
+    non_utf8: str = DEFAULT_NON_UTF8_POLICY,
+    hash_algorithm: Optional[str] = None
+) -> None:
+    """
+    Chia bundle thành nhiều shard theo giới hạn byte/token rồi ghi các shard song song.
+
+    Việc phân file vào shard chỉ dựa trên kích thước lấy ở lượt duyệt file (``stat`` hoặc
+    ``git cat-file --batch-check``), nên có thể tính xong trước khi đọc nội dung. Mỗi shard
+    có phần đầu và cây thư mục riêng, và một manifest ghi lại file nào nằm ở shard nào.
+    Khử trùng lặp (``dedup``) được áp dụng trong phạm vi từng shard để mỗi shard vẫn tự
+    đầy đủ khi áp dụng riêng lẻ; manifest băm nội dung (``hash_algorithm``) cũng vậy.
+    """
+    from .manifest import entry_line_size
+    from .sharding import (DEFAULT_SHARD_WORKERS, byte_budget, estimate_tokens, plan_shards, remove_stale_shards,
+                           shard_manifest_path, shard_output_paths, write_shard_manifest)
+    project_name = project_root.name
+    budget = byte_budget(max_bytes, max_tokens)
+
+    positions: Dict[str, int] = {}
+    if content_source is not None:
+        sizes = content_source.sizes()
+        items = [(path, sizes.get(path, 0)) for path in content_source.paths]
+    else:
+        files_to_process = files_to_process.sorted()
+        items = []
+        for position, (relative_path, file_path) in enumerate(files_to_process.items()):
+            size = files_to_process.sizes[position]
+            if size == UNKNOWN:
+                try:
+                    size = os.stat(file_path).st_size
+                except OSError:
+                    size = 0
+            positions[relative_path] = position
+            items.append((relative_path, size))
+
+    # Số chữ số của "phần i/n" lấy theo số file để phần đầu ước lượng không bao giờ bị thiếu.
+    widest_part = (max(1, len(items)), max(1, len(items)))
+    header_bytes = _rendered_size(lambda out: _write_bundle_start(out, t, project_name, "X" if include_tree else None, output_format, widest_part))
+    if include_tree:
+        header_bytes -= len("X\n")
+    write_entry = _write_md_file_entry if output_format == 'md' else _write_text_file_entry
+    item_sizes = dict(items)
+    if hash_algorithm:
+        header_bytes += len(ManifestBuilder(hash_algorithm).render(output_format))
+
+    def entry_overhead(path: str) -> int:
+        overhead = _rendered_size(lambda out: write_entry(out, path, b""))
+        return overhead + entry_line_size(path, item_sizes[path], hash_algorithm) if hash_algorithm else overhead
+
+    shards, oversized = plan_shards(items, budget, header_bytes, entry_overhead, include_tree)
+    for relative_path in oversized:
+        logging.warning(t.get('warn_shard_file_too_large', path=relative_path, limit=budget))
+
+    shard_paths = shard_output_paths(output_path, len(shards))
+    logging.info(t.get('info_shard_plan', count=len(items), shards=len(shards), limit=budget))
+
+    # Mỗi shard đếm kết quả mã hóa riêng (các shard được ghi song song), cộng lại ở cuối.
+    shard_counts = [new_counts() for _ in shards]
+
+    def write_shard(index: int) -> Dict[str, Any]:
+        files = shards[index]
+        manifest = ManifestBuilder(hash_algorithm) if hash_algorithm else None
+        if content_source is not None:
+            wanted = set(files)
+            entries = _iter_source_entries(content_source.filter(lambda path: path in wanted), non_utf8, shard_counts[index])
+        else:
+            entries = _iter_file_entries(files_to_process.select(positions[path] for path in files), read_bytes, non_utf8, shard_counts[index],
+                                         manifest.mtimes if manifest is not None else None)
+        tree_structure = generate_tree_from_paths(files) if include_tree else None
+        with open_bundle_writer(shard_paths[index]) as outfile:
+            _write_bundle_start(outfile, t, project_name, tree_structure, output_format, (index + 1, len(shards)))
+            duplicates = _write_entries(outfile, t, entries, output_format, dedup, manifest)
+        size = shard_paths[index].stat().st_size
+        return {'file': shard_paths[index].name, 'bytes': size, 'tokens': estimate_tokens(size), 'files': files, 'duplicates': duplicates}
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(shards)
+    with ThreadPoolExecutor(max_workers=min(DEFAULT_SHARD_WORKERS, len(shards) or 1)) as executor:
+        futures = {executor.submit(write_shard, index): index for index in range(len(shards))}
+        progress = as_completed(futures)
+        try:
+            for future in tqdm(progress, total=len(futures), desc=t.get('progress_bar_writing_shards'), unit=" shard", ncols=100, disable=logging.getLogger().getEffectiveLevel() > logging.INFO):
+                results[futures[future]] = future.result()
+        except KeyboardInterrupt:
+            for future in futures: future.cancel()
+            logging.info("\n🛑 Người dùng đã hủy quá trình xử lý.")
+            return
+
+    manifest_path = shard_manifest_path(output_path)
+    remove_stale_shards(manifest_path, shard_paths)
+    write_shard_manifest(manifest_path, project_name, output_format, max_bytes, max_tokens, results)
+    instrumentation.count('bytes_written', sum(result['bytes'] for result in results))
+    instrumentation.count('shards_written', len(results))
+    duplicates = sum(result['duplicates'] for result in results)
+    if duplicates and include_tree: logging.info(t.get('info_dedup_summary', count=duplicates))
+    encoding_counts = new_counts()
+    for counts in shard_counts:
+        for outcome, n in counts.items():
+            encoding_counts[outcome] += n
+    if include_tree: _log_encoding_summary(t, encoding_counts)
+    if include_tree: logging.info(t.get('info_shards_complete', count=len(shards), path=str(manifest_path)))
+
+def _collect_files(project_path: str, exclude_dirs: Set[str], use_all_text_files: bool, extensions: Optional[List[str]],
+                   file_list: Optional[Any], content_source: Optional[Any]) -> Any:
+    """Đường dẫn tương đối của content source, hoặc ``FileIndex`` các file trên ổ đĩa."""
+    if content_source is not None:
+        logging.debug(f"Đang đọc nội dung từ nguồn git: {content_source.label}")
+        return content_source.paths
+    if file_list is None:
+        logging.debug("Không có danh sách file nào được cung cấp, đang tự tìm kiếm...")
+        return find_file_index(str(project_path), exclude_dirs, use_all_text_files, extensions or [])
+    logging.debug(f"Đang sử dụng danh sách {len(file_list)} file được cung cấp sẵn.")
+    return as_file_index(str(Path(project_path).resolve()), file_list)
+
+def _without_output(files: FileIndex, output_path: Path) -> FileIndex:
+    """
+    Bỏ các file do bundle ghi ra khỏi danh sách: chính file output, manifest shard và các shard
+    (của lần chạy trước hoặc lần này). Chỉ các file trùng tên mới được ``stat`` để so thư mục
+    chứa chúng với thư mục output theo ``(st_dev, st_ino)``; không ``resolve`` từng file.
+    """
+    from .sharding import shard_output_names
+    try:
+        output_dir_stat = os.stat(output_path.parent)
+    except OSError:
+        # Thư mục output chưa tồn tại nên không file nào trong danh sách nằm trong đó.
+        return files
+    names, shard_pattern = shard_output_names(output_path)
+    names.add(output_path.name)
+    excluded = set()
+    for position, file_name in enumerate(files.names()):
+        if file_name not in names and not shard_pattern.fullmatch(file_name):
+            continue
+        try:
+            if os.path.samestat(os.stat(os.path.dirname(files.path(position))), output_dir_stat):
+                excluded.add(position)
+        except OSError:
+            continue
+    if not excluded:
+        return files
+    return files.select(position for position in range(len(files)) if position not in excluded)
+
+def _bundle_tree(project_root: Path, files: Any, exclude_dirs: Set[str], content_source: Optional[Any],
+                 project_index: Optional[Any], changed_only: bool = False) -> str:
+    with instrumentation.phase('bundle.tree'):
+        if content_source is not None:
+            return generate_tree_from_paths(files)
+        if changed_only:
+            # Bundle delta chỉ vẽ cây của các file đã đổi, không duyệt lại cả dự án.
+            return generate_tree_from_paths(list(files.relative_paths()))
+        if project_index is not None:
+            return project_index.tree()
+        return generate_tree(str(project_root), exclude_dirs)
+
+def _open_entries(files: Any, content_source: Optional[Any], project_index: Optional[Any],
+                  non_utf8: str = DEFAULT_NON_UTF8_POLICY, counts: Optional[Dict[str, int]] = None,
+                  manifest: Optional[ManifestBuilder] = None) -> Iterator[Tuple[str, Any]]:
+    if content_source is not None:
+        return _iter_source_entries(content_source, non_utf8, counts)
+    return _iter_file_entries(files.sorted(), project_index.read_bytes if project_index is not None else None, non_utf8, counts,
+                              manifest.mtimes if manifest is not None else None)
+
+def _log_encoding_summary(t: Any, counts: Dict[str, int]) -> None:
+    """Báo số file không phải UTF-8 đã được chuyển mã, chép nguyên byte hoặc bỏ qua (nếu có)."""
+    if counts['transcoded'] or counts['escaped'] or counts['skipped']:
+        logging.info(t.get('info_encoding_summary', passthrough=counts['passthrough'], transcoded=counts['transcoded'],
+                           escaped=counts['escaped'], skipped=counts['skipped']))
+
+class _ChunkBuffer:
+    """Đối tượng giống file nhị phân, gom phần đã ghi lại để lấy ra thành từng khối bytes."""
+    __slots__ = ('_parts', 'size')
+
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self._parts.append(data)
+        self.size += len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        self.size = 0
+        return data
+
+def _generate_chunks(t: Any, project_root: Path, files: Any, tree_structure: Optional[str], output_format: str,
+                     content_source: Optional[Any], project_index: Optional[Any], dedup: bool, chunk_size: int,
+                     show_progress: bool = False, summary: Optional[Dict[str, int]] = None,
+                     non_utf8: str = DEFAULT_NON_UTF8_POLICY, counts: Optional[Dict[str, int]] = None,
+                     manifest: Optional[ManifestBuilder] = None) -> Iterator[bytes]:
+    buffer = _ChunkBuffer()
+    _write_bundle_start(buffer, t, project_root.name, tree_structure, output_format)
+    # Phần đầu được trả ra ngay để bên nhận có byte đầu tiên sớm nhất có thể.
+    yield buffer.take()
+    entries: Any = _open_entries(files, content_source, project_index, non_utf8, counts, manifest)
+    if show_progress:
+        entries = tqdm(entries, total=len(files), desc=t.get('progress_bar_processing'), unit=" file", ncols=100, disable=logging.getLogger().getEffectiveLevel() > logging.INFO)
+    for _ in _iter_entry_writes(buffer, t, entries, output_format, dedup, summary, manifest):
+        if buffer.size >= chunk_size:
+            yield buffer.take()
+    if buffer.size:
+        yield buffer.take()
+
+def iter_bundle_chunks(
+    t: Any,
+    project_path: str,
+    exclude_dirs: Set[str],
+    use_all_text_files: bool = False,
+    extensions: Optional[List[str]] = None,
+    file_list: Optional[Any] = None,
+    include_tree: bool = True,
+    output_format: str = 'txt',
+    content_source: Optional[Any] = None,
+    dedup: bool = False,
+    project_index: Optional[Any] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    non_utf8: str = DEFAULT_NON_UTF8_POLICY,
+    hash_algorithm: Optional[str] = DEFAULT_HASH_ALGORITHM
+) -> Iterator[bytes]:
+    """
+    Sinh nội dung bundle thành từng khối bytes thay vì ghi ra file.
+
+    Tham số giống ``create_code_bundle``. Bộ nhớ dùng tối đa khoảng ``chunk_size`` cộng với
+    một file đang đọc, và phần đầu bundle được trả ra ngay sau khi dựng xong cây thư mục,
+    nên có thể dùng để gửi bundle qua socket hoặc pipe.
+
+    Yields:
+        Các khối bytes, nối lại theo thứ tự sẽ được bundle hoàn chỉnh.
+    """
+    project_root = Path(project_path).resolve()
+    files = _collect_files(project_path, exclude_dirs, use_all_text_files, extensions, file_list, content_source)
+    tree_structure = _bundle_tree(project_root, files, exclude_dirs, content_source, project_index) if include_tree else None
+    yield from _generate_chunks(t, project_root, files, tree_structure, output_format, content_source, project_index, dedup, chunk_size,
+                                non_utf8=non_utf8, manifest=ManifestBuilder(hash_algorithm) if hash_algorithm else None)
+
+def _stream_to_stdout(t: Any, chunks: Iterator[bytes], compression: Optional[str] = None, compression_level: Optional[int] = None) -> bool:
+    """
+    Ghi các khối bundle ra stdout; người nhận đóng pipe sớm (ví dụ ``| head``) không phải là lỗi.
+
+    Returns:
+        True nếu đã ghi hết bundle, False nếu pipe bị đóng giữa chừng.
+    """
+    stdout = sys.stdout.buffer
+    written = 0
+    completed = True
+    try:
+        if compression:
+            from .compression import open_compressed_writer
+            with open_compressed_writer(stdout, compression, compression_level) as compressor:
+                for chunk in chunks:
+                    compressor.write(chunk)
+                    written += len(chunk)
+        else:
+            for chunk in chunks:
+                stdout.write(chunk)
+                written += len(chunk)
+        stdout.flush()
+    except BrokenPipeError:
+        # Chuyển stdout sang devnull để Python không báo lỗi lần nữa khi flush lúc thoát.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        logging.debug("Pipe stdout đã bị đóng bởi tiến trình nhận.")
+        completed = False
+    instrumentation.count('bytes_written', written)
+    return completed
+
+def create_code_bundle(
+    t: Any,
+    project_path: str,
+    output_file: str,
+    exclude_dirs: Set[str],
+    use_all_text_files: bool = False,
+    extensions: Optional[List[str]] = None,
+    file_list: Optional[Any] = None,
+    include_tree: bool = True,
+    output_format: str = 'txt',
+    content_source: Optional[Any] = None,
+    max_bytes: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    dedup: bool = False,
+    project_index: Optional[Any] = None,
+    compression: Optional[str] = None,
+    compression_level: Optional[int] = None,
+    write_buffer_size: int = DEFAULT_WRITE_BUFFER,
+    non_utf8: str = DEFAULT_NON_UTF8_POLICY,
+    hash_algorithm: Optional[str] = DEFAULT_HASH_ALGORITHM,
+    delta_from: Optional[str] = None
+) -> None:
+    """
+    Tạo một file bundle chứa toàn bộ code của dự án.
+    
+    Sử dụng cơ chế streaming để ghi trực tiếp vào file, giúp tiết kiệm bộ nhớ: nội dung đi qua
+    ``open_bundle_writer`` với bộ đệm nhị phân ``write_buffer_size`` byte.
+
+    ``file_list`` là danh sách đường dẫn hoặc ``file_index.FileIndex``; khi không có, các file
+    được tìm bằng ``find_file_index``.
+
+    ``content_source`` (ví dụ ``git_utils.GitBlobSource``) cho phép lấy nội dung từ nơi khác
+    working tree: nó cung cấp ``paths`` (đường dẫn tương đối) và ``iter_contents()`` trả về
+    các cặp (đường dẫn, bytes). Khi đó cây thư mục được dựng từ chính danh sách đường dẫn.
+
+    Khi có ``max_bytes`` hoặc ``max_tokens``, output được chia thành các shard đánh số
+    (``<tên>-001.txt``, ...) kèm manifest ``<tên>.shards.json``.
+
+    Khi ``dedup`` bật, file có nội dung giống hệt một file trước đó chỉ được ghi dưới dạng
+    tham chiếu ``--- FILE: b.js (same as a.js) ---``; ``--apply`` sẽ khôi phục lại nội dung.
+
+    ``project_index`` (ví dụ ``daemon.ProjectIndex``) cung cấp cây thư mục (``tree()``) và
+    nội dung file (``read_bytes(path)``) đã được giữ sẵn trong bộ nhớ thay vì đọc lại ổ đĩa.
+
+    ``output_file`` là ``-`` thì bundle được ghi thẳng ra stdout (log và thanh tiến trình vẫn
+    ra stderr); xem thêm ``iter_bundle_chunks``.
+
+    ``compression`` (``gzip``, ``xz`` hoặc ``bz2``) nén output ngay trong lúc ghi, với mức nén
+    ``compression_level``; file output có thêm đuôi tương ứng (``all_code.txt.gz``).
+
+    Nội dung file UTF-8 được chép nguyên byte vào bundle (kể cả kiểu xuống dòng). File không
+    phải UTF-8 được xử lý theo ``non_utf8``: ``skip`` (bỏ qua), ``bom`` (chuyển sang UTF-8 khi
+    có BOM UTF-16/32) hoặc ``surrogateescape`` (chép nguyên byte).
+
+    ``hash_algorithm`` (``sha256`` hoặc ``blake2b``) thêm vào cuối bundle một manifest digest
+    của từng file (xem ``manifest``); None thì không ghi manifest.
+
+    ``delta_from`` (bundle đầy đủ hoặc file manifest trước đó) chỉ ghi các file được thêm hoặc
+    sửa so với manifest đó, kèm danh sách file bị xóa (xem ``delta``); thuật toán băm lấy theo
+    manifest gốc.
+    """
+    project_root = Path(project_path).resolve()
+    project_name = project_root.name
+    
+    if include_tree: logging.info(t.get('info_bundle_start', path=str(project_root)))
+    
+    if include_tree and load_ignore_rules(str(project_root), exclude_dirs).has_gitignore: logging.info(t.get('info_found_gitignore'))
+
+    to_stdout = output_file == STDOUT_OUTPUT
+    if to_stdout and (max_bytes or max_tokens):
+        logging.error(t.get('error_stdout_shards')); return
+    if compression and (max_bytes or max_tokens):
+        logging.error(t.get('error_compress_shards')); return
+    base_manifest = None
+    if delta_from:
+        if content_source is not None or max_bytes or max_tokens:
+            logging.error(t.get('error_delta_unsupported')); return
+        from .delta import load_base_manifest
+        base_manifest = load_base_manifest(t, delta_from)
+        if base_manifest is None: return
+        hash_algorithm = base_manifest['algorithm']
+    from .compression import compressed_path
+    output_path = compressed_path(Path(output_file).with_suffix(f'.{output_format}'), compression).resolve()
+    
+    with instrumentation.phase('bundle'):
+        try:
+            files_to_process = _collect_files(project_path, exclude_dirs, use_all_text_files, extensions, file_list, content_source)
+
+            if content_source is None and not to_stdout:
+                files_to_process = _without_output(files_to_process, output_path)
+
+            if include_tree: logging.info(t.get('info_found_files_count', count=len(files_to_process)))
+
+            manifest = ManifestBuilder(hash_algorithm) if hash_algorithm else None
+            if base_manifest is not None:
+                from .delta import plan_delta
+                with instrumentation.phase('bundle.delta'):
+                    files_to_process, delta = plan_delta(project_root, files_to_process, base_manifest)
+                manifest.delta = delta
+                instrumentation.count('delta.files_unchanged', delta['unchanged'])
+                if include_tree: logging.info(t.get('info_delta_plan', added=len(delta['added']), modified=len(delta['modified']),
+                                                    deleted=len(delta['deleted']), unchanged=delta['unchanged']))
+
+            if to_stdout:
+                tree_structure = _bundle_tree(project_root, files_to_process, exclude_dirs, content_source, project_index, base_manifest is not None) if include_tree else None
+                summary: Dict[str, int] = {}
+                counts = new_counts()
+                try:
+                    completed = _stream_to_stdout(t, _generate_chunks(t, project_root, files_to_process, tree_structure, output_format, content_source,
+                                                          project_index, dedup, DEFAULT_CHUNK_SIZE, show_progress=True, summary=summary,
+                                                          non_utf8=non_utf8, counts=counts, manifest=manifest),
+                                      compression, compression_level)
+                except KeyboardInterrupt:
+                    logging.info("\n🛑 Người dùng đã hủy quá trình xử lý.")
+                    return
+                if not completed:
+                    # Bundle chỉ được ghi một phần: không báo hoàn tất hay tổng kết.
+                    return
+                if summary.get('duplicates') and include_tree: logging.info(t.get('info_dedup_summary', count=summary['duplicates']))
+                if include_tree: _log_encoding_summary(t, counts)
+                if include_tree: logging.info(t.get('info_bundle_stdout_complete'))
+                return
+
+            # Kiểm tra quyền ghi trước khi bắt đầu
+            output_dir = output_path.parent
+            if output_dir.exists() and not os.access(str(output_dir), os.W_OK):
+                logging.error(t.get('error_no_write_permission', path=str(output_dir)))
+                return
+
+            if max_bytes or max_tokens:
+                _write_sharded_bundle(t, project_root, output_path, files_to_process, content_source,
+                                      include_tree, output_format, max_bytes, max_tokens, dedup,
+                                      project_index.read_bytes if project_index is not None else None, non_utf8, hash_algorithm)
+                return
+
+            tree_structure = _bundle_tree(project_root, files_to_process, exclude_dirs, content_source, project_index, base_manifest is not None) if include_tree else None
+
+            with open_bundle_writer(output_path, compression, compression_level, write_buffer_size) as outfile:
+                _write_bundle_start(outfile, t, project_name, tree_structure, output_format)
+
+                counts = new_counts()
+                try:
+                    entries = _open_entries(files_to_process, content_source, project_index, non_utf8, counts, manifest)
+                    iterable = tqdm(entries, total=len(files_to_process), desc=t.get('progress_bar_processing'), unit=" file", ncols=100, disable=logging.getLogger().getEffectiveLevel() > logging.INFO)
+                    duplicates = _write_entries(outfile, t, iterable, output_format, dedup, manifest)
+                    if duplicates and include_tree: logging.info(t.get('info_dedup_summary', count=duplicates))
+                    if include_tree: _log_encoding_summary(t, counts)
+                except KeyboardInterrupt:
+                    logging.info("\n🛑 Người dùng đã hủy quá trình xử lý.")
+                    return
+        
+            instrumentation.record_output(output_path)
+            if include_tree: logging.info(t.get('info_bundle_complete', path=str(output_path)))
+
+        except PermissionError:
+            logging.error(t.get('error_no_write_permission', path=str(output_path)))
+        except OSError as e:
+            logging.error(t.get('error_io_error', path=str(output_path), error=str(e)))
+        except Exception as e:
+            logging.error(t.get('error_fatal', error=e), exc_info=True)
\ No newline at end of file
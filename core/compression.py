@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+# Tên phương thức -> (đuôi file, mức nén mặc định, (mức thấp nhất, mức cao nhất)).
+# gzip mặc định dùng mức 6 thay vì 9 của thư viện chuẩn: bundle là text dễ nén, mức 9
+# chậm hơn đáng kể mà chỉ nhỏ hơn vài phần trăm.
+COMPRESSION_METHODS: Dict[str, Tuple[str, int, Tuple[int, int]]] = {
+    'gzip': ('.gz', 6, (0, 9)),
+    'xz': ('.xz', 6, (0, 9)),
+    'bz2': ('.bz2', 9, (1, 9)),
+}
+
+_MAGIC_NUMBERS = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'BZh', 'bz2'),
+)
+
+
+def level_range(method: str) -> Tuple[int, int]:
+    return COMPRESSION_METHODS[method][2]
+
+
+def compressed_path(path: Union[str, Path], method: Optional[str]) -> Path:
+    """Thêm đuôi của phương thức nén (``.gz``, ``.xz``, ``.bz2``) vào sau đường dẫn."""
+    path = Path(path)
+    if not method:
+        return path
+    return path.with_name(path.name + COMPRESSION_METHODS[method][0])
+
+
+def strip_compression_suffix(name: str) -> str:
+    """``all_code.txt.gz`` -> ``all_code.txt``; tên không có đuôi nén được giữ nguyên."""
+    for suffix, _, _ in COMPRESSION_METHODS.values():
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def detect_compression(path: Union[str, Path]) -> Optional[str]:
+    """Nhận diện phương thức nén qua magic number ở đầu file (không dựa vào đuôi file)."""
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, method in _MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return method
+    return None
+
+
+def open_compressed_writer(target: Union[str, Path, BinaryIO], method: str, level: Optional[int] = None) -> BinaryIO:
+    """
+    Mở một luồng ghi nhị phân, nén dần dữ liệu ghi vào ``target`` (đường dẫn hoặc file object).
+
+    Đóng luồng trả về không đóng file object được truyền vào. Với gzip, thời gian trong
+    header được đặt về 0 để cùng một bundle luôn cho ra cùng một chuỗi byte.
+    """
+    if level is None:
+        level = COMPRESSION_METHODS[method][1]
+    is_path = isinstance(target, (str, os.PathLike))
+    if method == 'gzip':
+        import gzip
+        if is_path:
+            return gzip.GzipFile(filename=os.fspath(target), mode='wb', compresslevel=level, mtime=0)
+        return gzip.GzipFile(filename='', fileobj=target, mode='wb', compresslevel=level, mtime=0)
+    if method == 'xz':
+        import lzma
+        return lzma.LZMAFile(target, 'wb', preset=level)
+    if method == 'bz2':
+        import bz2
+        return bz2.BZ2File(target, 'wb', compresslevel=level)
+    raise ValueError(f"Unknown compression method: {method}")
+
+
+def open_binary_reader(path: Union[str, Path]) -> BinaryIO:
+    """Mở file để đọc bytes, tự giải nén dạng luồng nếu file được nén."""
+    method = detect_compression(path)
+    if method is None:
+        return open(path, 'rb')
+    if method == 'gzip':
+        import gzip
+        return gzip.open(path, 'rb')
+    if method == 'xz':
+        import lzma
+        return lzma.open(path, 'rb')
+    import bz2
+    return bz2.open(path, 'rb')
@@ -0,0 +1,388 @@
+"""
+Chế độ daemon: giữ chỉ mục file và bộ nhớ đệm nội dung của dự án trong bộ nhớ, phục vụ
+các lệnh bundle/tree/stats/todo qua một Unix socket.
+
+Giao thức rất nhỏ: client gửi một dòng JSON ``{"version", "command", ...}`` và nhận lại
+một dòng JSON ``{"ok", "log", ...}``. Log phát sinh trong daemon được gửi kèm phản hồi để
+client in lại như khi chạy trực tiếp. Nếu không kết nối được daemon (hoặc daemon từ chối
+yêu cầu), client trả về None để lệnh được chạy ngay trong tiến trình hiện tại.
+"""
+import os
+import json
+import socket
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+PROTOCOL_VERSION = 1
+SOCKET_ENV_VAR = 'EXPORT_CODE_SOCKET'
+COMMANDS = ('ping', 'bundle', 'tree', 'stats', 'todo', 'shutdown')
+# Giới hạn bộ nhớ đệm nội dung cho mỗi dự án và số dự án được giữ "nóng" cùng lúc.
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+MAX_PROJECTS = 8
+CONNECT_TIMEOUT = 0.5
+
+
+def default_socket_path() -> str:
+    """Đường dẫn socket mặc định: ``$EXPORT_CODE_SOCKET``, hoặc một file riêng cho từng người dùng."""
+    if os.environ.get(SOCKET_ENV_VAR):
+        return os.environ[SOCKET_ENV_VAR]
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'export-code.sock')
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f'export-code-{uid}.sock')
+
+
+class ProjectIndex:
+    """
+    Chỉ mục "nóng" của một dự án với một tập thư mục loại trừ cố định.
+
+    Danh sách file (theo từng bộ lọc) và cây thư mục được giữ cho tới khi watchdog báo có
+    file/thư mục được tạo, xóa, đổi tên hoặc ``.gitignore`` thay đổi. Chỉ các thư mục không bị
+    loại trừ được theo dõi (``watcher.ScopedWatches``), và sự kiện trong thư mục bị loại trừ
+    hoặc bị .gitignore bỏ qua (``.git/index.lock``, ``node_modules``, ...) không làm mất chỉ mục. Nội dung file được
+    giữ kèm ``(mtime_ns, size)`` và được kiểm tra lại bằng ``stat`` mỗi lần đọc, nên kể cả
+    khi bỏ lỡ một sự kiện sửa file thì nội dung trả về vẫn đúng.
+    """
+
+    def __init__(self, project_root: Path, exclude_dirs: Set[str], max_cache_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.project_root = project_root
+        self.exclude_dirs = set(exclude_dirs)
+        self.max_cache_bytes = max_cache_bytes
+        self._lock = threading.Lock()
+        self._listings: Dict[Tuple[bool, Tuple[str, ...]], Any] = {}
+        self._tree: Optional[str] = None
+        self._contents: Dict[str, Tuple[int, int, bytes]] = {}
+        self._cached_bytes = 0
+        self._observer: Any = None
+        self._watches: Any = None
+        self._rules: Any = None
+
+    def start(self) -> None:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+        from .utils import get_gitignore_spec
+        from .watcher import ScopedWatches
+
+        index = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event: Any) -> None:
+                dest_path = getattr(event, 'dest_path', '')
+                index.handle_event(event.event_type, event.src_path, dest_path, event.is_directory)
+                if event.is_directory and event.event_type in ('deleted', 'moved'):
+                    index._watches.directory_deleted(Path(event.src_path))
+                if event.is_directory and event.event_type in ('created', 'moved'):
+                    index._watches.directory_created(Path(dest_path or event.src_path))
+
+        self._observer = Observer()
+        self._watches = ScopedWatches(self._observer, _Handler(), self.project_root, self.exclude_dirs,
+                                      get_gitignore_spec(str(self.project_root)))
+        self._watches.add_tree(self.project_root)
+        self._observer.daemon = True
+        self._observer.start()
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+            self._watches = None
+
+    def _ignores(self, path: str, is_directory: bool) -> bool:
+        """Đường dẫn nằm ngoài dự án, trong thư mục bị loại trừ, hoặc bị .gitignore bỏ qua."""
+        root = os.path.join(str(self.project_root), '')
+        if not path.startswith(root):
+            return True
+        relative_path = path[len(root):].replace(os.sep, '/')
+        if self._rules is None:
+            from .ignore import load_ignore_rules
+            self._rules = load_ignore_rules(str(self.project_root), self.exclude_dirs)
+        rules = self._rules
+        parts = relative_path.split('/')
+        if any(rules.excludes_dir_name(part) for part in (parts if is_directory else parts[:-1])):
+            return True
+        if not rules.has_gitignore:
+            return False
+        if is_directory:
+            return rules.ignores_dir(relative_path) or rules.ignores(relative_path + '/')
+        return rules.ignores(relative_path)
+
+    def handle_event(self, event_type: str, src_path: str, dest_path: str, is_directory: bool) -> None:
+        """Cập nhật bộ nhớ đệm theo một sự kiện của watchdog."""
+        if event_type in ('opened', 'closed_no_write') or (is_directory and event_type in ('modified', 'closed')):
+            return
+        if os.path.basename(src_path) == '.gitignore' or os.path.basename(dest_path) == '.gitignore':
+            # Quy tắc bỏ qua được tải lại ở lần lọc sự kiện tiếp theo.
+            self._rules = None
+            structural = True
+        elif all(self._ignores(path, is_directory) for path in (src_path, dest_path) if path):
+            return
+        else:
+            structural = event_type not in ('modified', 'closed')
+        with self._lock:
+            if structural:
+                self._listings.clear()
+                self._tree = None
+            for path in (src_path, dest_path):
+                entry = self._contents.pop(path, None) if path else None
+                if entry is not None:
+                    self._cached_bytes -= entry[1]
+
+    def files(self, use_all_text_files: bool, extensions: List[str]) -> Any:
+        """``FileIndex`` giống ``find_file_index`` nhưng được giữ giữa các yêu cầu (không được sửa)."""
+        key = (use_all_text_files, tuple(sorted(extensions)))
+        with self._lock:
+            cached = self._listings.get(key)
+        if cached is not None:
+            return cached
+        from .utils import find_file_index
+        found = find_file_index(str(self.project_root), self.exclude_dirs, use_all_text_files, list(extensions))
+        with self._lock:
+            self._listings[key] = found
+        return found
+
+    def tree(self) -> str:
+        with self._lock:
+            cached = self._tree
+        if cached is not None:
+            return cached
+        from .tree_generator import generate_tree
+        tree_structure = generate_tree(str(self.project_root), self.exclude_dirs)
+        with self._lock:
+            self._tree = tree_structure
+        return tree_structure
+
+    def read_bytes(self, file_path: str) -> bytes:
+        """Đọc nội dung file, dùng bản trong bộ nhớ nếu ``mtime``/kích thước chưa đổi."""
+        st = os.stat(file_path)
+        with self._lock:
+            entry = self._contents.get(file_path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        with self._lock:
+            previous = self._contents.pop(file_path, None)
+            if previous is not None:
+                self._cached_bytes -= previous[1]
+            if self._cached_bytes + st.st_size <= self.max_cache_bytes:
+                self._contents[file_path] = (st.st_mtime_ns, st.st_size, content)
+                self._cached_bytes += st.st_size
+        return content
+
+
+class _LogCollector(logging.Handler):
+    """Gom các bản ghi log của một yêu cầu để gửi về client."""
+
+    def __init__(self, level: int) -> None:
+        super().__init__(level=level)
+        self.records: List[List[Any]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append([record.levelno, record.getMessage()])
+
+
+class DaemonServer:
+    """Máy chủ xử lý tuần tự các yêu cầu trên một Unix socket."""
+
+    def __init__(self, t: Any, socket_path: str) -> None:
+        self.t = t
+        self.socket_path = socket_path
+        self._indexes: 'OrderedDict[Tuple[str, frozenset], ProjectIndex]' = OrderedDict()
+        self._translators: Dict[str, Any] = {}
+        self._running = False
+
+    def index_for(self, project_path: str, exclude_dirs: List[str]) -> ProjectIndex:
+        key = (str(Path(project_path).resolve()), frozenset(exclude_dirs))
+        index = self._indexes.get(key)
+        if index is None:
+            index = ProjectIndex(Path(key[0]), set(exclude_dirs))
+            index.start()
+            self._indexes[key] = index
+            if len(self._indexes) > MAX_PROJECTS:
+                _, evicted = self._indexes.popitem(last=False)
+                evicted.stop()
+        else:
+            self._indexes.move_to_end(key)
+        return index
+
+    def _translator(self, lang: Optional[str]) -> Any:
+        if not lang or lang == self.t.lang:
+            return self.t
+        if lang not in self._translators:
+            from .translator import Translator
+            translator = Translator()
+            translator.lang = lang
+            self._translators[lang] = translator
+        return self._translators[lang]
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Xử lý một yêu cầu đã giải mã; luôn trả về một dict phản hồi."""
+        if request.get('version') != PROTOCOL_VERSION:
+            return {'ok': False, 'error': f"unsupported protocol version {request.get('version')!r}"}
+        command = request.get('command')
+        if command not in COMMANDS:
+            return {'ok': False, 'error': f"unknown command {command!r}"}
+        if command == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        if command == 'shutdown':
+            self._running = False
+            return {'ok': True}
+
+        project_path = request.get('project', '')
+        if not os.path.isdir(project_path):
+            return {'ok': False, 'error': f"not a directory: {project_path}"}
+        t = self._translator(request.get('lang'))
+        log_level = request.get('log_level', logging.INFO)
+        collector = _LogCollector(log_level)
+        root_logger = logging.getLogger()
+        previous_level = root_logger.level
+        root_logger.setLevel(min(previous_level, log_level))
+        root_logger.addHandler(collector)
+        try:
+            response = self._run(t, command, project_path, request)
+        except Exception as e:
+            logging.error(t.get('error_fatal', error=e), exc_info=True)
+            response = {}
+        finally:
+            root_logger.removeHandler(collector)
+            root_logger.setLevel(previous_level)
+        response.update(ok=True, log=collector.records)
+        return response
+
+    def _run(self, t: Any, command: str, project_path: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        index = self.index_for(project_path, request.get('exclude', []))
+        if command == 'tree':
+            return {'root': str(index.project_root), 'tree': index.tree()}
+        if command == 'stats':
+            from .stats_generator import export_project_stats
+            export_project_stats(t, project_path, request['output'], index.exclude_dirs, file_list=index.files(True, []))
+        elif command == 'todo':
+            from .todo_finder import export_todo_report
+            export_todo_report(t, project_path, request['output'], index.exclude_dirs, file_list=index.files(True, []))
+        else:
+            from .bundler import create_code_bundle
+            from .manifest import DEFAULT_HASH_ALGORITHM
+            from .text_encoding import DEFAULT_NON_UTF8_POLICY
+            files = index.files(bool(request.get('use_all')), request.get('extensions') or [])
+            create_code_bundle(t, project_path, request['output'], index.exclude_dirs, file_list=files,
+                               output_format=request.get('format', 'txt'), max_bytes=request.get('max_bytes'),
+                               max_tokens=request.get('max_tokens'), dedup=bool(request.get('dedup')), project_index=index,
+                               compression=request.get('compression'), compression_level=request.get('compression_level'),
+                               non_utf8=request.get('non_utf8', DEFAULT_NON_UTF8_POLICY),
+                               hash_algorithm=request.get('hash_algorithm', DEFAULT_HASH_ALGORITHM))
+        return {}
+
+    def serve_forever(self) -> None:
+        if not hasattr(socket, 'AF_UNIX'):
+            logging.error(self.t.get('error_daemon_unsupported'))
+            return
+        if os.path.exists(self.socket_path):
+            if _connect(self.socket_path) is not None:
+                logging.error(self.t.get('error_daemon_already_running', path=self.socket_path))
+                return
+            os.unlink(self.socket_path)  # socket cũ của một daemon đã chết
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # chỉ người dùng hiện tại được kết nối
+        try:
+            server.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        server.listen(8)
+        self._running = True
+        logging.info(self.t.get('info_daemon_listening', path=self.socket_path))
+        try:
+            while self._running:
+                conn, _ = server.accept()
+                with conn:
+                    self._serve_connection(conn)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+            for index in self._indexes.values():
+                index.stop()
+            logging.info(self.t.get('info_daemon_stopped'))
+
+    def _serve_connection(self, conn: socket.socket) -> None:
+        try:
+            with conn.makefile('rb') as reader:
+                line = reader.readline()
+            request = json.loads(line.decode('utf-8'))
+            response = self.handle(request) if isinstance(request, dict) else {'ok': False, 'error': 'bad request'}
+        except (OSError, ValueError) as e:
+            response = {'ok': False, 'error': str(e)}
+        try:
+            conn.sendall(json.dumps(response).encode('utf-8') + b"\n")
+        except OSError:
+            pass
+
+
+def _connect(socket_path: str) -> Optional[socket.socket]:
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def send_request(command: str, payload: Optional[Dict[str, Any]] = None, socket_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Gửi một yêu cầu tới daemon và đợi phản hồi.
+
+    Returns:
+        Dict phản hồi, hoặc None nếu không có daemon nào đang chạy ở ``socket_path``.
+    """
+    sock = _connect(socket_path or default_socket_path())
+    if sock is None:
+        return None
+    request = dict(payload or {}, version=PROTOCOL_VERSION, command=command)
+    try:
+        with sock:
+            sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+            sock.settimeout(None)  # bundle lớn có thể mất một lúc
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+        return json.loads(line.decode('utf-8')) if line else None
+    except (OSError, ValueError) as e:
+        logging.debug(f"Không thể giao tiếp với daemon: {e}")
+        return None
+
+
+def run_via_daemon(command: str, payload: Dict[str, Any], socket_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Chạy một lệnh qua daemon và in lại log của daemon trong tiến trình hiện tại.
+
+    Returns:
+        Dict phản hồi nếu daemon đã xử lý yêu cầu; None nếu cần chạy lệnh trong tiến trình.
+    """
+    response = send_request(command, payload, socket_path)
+    if response is None:
+        logging.debug("Không có daemon đang chạy, xử lý trong tiến trình hiện tại.")
+        return None
+    if not response.get('ok'):
+        logging.debug(f"Daemon từ chối yêu cầu: {response.get('error')}")
+        return None
+    for level, message in response.get('log', []):
+        logging.log(level, message)
+    return response
+
+
+def serve(t: Any, socket_path: Optional[str] = None) -> None:
+    """Chạy daemon ở tiền cảnh cho tới khi nhận lệnh ``shutdown`` hoặc Ctrl+C."""
+    DaemonServer(t, socket_path or default_socket_path()).serve_forever()
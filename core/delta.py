@@ -0,0 +1,138 @@
+"""
+Bundle delta: chỉ chứa các file được thêm hoặc sửa so với manifest của một bundle trước,
+kèm danh sách file bị xóa (xem phần delta trong ``manifest``).
+
+File được coi là chưa đổi khi kích thước và ``mtime`` trùng với manifest cũ, nên không cần
+đọc lại. File cùng kích thước nhưng khác ``mtime`` được băm lại (song song) để phân biệt
+file chỉ bị "touch" với file thực sự bị sửa.
+"""
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_index import FileIndex
+from .manifest import DEFAULT_HASH_WORKERS, hash_file, read_manifest
+
+
+def load_base_manifest(t: Any, path: str) -> Optional[Dict[str, Any]]:
+    """
+    Đọc manifest từ một bundle đầy đủ (có thể nén) hoặc từ file chỉ chứa phần manifest.
+
+    Returns:
+        Manifest (xem ``manifest.read_manifest``), hoặc None nếu không dùng được làm gốc.
+    """
+    from .compression import open_binary_reader
+    if not Path(path).exists():
+        logging.error(t.get('error_file_not_found', path=path))
+        return None
+    with open_binary_reader(path) as f:
+        _, manifest = read_manifest(f.read())
+    if manifest is None:
+        logging.error(t.get('error_delta_no_manifest', path=path))
+        return None
+    if manifest['delta'] is not None:
+        # Manifest của bundle delta chỉ có các file đã đổi, không mô tả được toàn bộ dự án.
+        logging.error(t.get('error_delta_base_is_delta', path=path))
+        return None
+    return manifest
+
+
+def _hash_or_none(path: str, algorithm: str) -> Optional[str]:
+    try:
+        return hash_file(path, algorithm)
+    except OSError:
+        return None
+
+
+def plan_delta(project_root: Path, files: FileIndex, base: Dict[str, Any],
+               workers: int = DEFAULT_HASH_WORKERS) -> Tuple[FileIndex, Dict[str, Any]]:
+    """
+    So sánh các file hiện tại với manifest gốc.
+
+    Args:
+        project_root: Thư mục gốc của dự án.
+        files: Các file được chọn.
+        base: Manifest của bundle gốc.
+        workers: Số thread băm lại các file cùng kích thước nhưng khác ``mtime``.
+
+    Returns:
+        ``(file cần ghi vào bundle, delta)`` với delta là dict ``added`` (danh sách),
+        ``modified``/``deleted`` (đường dẫn -> (digest, số byte) trong bản gốc) và
+        ``unchanged`` (số file).
+    """
+    algorithm, base_files = base['algorithm'], base['files']
+    changed: List[int] = []
+    added: List[str] = []
+    modified: Dict[str, Tuple[str, int]] = {}
+    candidates: List[Tuple[int, str, str, str, int]] = []
+    seen = set()
+    unchanged = 0
+    for position, (relative_path, file_path) in enumerate(files.items()):
+        seen.add(relative_path)
+        entry = base_files.get(relative_path)
+        if entry is None:
+            added.append(relative_path)
+            changed.append(position)
+            continue
+        digest, size, mtime = entry
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            st = None
+        if st is None or st.st_size != size:
+            modified[relative_path] = (digest, size)
+            changed.append(position)
+        elif mtime and st.st_mtime_ns == mtime:
+            unchanged += 1
+        else:
+            candidates.append((position, file_path, relative_path, digest, size))
+
+    if candidates:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            digests = executor.map(lambda item: _hash_or_none(item[1], algorithm), candidates)
+            for (position, _, relative_path, digest, size), current in zip(candidates, digests):
+                if current == digest:
+                    unchanged += 1
+                else:
+                    modified[relative_path] = (digest, size)
+                    changed.append(position)
+
+    # Chỉ những file không còn trên ổ đĩa mới là bị xóa; file còn đó nhưng không được chọn
+    # lần này (ví dụ khác bộ lọc đuôi file) được bỏ qua.
+    deleted = {path: (digest, size) for path, (digest, size, _) in base_files.items()
+               if path not in seen and not (project_root / path).exists()}
+    return files.select(changed), {'added': added, 'modified': modified, 'deleted': deleted, 'unchanged': unchanged}
+
+
+def _matches(path: Path, digest: str, size: int, algorithm: str) -> bool:
+    try:
+        return path.stat().st_size == size and hash_file(path, algorithm) == digest
+    except OSError:
+        return False
+
+
+def find_base_conflicts(project_root: Path, manifest: Dict[str, Any]) -> List[str]:
+    """
+    Các file trong dự án không ở đúng trạng thái mà bundle delta được tạo từ đó.
+
+    Một file bị sửa phải còn giống bản gốc (hoặc đã giống bản mới); file bị xóa nếu còn thì
+    phải giống bản gốc; file thêm mới nếu đã có thì phải giống bản mới.
+    """
+    algorithm, delta = manifest['algorithm'], manifest['delta']
+    conflicts = []
+    for path, (digest, size, _) in manifest['files'].items():
+        local = project_root / path
+        base = delta['modified'].get(path)
+        if base is not None:
+            ok = _matches(local, base[0], base[1], algorithm) or _matches(local, digest, size, algorithm)
+        else:
+            ok = not local.exists() or _matches(local, digest, size, algorithm)
+        if not ok:
+            conflicts.append(path)
+    for path, (digest, size) in delta['deleted'].items():
+        local = project_root / path
+        if local.exists() and not _matches(local, digest, size, algorithm):
+            conflicts.append(path)
+    return conflicts
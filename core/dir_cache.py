@@ -0,0 +1,169 @@
+"""
+Cache danh sách thư mục giữa các lần chạy cho các hàm duyệt cây (``find_project_files``,
+``generate_tree``).
+
+Với mỗi thư mục, cache lưu ``mtime`` của nó cùng danh sách thư mục con và file. Khi ``mtime``
+không đổi, danh sách được lấy lại từ cache: chỉ tốn một lần ``stat`` cho cả thư mục thay vì
+``scandir`` và kiểm tra loại của từng file. ``mtime`` của một thư mục chỉ đổi khi chính các mục
+trong nó được thêm, xóa hoặc đổi tên, nên mỗi thư mục con vẫn phải được ``stat`` riêng.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from pathlib import Path
+
+from . import instrumentation
+
+CACHE_VERSION = 1
+
+# Một bản ghi chỉ được tin khi thư mục đã không đổi ít nhất chừng này trước lúc liệt kê, để
+# một thay đổi ngay sau đó (cùng "tick" mtime trên hệ thống file có độ phân giải thô) không bị bỏ sót.
+RACY_WINDOW_NS = 2 * 10**9
+
+_active: Optional['DirectoryCache'] = None
+
+
+def _default_cache_dir() -> Path:
+    return Path.home() / '.export-code' / 'cache' / 'dirs'
+
+
+def _list_directory(dirpath: str) -> Optional[Tuple[List[str], List[str], List[str]]]:
+    """``(thư mục con, file, file không phải file thường)`` theo thứ tự của ``scandir``."""
+    dirs, files, unsafe = [], [], []
+    try:
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # Giống os.walk(followlinks=False): không đi vào symlink tới thư mục.
+                    if not entry.is_symlink():
+                        dirs.append(entry.name)
+                    continue
+                files.append(entry.name)
+                try:
+                    regular = entry.is_file(follow_symlinks=False)
+                except OSError:
+                    regular = False
+                if not regular:
+                    unsafe.append(entry.name)
+    except OSError:
+        return None
+    return dirs, files, unsafe
+
+
+class DirectoryCache:
+    """
+    Danh sách thư mục của một dự án, lưu ở ``~/.export-code/cache/dirs`` giữa các lần chạy.
+
+    Mỗi bản ghi gồm (mtime_ns, thời điểm liệt kê, thư mục con, file, file không an toàn).
+    """
+
+    def __init__(self, project_path: str, cache_dir: Optional[str] = None) -> None:
+        project_root = Path(project_path).resolve()
+        self.project_root = project_root
+        key = hashlib.sha1(str(project_root).encode('utf-8')).hexdigest()[:12]
+        self.cache_path = Path(cache_dir or _default_cache_dir()) / f"{project_root.name}-{key}.json"
+        self._records: Dict[str, list] = {}
+        self._seen: Dict[str, list] = {}
+        self._dirty = False
+        try:
+            with self.cache_path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self._records = data.get('records', {})
+        except (OSError, ValueError):
+            pass
+
+    def listing(self, dirpath: str, key: str) -> Optional[Tuple[List[str], List[str], List[str]]]:
+        """
+        Danh sách của ``dirpath`` (``key`` là đường dẫn tương đối dạng POSIX, ``.`` cho gốc).
+
+        Returns:
+            ``(thư mục con, file, file không phải file thường)``, hoặc None nếu không đọc được.
+        """
+        try:
+            mtime = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            return None
+        record = self._records.get(key)
+        if record is not None and record[0] == mtime and record[1] - mtime >= RACY_WINDOW_NS:
+            instrumentation.count('dir_cache.hits')
+            self._seen[key] = record
+            return record[2], record[3], record[4]
+        instrumentation.count('dir_cache.misses')
+        listed = _list_directory(dirpath)
+        if listed is None:
+            return None
+        record = [mtime, time.time_ns(), *listed]
+        self._records[key] = self._seen[key] = record
+        self._dirty = True
+        return listed
+
+    def save(self) -> None:
+        """Ghi các thư mục đã gặp trong lần chạy này; bản ghi của thư mục không còn được duyệt bị bỏ."""
+        if not self._dirty and len(self._seen) == len(self._records):
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'records': self._seen}, f, separators=(',', ':'))
+            os.replace(str(tmp_path), str(self.cache_path))
+            self._dirty = False
+        except OSError as e:
+            logging.debug(f"Không thể ghi cache thư mục '{self.cache_path}': {e}")
+
+
+@contextmanager
+def use_directory_cache(project_path: str, cache_dir: Optional[str] = None) -> Iterator[DirectoryCache]:
+    """Bật cache cho mọi lần duyệt ``project_path`` trong khối ``with``, rồi lưu lại khi kết thúc."""
+    global _active
+    previous, _active = _active, DirectoryCache(project_path, cache_dir)
+    try:
+        yield _active
+    finally:
+        cache, _active = _active, previous
+        cache.save()
+
+
+def active_for(root: Path) -> Optional[DirectoryCache]:
+    """Cache đang bật nếu nó thuộc về thư mục gốc ``root`` (đã resolve), ngược lại None."""
+    if _active is not None and _active.project_root == root:
+        return _active
+    return None
+
+
+def scan_tree(top: str, cache: Optional[DirectoryCache] = None) -> Iterator[Tuple[str, List[str], List[str], Set[str]]]:
+    """
+    Duyệt cây giống ``os.walk(top, topdown=True)``: có thể sửa ``dirnames`` tại chỗ để bỏ qua
+    thư mục con. Mỗi phần tử là ``(dirpath, dirnames, filenames, unsafe)`` với ``unsafe`` là các
+    file không phải file thường (symlink, socket, pipe, ...).
+    """
+    for dirpath, _, dirnames, filenames, unsafe in scan_tree_relative(top, cache):
+        yield dirpath, dirnames, filenames, unsafe
+
+
+def scan_tree_relative(top: str, cache: Optional[DirectoryCache] = None) -> Iterator[Tuple[str, str, List[str], List[str], Set[str]]]:
+    """
+    Giống ``scan_tree`` nhưng mỗi phần tử kèm đường dẫn tương đối dạng POSIX của thư mục so với
+    ``top`` (``''`` cho chính ``top``): ``(dirpath, relative_dir, dirnames, filenames, unsafe)``.
+    Đường dẫn tương đối được ghép dần khi đi xuống, không cần ``relative_to`` cho mỗi thư mục.
+    """
+    stack = [(top, '')]
+    while stack:
+        dirpath, relative_dir = stack.pop()
+        listed = cache.listing(dirpath, relative_dir or '.') if cache is not None else _list_directory(dirpath)
+        if listed is None:
+            continue
+        dirnames, filenames = list(listed[0]), list(listed[1])
+        yield dirpath, relative_dir, dirnames, filenames, set(listed[2])
+        prefix = relative_dir + '/' if relative_dir else ''
+        for name in reversed(dirnames):
+            stack.append((os.path.join(dirpath, name), prefix + name))
@@ -0,0 +1,129 @@
+import os
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from pathlib import Path
+
+from .plugin_base import ExportCodePlugin
+
+DEFAULT_READ_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+_T = TypeVar('_T')
+_R = TypeVar('_R')
+
+
+def bounded_map(executor: ThreadPoolExecutor, fn: Callable[[_T], _R], items: Iterable[_T], window: int) -> Iterator[_R]:
+    """
+    Giống ``executor.map`` nhưng chỉ giữ tối đa ``window`` tác vụ đang chờ, để bộ nhớ không
+    tăng theo số file khi luồng tiêu thụ chậm hơn luồng đọc. Kết quả giữ nguyên thứ tự.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class _HookDispatcher:
+    """Chuyển nội dung file tới các plugin, tắt plugin nào ném lỗi để không làm hỏng lượt đọc."""
+
+    def __init__(self, t: Any, plugins: List[ExportCodePlugin]) -> None:
+        self.t = t
+        self.parallel = [p for p in plugins if p.parallel_safe]
+        self.serial = [p for p in plugins if not p.parallel_safe]
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def _call(self, plugin: ExportCodePlugin, path: str, content: str) -> None:
+        if id(plugin) in self._failed:
+            return
+        try:
+            plugin.on_file(path, content)
+        except Exception as exc:
+            self.disable(plugin, exc)
+
+    def disable(self, plugin: ExportCodePlugin, exc: Exception) -> None:
+        with self._lock:
+            self._failed.add(id(plugin))
+        logging.error(self.t.get("warn_plugin_execute_failed", command=plugin.command, error=exc), exc_info=True)
+
+    def dispatch_parallel(self, path: str, content: str) -> None:
+        for plugin in self.parallel:
+            self._call(plugin, path, content)
+
+    def dispatch_serial(self, path: str, content: str) -> None:
+        for plugin in self.serial:
+            self._call(plugin, path, content)
+
+    def is_active(self, plugin: ExportCodePlugin) -> bool:
+        return id(plugin) not in self._failed
+
+
+def run_file_hooks(
+    t: Any,
+    args: Any,
+    plugins: List[ExportCodePlugin],
+    project_path: str,
+    files: Any,
+    max_workers: Optional[int] = None
+) -> None:
+    """
+    Chạy một lượt đọc file duy nhất và đưa nội dung mỗi file tới ``on_file`` của mọi plugin.
+
+    File được đọc song song bởi một thread pool. Plugin có ``parallel_safe = True`` nhận
+    ``on_file`` ngay trong luồng đọc; các plugin còn lại được gọi tuần tự trên luồng chính,
+    theo thứ tự đường dẫn đã sắp xếp. Nhờ vậy N plugin chỉ tốn một lượt I/O.
+
+    Args:
+        t: Đối tượng Translator.
+        args: Namespace tham số dòng lệnh, được chuyển cho ``begin``.
+        plugins: Các plugin tham gia lượt đọc.
+        project_path: Thư mục gốc của dự án.
+        files: Danh sách đường dẫn tuyệt đối cần đọc, hoặc ``file_index.FileIndex``.
+        max_workers: Số luồng đọc (mặc định: ``DEFAULT_READ_WORKERS``).
+    """
+    project_root = Path(project_path).resolve()
+    dispatcher = _HookDispatcher(t, plugins)
+
+    for plugin in plugins:
+        try:
+            plugin.begin(args, t)
+        except Exception as exc:
+            dispatcher.disable(plugin, exc)
+
+    def read_one(item: Tuple[str, str]) -> Optional[Tuple[str, str]]:
+        relative_path, file_path = item
+        try:
+            with open(file_path, 'r', encoding='utf-8') as infile:
+                content = infile.read()
+        except (OSError, UnicodeDecodeError) as e:
+            logging.error(t.get('error_cannot_read_file', path=relative_path, error=e))
+            return None
+        dispatcher.dispatch_parallel(relative_path, content)
+        return (relative_path, content) if dispatcher.serial else None
+
+    from tqdm import tqdm
+    from .file_index import as_file_index
+    sorted_files = as_file_index(str(project_root), files).sorted()
+    workers = max_workers or DEFAULT_READ_WORKERS
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = bounded_map(executor, read_one, sorted_files.items(), window=workers * 16)
+        try:
+            for result in tqdm(results, total=len(sorted_files), desc=t.get('progress_bar_processing'), unit=" file", ncols=100, disable=logging.getLogger().getEffectiveLevel() > logging.INFO):
+                if result is not None:
+                    dispatcher.dispatch_serial(*result)
+        except KeyboardInterrupt:
+            logging.info("\n🛑 Người dùng đã hủy quá trình xử lý.")
+            return
+
+    for plugin in plugins:
+        if not dispatcher.is_active(plugin):
+            continue
+        try:
+            plugin.finalize()
+        except Exception as exc:
+            dispatcher.disable(plugin, exc)
@@ -0,0 +1,173 @@
+"""
+Danh sách file gọn cho dự án rất lớn.
+
+``FileIndex`` giữ mỗi thư mục một lần (tiền tố được dùng chung bởi mọi file trong thư mục),
+tên file, và các cột ``array`` song song cho thư mục, kích thước và ``mtime``. So với một
+``List[str]`` đường dẫn tuyệt đối, mỗi file chỉ tốn một chuỗi tên ngắn cùng vài byte trong
+các cột; đường dẫn tương đối hay tuyệt đối được ghép khi cần, không có ``Path`` cho từng file.
+"""
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+# Giá trị của cột size/mtime khi chưa ``stat`` file.
+UNKNOWN = -1
+
+
+class FileRecord:
+    """Một dòng của ``FileIndex``; chỉ là view, không chép dữ liệu."""
+
+    __slots__ = ('_index', '_position')
+
+    def __init__(self, index: 'FileIndex', position: int) -> None:
+        self._index = index
+        self._position = position
+
+    @property
+    def name(self) -> str:
+        return self._index._names[self._position]
+
+    @property
+    def relative_path(self) -> str:
+        return self._index.relative_path(self._position)
+
+    @property
+    def path(self) -> str:
+        return self._index.path(self._position)
+
+    @property
+    def size(self) -> int:
+        return self._index.sizes[self._position]
+
+    @property
+    def mtime_ns(self) -> int:
+        return self._index.mtimes[self._position]
+
+    def __repr__(self) -> str:
+        return f"FileRecord({self.relative_path!r})"
+
+
+class FileIndex:
+    """
+    Các file được chọn trong một dự án, theo thứ tự thêm vào.
+
+    Args:
+        root: Thư mục gốc (đường dẫn tuyệt đối đã resolve).
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        # Với mỗi thư mục: tiền tố tương đối ('' cho gốc, 'a/b/' cho thư mục con) và tiền tố
+        # tuyệt đối theo kiểu của hệ điều hành.
+        self._prefixes: List[str] = []
+        self._native_prefixes: List[str] = []
+        self._directory_ids: Dict[str, int] = {}
+        self._directories = array('I')
+        self._names: List[str] = []
+        self.sizes = array('q')
+        self.mtimes = array('q')
+
+    def add_directory(self, relative_dir: str) -> int:
+        """Trả về id của thư mục ``relative_dir`` (dạng POSIX, ``''`` là thư mục gốc), thêm mới nếu chưa có."""
+        prefix = relative_dir + '/' if relative_dir else ''
+        directory_id = self._directory_ids.get(prefix)
+        if directory_id is None:
+            directory_id = self._directory_ids[prefix] = len(self._prefixes)
+            self._prefixes.append(prefix)
+            native = os.path.join(self.root, *relative_dir.split('/')) if relative_dir else self.root
+            self._native_prefixes.append(native if native.endswith(os.sep) else native + os.sep)
+        return directory_id
+
+    def append(self, directory_id: int, name: str, size: int = UNKNOWN, mtime_ns: int = UNKNOWN) -> None:
+        self._directories.append(directory_id)
+        self._names.append(name)
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+
+    def add_path(self, relative_path: str, size: int = UNKNOWN, mtime_ns: int = UNKNOWN) -> None:
+        """Thêm một file theo đường dẫn tương đối dạng POSIX."""
+        relative_dir, _, name = relative_path.rpartition('/')
+        self.append(self.add_directory(relative_dir), name, size, mtime_ns)
+
+    @classmethod
+    def from_paths(cls, root: str, paths: Iterable[str]) -> 'FileIndex':
+        """Tạo index từ danh sách đường dẫn (tuyệt đối hoặc tương đối so với ``root``)."""
+        index = cls(root)
+        prefix = root if root.endswith(os.sep) else root + os.sep
+        for path in paths:
+            path = str(path)
+            if path.startswith(prefix):
+                relative_path = path[len(prefix):]
+            else:
+                relative_path = os.path.relpath(os.path.join(root, path), root)
+            index.add_path(relative_path.replace(os.sep, '/') if os.sep != '/' else relative_path)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        for position in range(len(self._names)):
+            yield FileRecord(self, position)
+
+    def __getitem__(self, position: int) -> FileRecord:
+        if not -len(self._names) <= position < len(self._names):
+            raise IndexError(position)
+        return FileRecord(self, position % len(self._names))
+
+    def relative_path(self, position: int) -> str:
+        return self._prefixes[self._directories[position]] + self._names[position]
+
+    def path(self, position: int) -> str:
+        return self._native_prefixes[self._directories[position]] + self._names[position]
+
+    def names(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def relative_paths(self) -> Iterator[str]:
+        prefixes = self._prefixes
+        for directory_id, name in zip(self._directories, self._names):
+            yield prefixes[directory_id] + name
+
+    def paths(self) -> Iterator[str]:
+        prefixes = self._native_prefixes
+        for directory_id, name in zip(self._directories, self._names):
+            yield prefixes[directory_id] + name
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Các cặp ``(đường dẫn tương đối, đường dẫn tuyệt đối)``."""
+        prefixes, native_prefixes = self._prefixes, self._native_prefixes
+        for directory_id, name in zip(self._directories, self._names):
+            yield prefixes[directory_id] + name, native_prefixes[directory_id] + name
+
+    def select(self, positions: Iterable[int]) -> 'FileIndex':
+        """Index mới chỉ gồm các dòng ở ``positions`` (theo thứ tự đó); bảng thư mục được dùng chung."""
+        selected = FileIndex(self.root)
+        selected._prefixes, selected._native_prefixes, selected._directory_ids = self._prefixes, self._native_prefixes, self._directory_ids
+        for position in positions:
+            selected._directories.append(self._directories[position])
+            selected._names.append(self._names[position])
+            selected.sizes.append(self.sizes[position])
+            selected.mtimes.append(self.mtimes[position])
+        return selected
+
+    def sorted(self) -> 'FileIndex':
+        """Bản sao được sắp xếp theo đường dẫn tương đối."""
+        prefixes, directories, names = self._prefixes, self._directories, self._names
+        return self.select(sorted(range(len(names)), key=lambda i: prefixes[directories[i]] + names[i]))
+
+    def fill_stats(self) -> None:
+        """Điền size/mtime cho các file chưa có (một ``stat`` mỗi file); file không ``stat`` được giữ ``UNKNOWN``."""
+        for position, path in enumerate(self.paths()):
+            if self.sizes[position] != UNKNOWN:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            self.sizes[position], self.mtimes[position] = st.st_size, st.st_mtime_ns
+
+
+def as_file_index(root: str, files: Union[FileIndex, Iterable[str]]) -> FileIndex:
+    """``files`` nếu đã là ``FileIndex``, ngược lại tạo index từ danh sách đường dẫn."""
+    return files if isinstance(files, FileIndex) else FileIndex.from_paths(root, files)
@@ -1,82 +1,348 @@
-import git
-import logging
-import os
-from typing import List, Optional, Any
-from pathlib import Path
-
-def _get_repo(t: Any, path: str) -> Optional[git.Repo]:
-    """
-    Tìm đối tượng repo Git từ đường dẫn, xử lý lỗi nếu không tìm thấy.
-    
-    Args:
-        t: Đối tượng Translator.
-        path: Đường dẫn đến thư mục cần kiểm tra repo Git.
-        
-    Returns:
-        Đối tượng git.Repo hoặc None nếu không tìm thấy.
-    """
-    try:
-        return git.Repo(path, search_parent_directories=True)
-    except git.exc.InvalidGitRepositoryError:
-        logging.error(t.get('error_git_repo_not_found', path=str(Path(path).resolve())))
-        return None
-    except Exception as e:
-        logging.error(f"{t.get('error_git_init_failed')}: {e}", exc_info=True)
-        return None
-
-def get_staged_files(t: Any, repo_path: str) -> List[str]:
-    """
-    Lấy danh sách các file đã được add vào staging area.
-    
-    Args:
-        t: Đối tượng Translator.
-        repo_path: Đường dẫn đến thư mục dự án.
-        
-    Returns:
-        Danh sách đường dẫn tuyệt đối đến các file trong staging area.
-    """
-    repo = _get_repo(t, repo_path)
-    if not repo: return []
-    
-    repo_root = repo.working_tree_dir
-    
-    repo_root_path = Path(repo_root)
-    staged_files = [str(repo_root_path / item.a_path) for item in repo.index.diff('HEAD')]
-    untracked_but_added = [str(repo_root_path / item.a_path) for item in repo.index.diff(None) if item.change_type == 'A']
-    
-    all_files = sorted(list(set(staged_files + untracked_but_added)))
-    
-    logging.info(t.get('info_git_found_staged', count=len(all_files)))
-    logging.debug(f"Files in staging: {all_files}")
-    return all_files
-
-def get_changed_files_since(t: Any, repo_path: str, branch: str) -> List[str]:
-    """
-    Lấy danh sách các file đã thay đổi so với một nhánh cụ thể.
-    
-    Args:
-        t: Đối tượng Translator.
-        repo_path: Đường dẫn đến thư mục dự án.
-        branch: Tên nhánh để so sánh.
-        
-    Returns:
-        Danh sách đường dẫn tuyệt đối đến các file đã thay đổi.
-    """
-    repo = _get_repo(t, repo_path)
-    if not repo: return []
-        
-    try:
-        diff_items = repo.head.commit.diff(branch)
-        repo_root = repo.working_tree_dir
-        repo_root_path = Path(repo_root)
-        changed_files = sorted([str(repo_root_path / item.a_path) for item in diff_items])
-        
-        logging.info(t.get('info_git_found_since', count=len(changed_files), branch=branch))
-        logging.debug(f"Changed files: {changed_files}")
-        return changed_files
-    except git.exc.GitCommandError:
-        logging.error(t.get('error_branch_not_found', branch=branch))
-        return []
-    except Exception as e:
-        logging.error(t.get('error_diff_failed', branch=branch, error=e), exc_info=True)
-        return []
\ No newline at end of file
+import logging
+import os
+import subprocess
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple, TYPE_CHECKING
+from pathlib import Path
+
+if TYPE_CHECKING:
+    import git
+
+
+class GitCommandFailed(Exception):
+    """Lệnh git trả về mã lỗi khác 0."""
+
+    def __init__(self, args: List[str], returncode: int, stderr: str) -> None:
+        super().__init__(stderr.strip() or f"git {' '.join(args)} exited with {returncode}")
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+def _run_git(cwd: str, *args: str) -> bytes:
+    """
+    Chạy một lệnh git và trả về stdout dạng bytes.
+
+    Raises:
+        FileNotFoundError: Nếu không tìm thấy chương trình ``git``.
+        GitCommandFailed: Nếu lệnh git thất bại.
+    """
+    result = subprocess.run(['git', *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if result.returncode != 0:
+        raise GitCommandFailed(list(args), result.returncode, result.stderr.decode('utf-8', 'replace'))
+    return result.stdout
+
+
+@lru_cache(maxsize=64)
+def _find_repo_root(path: str) -> Optional[str]:
+    """Tìm thư mục gốc của repo chứa ``path`` (kết quả được cache theo đường dẫn)."""
+    try:
+        output = _run_git(path, 'rev-parse', '--show-toplevel')
+    except GitCommandFailed:
+        return None
+    return os.fsdecode(output.strip()) or None
+
+
+def parse_name_status_z(data: bytes) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Phân tích output của ``git diff --name-status -z``.
+
+    Returns:
+        Danh sách (status, path, old_path). ``status`` là chữ cái đầu (A, M, D, R, C, T, ...);
+        ``old_path`` chỉ có với rename/copy.
+    """
+    fields = data.split(b'\0')
+    if fields and fields[-1] == b'':
+        fields.pop()
+    changes = []
+    i = 0
+    while i < len(fields):
+        status = fields[i].decode('ascii', 'replace')[:1]
+        if status in ('R', 'C'):
+            old_path, new_path = os.fsdecode(fields[i + 1]), os.fsdecode(fields[i + 2])
+            changes.append((status, new_path, old_path))
+            i += 3
+        else:
+            changes.append((status, os.fsdecode(fields[i + 1]), None))
+            i += 2
+    return changes
+
+
+def _existing_paths(repo_root: str, changes: List[Tuple[str, str, Optional[str]]]) -> List[str]:
+    """Chuyển các thay đổi thành đường dẫn tuyệt đối, bỏ các file đã bị xóa."""
+    root = Path(repo_root)
+    return sorted({str(root / path) for status, path, _ in changes if status != 'D'})
+
+
+def _get_repo(t: Any, path: str) -> Optional['git.Repo']:
+    """
+    Tìm đối tượng repo Git từ đường dẫn, xử lý lỗi nếu không tìm thấy.
+
+    Args:
+        t: Đối tượng Translator.
+        path: Đường dẫn đến thư mục cần kiểm tra repo Git.
+
+    Returns:
+        Đối tượng git.Repo hoặc None nếu không tìm thấy.
+    """
+    # GitPython khá nặng khi import nên chỉ nạp khi thực sự cần tới Git.
+    import git
+    try:
+        return git.Repo(path, search_parent_directories=True)
+    except git.exc.InvalidGitRepositoryError:
+        logging.error(t.get('error_git_repo_not_found', path=str(Path(path).resolve())))
+        return None
+    except Exception as e:
+        logging.error(f"{t.get('error_git_init_failed')}: {e}", exc_info=True)
+        return None
+
+def _get_staged_files_gitpython(t: Any, repo_path: str) -> List[str]:
+    repo = _get_repo(t, repo_path)
+    if not repo: return []
+
+    repo_root = repo.working_tree_dir
+
+    repo_root_path = Path(repo_root)
+    staged_files = [str(repo_root_path / item.a_path) for item in repo.index.diff('HEAD')]
+    untracked_but_added = [str(repo_root_path / item.a_path) for item in repo.index.diff(None) if item.change_type == 'A']
+
+    return sorted(f for f in set(staged_files + untracked_but_added) if Path(f).exists())
+
+def _get_changed_files_since_gitpython(t: Any, repo_path: str, branch: str) -> Optional[List[str]]:
+    repo = _get_repo(t, repo_path)
+    if not repo: return []
+
+    import git
+    try:
+        diff_items = repo.head.commit.diff(branch)
+        repo_root = repo.working_tree_dir
+        repo_root_path = Path(repo_root)
+        return sorted(str(repo_root_path / item.a_path) for item in diff_items if (repo_root_path / item.a_path).exists())
+    except git.exc.GitCommandError:
+        logging.error(t.get('error_branch_not_found', branch=branch))
+        return None
+    except Exception as e:
+        logging.error(t.get('error_diff_failed', branch=branch, error=e), exc_info=True)
+        return None
+
+def get_staged_files(t: Any, repo_path: str) -> List[str]:
+    """
+    Lấy danh sách các file đã được add vào staging area.
+
+    Dùng trực tiếp ``git diff --cached --name-status -z`` (nhanh hơn nhiều so với GitPython
+    trên repo lớn); GitPython chỉ là phương án dự phòng khi không có chương trình ``git``.
+    File bị xóa không được trả về, file được đổi tên trả về theo tên mới.
+
+    Args:
+        t: Đối tượng Translator.
+        repo_path: Đường dẫn đến thư mục dự án.
+
+    Returns:
+        Danh sách đường dẫn tuyệt đối đến các file trong staging area.
+    """
+    try:
+        repo_root = _find_repo_root(str(Path(repo_path).resolve()))
+        if repo_root is None:
+            logging.error(t.get('error_git_repo_not_found', path=str(Path(repo_path).resolve())))
+            return []
+        changes = parse_name_status_z(_run_git(repo_root, 'diff', '--cached', '--name-status', '-z', '-M'))
+        all_files = _existing_paths(repo_root, changes)
+    except FileNotFoundError:
+        logging.debug("Không tìm thấy chương trình git, dùng GitPython.")
+        all_files = _get_staged_files_gitpython(t, repo_path)
+    except GitCommandFailed as e:
+        logging.error(f"{t.get('error_git_init_failed')}: {e}")
+        return []
+
+    logging.info(t.get('info_git_found_staged', count=len(all_files)))
+    logging.debug(f"Files in staging: {all_files}")
+    return all_files
+
+def get_changed_files_since(t: Any, repo_path: str, branch: str) -> List[str]:
+    """
+    Lấy danh sách các file đã thay đổi so với một nhánh cụ thể.
+
+    So sánh HEAD với merge-base của nhánh (``git diff <branch>...HEAD``), bỏ qua file đã bị xóa.
+
+    Args:
+        t: Đối tượng Translator.
+        repo_path: Đường dẫn đến thư mục dự án.
+        branch: Tên nhánh để so sánh.
+
+    Returns:
+        Danh sách đường dẫn tuyệt đối đến các file đã thay đổi.
+    """
+    try:
+        repo_root = _find_repo_root(str(Path(repo_path).resolve()))
+        if repo_root is None:
+            logging.error(t.get('error_git_repo_not_found', path=str(Path(repo_path).resolve())))
+            return []
+        try:
+            _run_git(repo_root, 'rev-parse', '--verify', '--quiet', f'{branch}^{{commit}}')
+        except GitCommandFailed:
+            logging.error(t.get('error_branch_not_found', branch=branch))
+            return []
+        changes = parse_name_status_z(_run_git(repo_root, 'diff', '--name-status', '-z', '-M', f'{branch}...HEAD'))
+        changed_files = _existing_paths(repo_root, changes)
+    except FileNotFoundError:
+        logging.debug("Không tìm thấy chương trình git, dùng GitPython.")
+        changed_files = _get_changed_files_since_gitpython(t, repo_path, branch)
+        if changed_files is None:
+            return []
+    except GitCommandFailed as e:
+        logging.error(t.get('error_diff_failed', branch=branch, error=e))
+        return []
+
+    logging.info(t.get('info_git_found_since', count=len(changed_files), branch=branch))
+    logging.debug(f"Changed files: {changed_files}")
+    return changed_files
+
+
+class CatFileBatch:
+    """
+    Một tiến trình ``git cat-file --batch`` sống lâu để đọc nhiều blob mà không phải spawn
+    tiến trình cho từng file. Các object id được ghi từ một luồng riêng trong khi luồng gọi
+    đọc kết quả, nên pipe không bị tắc dù số lượng blob lớn.
+    """
+
+    def __init__(self, cwd: str) -> None:
+        self.cwd = cwd
+
+    def iter_blobs(self, oids: List[str]) -> Iterator[Optional[bytes]]:
+        """Trả về nội dung từng blob theo đúng thứ tự ``oids`` (None nếu object không tồn tại)."""
+        process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=self.cwd,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+        def feed() -> None:
+            try:
+                for oid in oids:
+                    process.stdin.write(oid.encode('ascii') + b'\n')
+                process.stdin.close()
+            except (BrokenPipeError, ValueError, OSError):
+                pass
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        try:
+            for _ in oids:
+                header = process.stdout.readline()
+                if not header:
+                    raise GitCommandFailed(['cat-file', '--batch'], process.poll() or -1, 'unexpected end of cat-file output')
+                parts = header.split()
+                if len(parts) < 3 or parts[1] == b'missing':
+                    yield None
+                    continue
+                size = int(parts[2])
+                data = process.stdout.read(size)
+                process.stdout.read(1)  # dấu xuống dòng kết thúc mỗi object
+                yield data
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            writer.join(timeout=1)
+
+
+class GitBlobSource:
+    """
+    Nguồn nội dung cho bundler đọc trực tiếp từ object của git (một revision hoặc index),
+    không cần checkout và không đụng tới working tree.
+
+    Attributes:
+        paths: Đường dẫn tương đối (posix) so với thư mục dự án, đã sắp xếp.
+        label: Mô tả nguồn (ví dụ: ``v1.2.0`` hoặc ``index``) để hiển thị trong log.
+    """
+
+    def __init__(self, cwd: str, entries: List[Tuple[str, str]], label: str, skip_binary: bool = False) -> None:
+        self.cwd = cwd
+        self.label = label
+        self.skip_binary = skip_binary
+        self._entries = sorted(entries)
+        self.paths = [path for path, _ in self._entries]
+
+    def filter(self, predicate: Callable[[str], bool]) -> 'GitBlobSource':
+        return GitBlobSource(self.cwd, [(p, oid) for p, oid in self._entries if predicate(p)], self.label, self.skip_binary)
+
+    def sizes(self) -> Dict[str, int]:
+        """Kích thước (byte) của từng blob, lấy bằng một lệnh ``git cat-file --batch-check``."""
+        if not self._entries:
+            return {}
+        request = ''.join(f"{oid}\n" for _, oid in self._entries).encode('ascii')
+        result = subprocess.run(['git', 'cat-file', '--batch-check'], cwd=self.cwd, input=request,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+        if result.returncode != 0:
+            raise GitCommandFailed(['cat-file', '--batch-check'], result.returncode, result.stderr.decode('utf-8', 'replace'))
+        sizes = {}
+        for (path, _), line in zip(self._entries, result.stdout.splitlines()):
+            parts = line.split()
+            sizes[path] = int(parts[2]) if len(parts) >= 3 and parts[1] != b'missing' else 0
+        return sizes
+
+    def iter_contents(self) -> Iterator[Tuple[str, Optional[bytes]]]:
+        """Trả về (đường dẫn, nội dung bytes) theo thứ tự ``paths``; bỏ qua file nhị phân nếu được yêu cầu."""
+        blobs = CatFileBatch(self.cwd).iter_blobs([oid for _, oid in self._entries])
+        for (path, _), data in zip(self._entries, blobs):
+            if self.skip_binary and data is not None and b'\x00' in data[:1024]:
+                continue
+            yield path, data
+
+
+def _parse_ls_output(data: bytes, index_format: bool) -> List[Tuple[str, str]]:
+    entries = []
+    for record in data.split(b'\0'):
+        if not record:
+            continue
+        meta, _, path = record.partition(b'\t')
+        fields = meta.split()
+        if index_format:
+            mode, oid, stage = fields[0], fields[1], fields[2]
+            if stage != b'0':
+                continue  # file đang có xung đột merge
+        else:
+            mode, obj_type, oid = fields[0], fields[1], fields[2]
+            if obj_type != b'blob':
+                continue
+        # Bỏ qua symlink (120000) và submodule (160000), giống khi duyệt working tree.
+        if mode in (b'120000', b'160000'):
+            continue
+        entries.append((os.fsdecode(path).replace('\\', '/'), oid.decode('ascii')))
+    return entries
+
+
+def get_revision_source(t: Any, project_path: str, rev: Optional[str] = None) -> Optional[GitBlobSource]:
+    """
+    Liệt kê các blob của thư mục dự án tại một revision (``git ls-tree -r -z``) hoặc trong
+    index (``git ls-files -s -z`` khi ``rev`` là None).
+
+    Args:
+        t: Đối tượng Translator.
+        project_path: Thư mục dự án (có thể là thư mục con của repo).
+        rev: Revision cần đọc; None để đọc từ index (staging area).
+
+    Returns:
+        GitBlobSource, hoặc None nếu có lỗi.
+    """
+    cwd = str(Path(project_path).resolve())
+    try:
+        if _find_repo_root(cwd) is None:
+            logging.error(t.get('error_git_repo_not_found', path=cwd))
+            return None
+        if rev is None:
+            entries = _parse_ls_output(_run_git(cwd, 'ls-files', '-s', '-z'), index_format=True)
+        else:
+            try:
+                _run_git(cwd, 'rev-parse', '--verify', '--quiet', f'{rev}^{{tree}}')
+            except GitCommandFailed:
+                logging.error(t.get('error_branch_not_found', branch=rev))
+                return None
+            entries = _parse_ls_output(_run_git(cwd, 'ls-tree', '-r', '-z', rev), index_format=False)
+    except FileNotFoundError:
+        logging.error(t.get('error_command_not_found', command='git'))
+        return None
+    except GitCommandFailed as e:
+        logging.error(f"{t.get('error_git_init_failed')}: {e}")
+        return None
+
+    label = rev if rev is not None else 'index'
+    logging.info(t.get('info_git_blob_source', count=len(entries), source=label))
+    return GitBlobSource(cwd, entries, label)
@@ -0,0 +1,172 @@
+"""
+Bộ quy tắc bỏ qua dùng chung cho mọi hàm duyệt cây (tìm file, cây thư mục, scene, watcher).
+
+``IgnoreRules`` gộp hai nguồn:
+
+* ``exclude_dirs`` (``--exclude`` và ``DEFAULT_EXCLUDE_DIRS``): tên thư mục, có thể chứa glob
+  như ``*.egg-info``. Tên cố định được tra trong một ``set``; các glob được gộp thành một regex.
+* ``.gitignore``: thay vì chạy regex của từng pattern như ``GitIgnoreSpec.match_file``, các
+  pattern dạng tên cố định (``node_modules``, ``build/``) và đuôi (``*.log``) được tra bằng
+  ``set``/``str.endswith`` trên từng thành phần của đường dẫn; phần còn lại được gộp thành một
+  regex duy nhất. Khi có pattern phủ định (``!``), bước này chỉ dùng để loại nhanh các đường
+  dẫn không khớp pattern nào; đường dẫn khớp được xét lại đúng theo thứ tự ưu tiên của pathspec.
+
+Kết quả cho thư mục được nhớ lại, nên cùng một thư mục không bị so khớp lại giữa các lần duyệt
+trong cùng một lần chạy.
+"""
+import os
+import re
+import fnmatch
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_GLOB_CHARS = frozenset('*?[')
+# Ký tự khiến một pattern .gitignore không còn là tên cố định hay đuôi đơn giản.
+_SPECIAL_CHARS = frozenset('*?[]\\/!#')
+# Tên nhóm pathspec dùng để đánh dấu khớp theo thư mục (không thể lặp lại trong regex gộp).
+_DIR_MARK_GROUP = '(?P<ps_d>'
+
+
+def _combine(regexes: Iterable[str]) -> Optional['re.Pattern[str]']:
+    parts = [f"(?:{regex.replace(_DIR_MARK_GROUP, '(?:')})" for regex in regexes]
+    return re.compile('|'.join(parts)) if parts else None
+
+
+def _classify(pattern: str) -> Tuple[str, str]:
+    """``('name'|'suffix'|'regex', giá trị)``; ``name``/``suffix`` có thêm ``/`` ở cuối nếu chỉ khớp thư mục."""
+    if pattern.startswith('!'):
+        pattern = pattern[1:]
+    if pattern != pattern.strip():
+        return 'regex', pattern
+    dir_only = pattern.endswith('/')
+    body = pattern[:-1] if dir_only else pattern
+    mark = '/' if dir_only else ''
+    if body and body not in ('.', '..') and not _SPECIAL_CHARS.intersection(body):
+        return 'name', body + mark
+    if body.startswith('*') and len(body) > 1 and not _SPECIAL_CHARS.intersection(body[1:]):
+        return 'suffix', body[1:] + mark
+    return 'regex', pattern
+
+
+class IgnoreRules:
+    """
+    Quy tắc bỏ qua của một dự án.
+
+    Args:
+        exclude_dirs: Tên thư mục cần loại trừ (hỗ trợ glob ``*``, ``?``, ``[...]``).
+        gitignore_spec: ``GitIgnoreSpec`` của dự án, hoặc None.
+    """
+
+    def __init__(self, exclude_dirs: Iterable[str], gitignore_spec: Optional[Any] = None) -> None:
+        exclude_dirs = set(exclude_dirs)
+        self._excluded_names = frozenset(name for name in exclude_dirs if not _GLOB_CHARS.intersection(name))
+        self._excluded_globs = _combine(fnmatch.translate(name) for name in sorted(exclude_dirs - self._excluded_names))
+        self._name_decisions: Dict[str, bool] = {}
+        self._dir_decisions: Dict[str, bool] = {}
+        self._subtree_decisions: Dict[str, bool] = {}
+
+        patterns = [p for p in (gitignore_spec.patterns if gitignore_spec is not None else []) if p.include is not None]
+        self.has_gitignore = gitignore_spec is not None
+        # Không có pattern phủ định: một đường dẫn bị bỏ qua khi khớp bất kỳ pattern nào, và thư
+        # mục bị bỏ qua kéo theo toàn bộ cây con.
+        self.negations = any(not p.include for p in patterns)
+        self._patterns: List[Tuple[bool, 're.Pattern[str]']] = [(p.include, p.regex) for p in patterns]
+        # Bộ lọc "khớp ít nhất một pattern" (kể cả pattern phủ định): tên cố định và đuôi được
+        # tra bằng hash, phần còn lại gộp thành một regex.
+        names, dir_names, suffixes, dir_suffixes, residual = set(), set(), [], [], []
+        for p in patterns:
+            kind, value = _classify(getattr(p, 'pattern', None) or '*/')
+            if kind == 'name':
+                (dir_names if value.endswith('/') else names).add(value.rstrip('/'))
+            elif kind == 'suffix':
+                (dir_suffixes if value.endswith('/') else suffixes).append(value.rstrip('/'))
+            else:
+                residual.append(p.regex.pattern)
+        self._names, self._dir_names = frozenset(names), frozenset(dir_names)
+        self._suffixes, self._dir_suffixes = tuple(suffixes), tuple(dir_suffixes)
+        self._residual = _combine(residual)
+
+    def excludes_dir_name(self, name: str) -> bool:
+        """Thư mục tên ``name`` bị loại trừ theo ``exclude_dirs`` hoặc là thư mục ẩn."""
+        excluded = self._name_decisions.get(name)
+        if excluded is None:
+            excluded = self._name_decisions[name] = (name in self._excluded_names or name.startswith('.')
+                                                     or bool(self._excluded_globs and self._excluded_globs.match(name)))
+        return excluded
+
+    def ignores(self, relative_path: str) -> bool:
+        """Tương đương ``gitignore_spec.match_file(relative_path)`` (đường dẫn tương đối dạng POSIX)."""
+        if not self._matches_any(relative_path):
+            return False
+        return not self.negations or self._ignores_with_negations(relative_path)
+
+    def _matches_any(self, relative_path: str) -> bool:
+        if self._names or self._suffixes or self._dir_names or self._dir_suffixes:
+            parts = relative_path.split('/')
+            names, suffixes = self._names, self._suffixes
+            for part in parts:
+                if part in names or (suffixes and part.endswith(suffixes)):
+                    return True
+            if self._dir_names or self._dir_suffixes:
+                dir_names, dir_suffixes = self._dir_names, self._dir_suffixes
+                for part in parts[:-1]:
+                    if part in dir_names or (dir_suffixes and part.endswith(dir_suffixes)):
+                        return True
+        return bool(self._residual and self._residual.match(relative_path))
+
+    def _ignores_with_negations(self, relative_path: str) -> bool:
+        # Giống pathspec: pattern khớp cuối cùng theo file thắng; nếu chỉ có pattern khớp theo
+        # thư mục thì pattern cuối cùng trong số đó thắng.
+        dir_result = None
+        for include, regex in reversed(self._patterns):
+            match = regex.match(relative_path)
+            if match is None:
+                continue
+            if match.groupdict().get('ps_d'):
+                if dir_result is None:
+                    dir_result = include
+            else:
+                return include
+        return bool(dir_result)
+
+    def ignores_dir(self, relative_dir: str) -> bool:
+        """``ignores`` cho một thư mục, có nhớ kết quả."""
+        ignored = self._dir_decisions.get(relative_dir)
+        if ignored is None:
+            ignored = self._dir_decisions[relative_dir] = self.ignores(relative_dir)
+        return ignored
+
+    def ignores_subtree(self, relative_dir: str) -> bool:
+        """
+        Mọi đường dẫn bên trong ``relative_dir`` đều bị .gitignore bỏ qua, nên có thể bỏ qua cả
+        cây con khi duyệt. Luôn False khi có pattern phủ định (một file bên trong vẫn có thể được
+        giữ lại).
+        """
+        if self.negations or not relative_dir:
+            return False
+        ignored = self._subtree_decisions.get(relative_dir)
+        if ignored is None:
+            ignored = self._subtree_decisions[relative_dir] = self.ignores_dir(relative_dir) or self.ignores(relative_dir + '/')
+        return ignored
+
+
+_loaded: Dict[Tuple[str, frozenset], Tuple[Optional[Tuple[int, int]], IgnoreRules]] = {}
+
+
+def load_ignore_rules(project_root: str, exclude_dirs: Iterable[str]) -> IgnoreRules:
+    """
+    ``IgnoreRules`` của ``project_root`` (đã resolve) với ``exclude_dirs``. Được dùng lại giữa các
+    hàm duyệt cho tới khi file .gitignore thay đổi.
+    """
+    key = (str(project_root), frozenset(exclude_dirs))
+    try:
+        st = os.stat(os.path.join(str(project_root), '.gitignore'))
+        signature: Optional[Tuple[int, int]] = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        signature = None
+    cached = _loaded.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    from .utils import get_gitignore_spec
+    rules = IgnoreRules(key[1], get_gitignore_spec(str(project_root)) if signature is not None else None)
+    _loaded[key] = (signature, rules)
+    return rules
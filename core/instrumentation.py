@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Thống kê của lượt chạy hiện tại; None khi không bật đo đạc. Mọi hàm ghi nhận bên dưới
+# chỉ kiểm tra biến này rồi trả về ngay, nên chi phí khi tắt gần như bằng 0.
+_active: Optional['RunStats'] = None
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('stats', 'name', 'wall', 'cpu')
+
+    def __init__(self, stats: 'RunStats', name: str) -> None:
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stats.add_time(self.name, time.perf_counter() - self.wall, time.process_time() - self.cpu)
+
+
+class RunStats:
+    """
+    Bộ đếm và thời gian theo pha của một lượt chạy.
+
+    Tên pha dùng dấu chấm cho pha con (``discovery.gitignore`` nằm trong ``discovery``).
+    Thời gian CPU là của cả tiến trình trong khoảng thời gian của pha, nên với các pha chạy
+    nhiều luồng nó có thể lớn hơn thời gian thực. Pha con đo trong vòng lặp nóng chỉ ghi
+    thời gian thực.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, List[Any]] = {}  # tên -> [wall, cpu hoặc None, số lần]
+        self.counters: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def phase(self, name: str) -> _Phase:
+        return _Phase(self, name)
+
+    def add_time(self, name: str, wall: float, cpu: Optional[float] = None) -> None:
+        with self._lock:
+            entry = self.phases.get(name)
+            if entry is None:
+                self.phases[name] = [wall, cpu, 1]
+            else:
+                entry[0] += wall
+                entry[1] = None if cpu is None or entry[1] is None else entry[1] + cpu
+                entry[2] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not n:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary_lines(self, t: Any) -> List[str]:
+        total = time.perf_counter() - self.started
+        lines = [t.get('header_timings', seconds=f"{total:.3f}"), "-" * 60]
+        for name in sorted(self.phases):
+            wall, cpu, calls = self.phases[name]
+            parent, _, short_name = name.rpartition('.')
+            # Pha con được thụt lề dưới pha cha; nếu pha cha không được đo thì in tên đầy đủ.
+            label = ("  " * name.count('.') + short_name if parent in self.phases else name).ljust(28)
+            cpu_text = f"{cpu:9.3f} s" if cpu is not None else "        - "
+            lines.append(f"{label}{wall:9.3f} s {cpu_text}  x{calls}")
+        if self.counters:
+            lines.append("-" * 60)
+            for name in sorted(self.counters):
+                lines.append(f"{name.ljust(28)}{self.counters[name]:>12,}")
+        return lines
+
+
+def active() -> Optional[RunStats]:
+    """Trả về ``RunStats`` đang bật, hoặc None."""
+    return _active
+
+
+def phase(name: str) -> Any:
+    """Context manager đo một pha; không làm gì khi đo đạc đang tắt."""
+    stats = _active
+    return stats.phase(name) if stats is not None else _NULL_PHASE
+
+
+def count(name: str, n: int = 1) -> None:
+    stats = _active
+    if stats is not None:
+        stats.count(name, n)
+
+
+def timed(name: str) -> Callable:
+    """Decorator đo toàn bộ một hàm như một pha."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            stats = _active
+            if stats is None:
+                return func(*args, **kwargs)
+            with stats.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_output(path: Any) -> None:
+    """Cộng kích thước của file output đã ghi xong vào bộ đếm ``bytes_written``."""
+    stats = _active
+    if stats is not None:
+        try:
+            stats.count('bytes_written', os.stat(path).st_size)
+        except OSError:
+            pass
+
+
+class _ErrorCounter(logging.Handler):
+    """Đếm số bản ghi log mức ERROR trở lên trong một lượt chạy."""
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.count += 1
+
+
+@contextmanager
+def instrument_run(
+    t: Any,
+    timings: bool = False,
+    profile_path: Optional[str] = None,
+    metrics_path: Optional[str] = None,
+    metrics_format: Optional[str] = None,
+    mode: str = 'bundle',
+    project: str = '.'
+) -> Iterator[Optional[RunStats]]:
+    """
+    Bật đo đạc cho một lượt chạy.
+
+    Args:
+        t: Đối tượng Translator.
+        timings: In bảng thời gian/bộ đếm ra stderr khi kết thúc.
+        profile_path: Nếu có, chạy cProfile và ghi file pstats vào đường dẫn này.
+        metrics_path: Nếu có, ghi metrics của lượt chạy (JSON hoặc Prometheus) vào đây.
+        metrics_format: ``json`` hoặc ``prometheus`` (mặc định: đoán theo đuôi file).
+        mode: Tên chế độ đang chạy, dùng làm nhãn trong metrics.
+        project: Đường dẫn dự án, dùng làm nhãn trong metrics.
+    """
+    global _active
+    stats = RunStats() if (timings or metrics_path) else None
+    started_at = time.time()
+    error_counter = None
+    if metrics_path:
+        error_counter = _ErrorCounter()
+        logging.getLogger().addHandler(error_counter)
+    profiler = None
+    if profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+    previous, _active = _active, stats
+    try:
+        if profiler is not None:
+            profiler.enable()
+        yield stats
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        _active = previous
+        if error_counter is not None:
+            logging.getLogger().removeHandler(error_counter)
+        if stats is not None and timings:
+            print("\n".join(stats.summary_lines(t)), file=sys.stderr)
+        if profiler is not None:
+            try:
+                profiler.dump_stats(profile_path)
+                logging.info(t.get('info_profile_written', path=profile_path))
+            except OSError as e:
+                logging.error(t.get('error_io_error', path=profile_path, error=str(e)))
+        if stats is not None and metrics_path:
+            from .metrics import collect_metrics, write_metrics
+            try:
+                write_metrics(metrics_path, collect_metrics(stats, mode, project, error_counter.count, started_at), metrics_format)
+                logging.info(t.get('info_metrics_written', path=metrics_path))
+            except OSError as e:
+                logging.error(t.get('error_io_error', path=metrics_path, error=str(e)))
@@ -1,68 +1,68 @@
-import logging
-import colorlog
-import os
-from pathlib import Path
-
-def setup_logging(project_path, verbosity=0, quiet=False):
-    """
-    Cấu hình logger cho toàn bộ ứng dụng.
-    Tạo file log riêng cho từng dự án.
-
-    Args:
-        project_path (str): Đường dẫn đến dự án đang chạy để đặt tên file log.
-        verbosity (int): Mức độ chi tiết (0: INFO, 1: DEBUG).
-        quiet (bool): Nếu True, chỉ hiển thị WARNING và các mức cao hơn.
-    """
-    root_logger = logging.getLogger()
-    
-    # Xác định mức log dựa trên tham số
-    if quiet:
-        log_level = logging.WARNING
-    elif verbosity > 0:
-        log_level = logging.DEBUG
-    else:
-        log_level = logging.INFO
-        
-    root_logger.setLevel(log_level)
-
-    # --- Cấu hình cho Console (với màu sắc) ---
-    console_format = (
-        '%(log_color)s%(levelname)-8s%(reset)s '
-        '%(message)s'
-    )
-    console_handler = colorlog.StreamHandler()
-    console_handler.setFormatter(colorlog.ColoredFormatter(console_format))
-    
-    # --- Cấu hình cho File (lưu vào thư mục home với tên dự án) ---
-    try:
-        # Lấy tên của thư mục dự án
-        project_root = Path(project_path).resolve()
-        project_name = project_root.name
-        
-        # Lấy đường dẫn thư mục home của người dùng
-        log_dir = Path.home() / '.export-code' / 'logs'
-        
-        # Tạo thư mục nếu chưa tồn tại
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Tạo đường dẫn file log với tên dự án
-        log_file_path = log_dir / f"{project_name}.log"
-
-        file_format = logging.Formatter('%(asctime)s - %(levelname)-8s - %(message)s')
-        file_handler = logging.FileHandler(str(log_file_path), mode='w', encoding='utf-8')
-        file_handler.setLevel(logging.INFO) # Luôn ghi log từ mức INFO vào file
-        file_handler.setFormatter(file_format)
-        
-        # Xóa các handler cũ và thêm handler mới
-        if root_logger.hasHandlers():
-            root_logger.handlers.clear()
-            
-        root_logger.addHandler(console_handler)
-        root_logger.addHandler(file_handler)
-        
-        logging.debug(f"File log sẽ được ghi tại: {log_file_path}")
-
-    except Exception as e:
-        # Nếu có lỗi khi tạo file log, chỉ dùng console
-        logging.basicConfig(level=log_level)
+import logging
+import colorlog
+import os
+from pathlib import Path
+
+def setup_logging(project_path, verbosity=0, quiet=False):
+    """
+    Cấu hình logger cho toàn bộ ứng dụng.
+    Tạo file log riêng cho từng dự án.
+
+    Args:
+        project_path (str): Đường dẫn đến dự án đang chạy để đặt tên file log.
+        verbosity (int): Mức độ chi tiết (0: INFO, 1: DEBUG).
+        quiet (bool): Nếu True, chỉ hiển thị WARNING và các mức cao hơn.
+    """
+    root_logger = logging.getLogger()
+    
+    # Xác định mức log dựa trên tham số
+    if quiet:
+        log_level = logging.WARNING
+    elif verbosity > 0:
+        log_level = logging.DEBUG
+    else:
+        log_level = logging.INFO
+        
+    root_logger.setLevel(log_level)
+
+    # --- Cấu hình cho Console (với màu sắc) ---
+    console_format = (
+        '%(log_color)s%(levelname)-8s%(reset)s '
+        '%(message)s'
+    )
+    console_handler = colorlog.StreamHandler()
+    console_handler.setFormatter(colorlog.ColoredFormatter(console_format))
+    
+    # --- Cấu hình cho File (lưu vào thư mục home với tên dự án) ---
+    try:
+        # Lấy tên của thư mục dự án
+        project_root = Path(project_path).resolve()
+        project_name = project_root.name
+        
+        # Lấy đường dẫn thư mục home của người dùng
+        log_dir = Path.home() / '.export-code' / 'logs'
+        
+        # Tạo thư mục nếu chưa tồn tại
+        log_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Tạo đường dẫn file log với tên dự án
+        log_file_path = log_dir / f"{project_name}.log"
+
+        file_format = logging.Formatter('%(asctime)s - %(levelname)-8s - %(message)s')
+        file_handler = logging.FileHandler(str(log_file_path), mode='w', encoding='utf-8')
+        file_handler.setLevel(logging.INFO) # Luôn ghi log từ mức INFO vào file
+        file_handler.setFormatter(file_format)
+        
+        # Xóa các handler cũ và thêm handler mới
+        if root_logger.hasHandlers():
+            root_logger.handlers.clear()
+            
+        root_logger.addHandler(console_handler)
+        root_logger.addHandler(file_handler)
+        
+        logging.debug(f"File log sẽ được ghi tại: {log_file_path}")
+
+    except Exception as e:
+        # Nếu có lỗi khi tạo file log, chỉ dùng console
+        logging.basicConfig(level=log_level)
         logging.warning(f"Không thể tạo file log. Lỗi: {e}. Log sẽ chỉ hiển thị trên console.")
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+Manifest băm nội dung từng file, ghi ở cuối bundle.
+
+Mỗi dòng có dạng ``<digest hex> <số byte> <mtime_ns> <đường dẫn>``, theo đúng thứ tự các
+mục trong bundle (``mtime_ns`` là 0 khi không rõ, ví dụ nội dung lấy từ git). Digest được
+tính trên chính các byte nội dung đã ghi vào bundle, nên vừa dùng để kiểm tra bundle còn
+nguyên vẹn (``--verify``), vừa để ``--apply`` nhận ra file trong dự án đã giống hệt bản
+trong bundle chỉ bằng cách băm file đó. Kích thước và ``mtime`` cho phép ``--delta-from``
+bỏ qua file chưa đổi mà không cần đọc lại.
+
+Bundle delta có thêm một phần ngay sau manifest: mỗi dòng ``base <digest> <số byte> <đường dẫn>``
+là nội dung gốc của một file bị sửa, ``delete <digest> <số byte> <đường dẫn>`` là một file bị xóa.
+"""
+import os
+import re
+import hashlib
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Container, Deque, Dict, List, Optional, Tuple, Union
+
+from .bundle_format import (MD_ENTRY_END, TEXT_ENTRY_END, md_duplicate_entry, md_entry_head,
+                            text_duplicate_entry, text_entry_head)
+
+MANIFEST_MARKER = "### EXPORT_CODE_MANIFEST"
+DELTA_MARKER = "### EXPORT_CODE_DELTA"
+HASH_ALGORITHMS = ('sha256', 'blake2b')
+DEFAULT_HASH_ALGORITHM = 'sha256'
+# File nhỏ hơn ngưỡng này được băm ngay trong luồng ghi: chuyển sang thread khác còn tốn hơn
+# chính việc băm. hashlib nhả GIL khi băm, nên các file lớn được băm song song thật sự.
+PARALLEL_HASH_MIN_SIZE = 256 * 1024
+DEFAULT_HASH_WORKERS = min(4, os.cpu_count() or 1)
+_READ_CHUNK_SIZE = 1024 * 1024
+
+_MARKER_PATTERN = re.compile(r"^### EXPORT_CODE_MANIFEST (\w+) ###$")
+_LINE_PATTERN = re.compile(r"^([0-9a-f]+) (\d+) (\d+) (.+)$")
+_DELTA_MARKER_PATTERN = re.compile(r"^### EXPORT_CODE_DELTA (\w+) ###$")
+_DELTA_LINE_PATTERN = re.compile(r"^(base|delete) ([0-9a-f]+) (\d+) (.+)$")
+_MD_OPEN, _MD_CLOSE = b"<!--\n", b"-->\n"
+
+
+def new_hasher(algorithm: str) -> Any:
+    if algorithm == 'blake2b':
+        return hashlib.blake2b(digest_size=32)
+    return hashlib.new(algorithm)
+
+
+def hash_bytes(data: Any, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def entry_line_size(path: str, size: int, algorithm: str = DEFAULT_HASH_ALGORITHM) -> int:
+    """Số byte của dòng manifest cho một file (dùng khi chia shard theo dung lượng)."""
+    # mtime_ns được tính theo độ dài lớn nhất (19 chữ số) vì lúc chia shard chưa đọc file.
+    return len(hash_bytes(b"", algorithm)) + len(str(size)) + 19 + len(path.encode('utf-8')) + 4
+
+
+def hash_file(path: Union[str, os.PathLike], algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """Băm một file theo từng khối, không đọc cả file vào bộ nhớ."""
+    hasher = new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ManifestBuilder:
+    """
+    Gom digest của các file theo thứ tự ghi vào bundle.
+
+    File từ ``PARALLEL_HASH_MIN_SIZE`` byte trở lên được băm trong ``workers`` thread trong
+    khi luồng chính tiếp tục đọc và ghi; số file lớn đang chờ băm được giới hạn để bộ nhớ
+    giữ nội dung không tăng mãi.
+
+    ``mtimes`` được bước đọc file điền vào (đường dẫn -> ``st_mtime_ns``); ``delta`` (nếu có)
+    là kết quả của ``delta.plan_delta`` và được ghi thành phần delta sau manifest.
+    """
+
+    def __init__(self, algorithm: str = DEFAULT_HASH_ALGORITHM, workers: int = DEFAULT_HASH_WORKERS) -> None:
+        self.algorithm = algorithm
+        self.workers = workers
+        self.mtimes: Dict[str, int] = {}
+        self.delta: Optional[Dict[str, Any]] = None
+        self._entries: List[Tuple[str, int, Union[str, Future]]] = []
+        self._digests: Dict[str, Union[str, Future]] = {}
+        self._pending: Deque[Future] = deque()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def add(self, path: str, data: bytes) -> None:
+        if len(data) < PARALLEL_HASH_MIN_SIZE or self.workers <= 1:
+            digest: Union[str, Future] = hash_bytes(data, self.algorithm)
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            digest = self._executor.submit(hash_bytes, data, self.algorithm)
+            self._pending.append(digest)
+            while len(self._pending) > 2 * self.workers:
+                self._pending.popleft().result()
+        self._entries.append((path, len(data), digest))
+        self._digests[path] = digest
+
+    def add_duplicate(self, path: str, original_path: str, size: int) -> None:
+        """Thêm một file ghi dưới dạng tham chiếu: dùng lại digest của file gốc, không băm lại."""
+        digest = self._digests[original_path]
+        self._entries.append((path, size, digest))
+        self._digests[path] = digest
+
+    def render(self, output_format: str = 'txt') -> bytes:
+        """Phần manifest ghi ở cuối bundle; với markdown nó nằm trong một chú thích HTML."""
+        lines = [f"{MANIFEST_MARKER} {self.algorithm} ###"]
+        for path, size, digest in self._entries:
+            lines.append(f"{digest if isinstance(digest, str) else digest.result()} {size} {self.mtimes.get(path, 0)} {path}")
+        if self.delta is not None:
+            lines.append(f"{DELTA_MARKER} {self.algorithm} ###")
+            for kind, key in (('base', 'modified'), ('delete', 'deleted')):
+                for path, (digest, size) in sorted(self.delta[key].items()):
+                    lines.append(f"{kind} {digest} {size} {path}")
+        data = ("\n".join(lines) + "\n").encode('utf-8')
+        return _MD_OPEN + data + _MD_CLOSE if output_format == 'md' else data
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def read_manifest(data: bytes) -> Tuple[int, Optional[Dict[str, Any]]]:
+    """
+    Tìm manifest ở cuối nội dung bundle. Chỉ nhận là manifest khi mọi dòng từ marker tới hết
+    bundle đều là dòng manifest hoặc dòng delta.
+
+    Returns:
+        ``(vị trí kết thúc phần nội dung, manifest hoặc None)``. Manifest là dict
+        ``{'algorithm': str, 'files': {đường dẫn: (digest, số byte, mtime_ns)}, 'delta': ...}``
+        theo thứ tự bundle; ``delta`` là None với bundle đầy đủ, hoặc
+        ``{'modified': {đường dẫn: (digest, số byte)}, 'deleted': {...}}`` với bundle delta.
+    """
+    index = data.rfind(MANIFEST_MARKER.encode('utf-8'))
+    if index < 0 or (index > 0 and data[index - 1:index] != b"\n"):
+        return len(data), None
+    lines = data[index:].decode('utf-8', 'surrogateescape').splitlines()
+    marker = _MARKER_PATTERN.match(lines[0])
+    commented = data[:index].endswith(_MD_OPEN)
+    if commented and lines[-1] == _MD_CLOSE.decode('ascii').rstrip("\n"):
+        lines.pop()
+    if marker is None:
+        return len(data), None
+    files: Dict[str, Tuple[str, int, int]] = {}
+    delta: Optional[Dict[str, Dict[str, Tuple[str, int]]]] = None
+    for line in lines[1:]:
+        match = _LINE_PATTERN.match(line)
+        if match is not None and delta is None:
+            files[match.group(4)] = (match.group(1), int(match.group(2)), int(match.group(3)))
+            continue
+        if delta is None and _DELTA_MARKER_PATTERN.match(line):
+            delta = {'modified': {}, 'deleted': {}}
+            continue
+        match = _DELTA_LINE_PATTERN.match(line) if delta is not None else None
+        if match is None:
+            # Dòng bắt đầu bằng marker chỉ là một phần nội dung file (ví dụ bundle tạo với
+            # ``--no-manifest`` chứa tài liệu nhắc tới định dạng manifest), không phải manifest.
+            return len(data), None
+        delta['modified' if match.group(1) == 'base' else 'deleted'][match.group(4)] = (match.group(2), int(match.group(3)))
+    if commented:
+        index -= len(_MD_OPEN)
+    return index, {'algorithm': marker.group(1), 'files': files, 'delta': delta}
+
+
+def _find_entry(data: bytes, pos: int, candidates: List[bytes]) -> Tuple[int, Optional[bytes]]:
+    """Tìm mục tiếp theo: ưu tiên đúng vị trí ``pos`` (các mục nằm liền nhau), nếu không thì tìm về sau."""
+    for candidate in candidates:
+        if data.startswith(candidate, pos):
+            return pos, candidate
+    found = [(data.find(candidate, pos), candidate) for candidate in candidates]
+    found = [(index, candidate) for index, candidate in found if index >= 0]
+    return min(found, key=lambda item: item[0]) if found else (-1, None)
+
+
+def verify_entries(data: bytes, manifest: Dict[str, Any], paths: Optional[Container[str]] = None) -> Dict[str, str]:
+    """
+    Đối chiếu từng mục trong bundle với manifest, dựa trên số byte ghi trong manifest để cắt
+    đúng nội dung đã băm.
+
+    Args:
+        data: Toàn bộ nội dung bundle (đã giải nén).
+        manifest: Kết quả của ``read_manifest``.
+        paths: Nếu có, chỉ băm lại các file này; các file khác chỉ được định vị (``'unchecked'``).
+
+    Returns:
+        ``{đường dẫn: 'ok' | 'mismatch' | 'missing' | 'unchecked'}``.
+    """
+    algorithm = manifest['algorithm']
+    files = manifest['files']
+    results: Dict[str, str] = {}
+    unchecked: Dict[str, Tuple[int, int]] = {}
+    view = memoryview(data)
+    pos = 0
+    for path, (digest, size, _) in files.items():
+        full = {text_entry_head(path): TEXT_ENTRY_END, md_entry_head(path): MD_ENTRY_END}
+        duplicates = {f"--- FILE: {path} (same as ".encode('utf-8'): (b") ---\n", text_duplicate_entry),
+                      f"<details>\n<summary><code>{path}</code> (same as <code>".encode('utf-8'): (b"</code>)</summary>", md_duplicate_entry)}
+        index, head = _find_entry(data, pos, list(full) + list(duplicates))
+        if head is None:
+            results[path] = 'missing'
+            continue
+        if head in full:
+            start = index + len(head)
+            end = start + size
+            entry_end = full[head]
+            if not data.startswith(entry_end, end):
+                results[path] = 'mismatch'
+                pos = start
+            elif paths is not None and path not in paths:
+                results[path] = 'unchecked'
+                unchecked[path] = (start, end)
+                pos = end + len(entry_end)
+            elif hash_bytes(view[start:end], algorithm) == digest:
+                results[path] = 'ok'
+                pos = end + len(entry_end)
+            else:
+                results[path] = 'mismatch'
+                pos = start
+            continue
+        # Mục tham chiếu: hợp lệ khi file gốc đã khớp và có cùng digest.
+        terminator, render_entry = duplicates[head]
+        start = index + len(head)
+        stop = data.find(terminator, start)
+        original_path = data[start:stop].decode('utf-8', 'surrogateescape') if stop >= 0 else None
+        entry = render_entry(path, original_path) if original_path is not None else None
+        if entry is not None and data.startswith(entry, index) and original_path in files and files[original_path][0] == digest:
+            if results.get(original_path) == 'unchecked' and (paths is None or path in paths):
+                # Cần kết quả của file gốc: băm lại nó lúc này.
+                original_start, original_end = unchecked[original_path]
+                matches = hash_bytes(view[original_start:original_end], algorithm) == digest
+                results[original_path] = 'ok' if matches else 'mismatch'
+            status = results.get(original_path)
+            results[path] = status if status in ('ok', 'unchecked') else 'mismatch'
+            pos = index + len(entry)
+        else:
+            results[path] = 'mismatch'
+            pos = start
+    return results
+
+
+def verify_bundle(t: Any, bundle_path: str) -> bool:
+    """
+    Kiểm tra bundle còn nguyên vẹn so với manifest ở cuối bundle (``--verify``).
+
+    Returns:
+        True nếu mọi file trong manifest đều khớp.
+    """
+    from pathlib import Path
+    from .compression import open_binary_reader
+    if not Path(bundle_path).exists():
+        logging.error(t.get('error_file_not_found', path=bundle_path))
+        return False
+    try:
+        with open_binary_reader(bundle_path) as f:
+            data = f.read()
+    except OSError as e:
+        logging.error(t.get('error_io_error', path=bundle_path, error=str(e)))
+        return False
+    _, manifest = read_manifest(data)
+    if manifest is None or not manifest['files']:
+        logging.error(t.get('error_verify_no_manifest', path=bundle_path))
+        return False
+    results = verify_entries(data, manifest)
+    bad = [(path, status) for path, status in results.items() if status != 'ok']
+    for path, status in bad:
+        logging.error(t.get(f'error_verify_{status}', path=path))
+    if bad:
+        logging.error(t.get('error_verify_failed', bad=len(bad), total=len(results)))
+        return False
+    logging.info(t.get('info_verify_ok', count=len(results), algorithm=manifest['algorithm']))
+    return True
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import time
+import re
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+
+METRICS_VERSION = 1
+METRIC_PREFIX = 'export_code'
+
+# Các cặp bộ đếm (hit, miss) được quy đổi thành tỉ lệ trúng cache.
+CACHE_COUNTERS = {
+    'quality': ('quality.files_cached', 'quality.files_run'),
+}
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Bộ nhớ RSS lớn nhất của tiến trình (byte), hoặc None nếu hệ điều hành không hỗ trợ."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KiB, macOS trả về byte.
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+def infer_format(path: str) -> str:
+    return 'prometheus' if Path(path).suffix == '.prom' else 'json'
+
+
+def collect_metrics(stats: Any, mode: str, project: str, errors: int, started_at: float) -> Dict[str, Any]:
+    """
+    Gom thống kê của một lượt chạy thành dict metrics.
+
+    Args:
+        stats: ``instrumentation.RunStats`` của lượt chạy.
+        mode: Chế độ đã chạy (``bundle``, ``apply``, ``stats``, ...).
+        project: Đường dẫn dự án.
+        errors: Số bản ghi log mức ERROR trong lượt chạy.
+        started_at: Thời điểm bắt đầu (epoch, giây).
+    """
+    counters = dict(stats.counters)
+    caches = {}
+    for cache_name, (hit_key, miss_key) in CACHE_COUNTERS.items():
+        hits, misses = counters.get(hit_key, 0), counters.get(miss_key, 0)
+        if hits or misses:
+            caches[cache_name] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses)}
+    return {
+        'version': METRICS_VERSION,
+        'mode': mode,
+        'project': str(Path(project).resolve()),
+        'started_at': started_at,
+        'duration_seconds': time.perf_counter() - stats.started,
+        'phases': {name: {'wall_seconds': wall, 'cpu_seconds': cpu, 'calls': calls}
+                   for name, (wall, cpu, calls) in sorted(stats.phases.items())},
+        'counters': dict(sorted(counters.items())),
+        'caches': caches,
+        'errors': errors,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(metrics: Dict[str, Any]) -> str:
+    """Chuyển metrics sang định dạng text của Prometheus (dùng cho textfile collector)."""
+    base_labels = f'mode="{_label_value(metrics["mode"])}",project="{_label_value(metrics["project"])}"'
+    lines: List[str] = []
+
+    def gauge(name: str, help_text: str, samples: List[Any]) -> None:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} gauge")
+        for labels, value in samples:
+            label_text = base_labels + (f",{labels}" if labels else "")
+            lines.append(f"{full_name}{{{label_text}}} {value}")
+
+    gauge('last_run_timestamp_seconds', 'Start time of the last run.', [("", f"{metrics['started_at']:.3f}")])
+    gauge('run_duration_seconds', 'Wall time of the last run.', [("", f"{metrics['duration_seconds']:.6f}")])
+    gauge('phase_wall_seconds', 'Wall time spent in each phase.',
+          [(f'phase="{_label_value(name)}"', f"{phase['wall_seconds']:.6f}") for name, phase in metrics['phases'].items()])
+    gauge('phase_cpu_seconds', 'Process CPU time spent in each phase.',
+          [(f'phase="{_label_value(name)}"', None if phase['cpu_seconds'] is None else f"{phase['cpu_seconds']:.6f}")
+           for name, phase in metrics['phases'].items()])
+    for name, value in metrics['counters'].items():
+        gauge(_metric_name(name), f"Counter '{name}' of the last run.", [("", value)])
+    gauge('cache_hit_ratio', 'Cache hit ratio of the last run.',
+          [(f'cache="{_label_value(name)}"', f"{cache['hit_rate']:.6f}") for name, cache in metrics['caches'].items()])
+    gauge('errors', 'Number of errors logged during the last run.', [("", metrics['errors'])])
+    gauge('peak_rss_bytes', 'Peak resident set size of the process.', [("", metrics['peak_rss_bytes'])])
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str, metrics: Dict[str, Any], output_format: Optional[str] = None) -> None:
+    """
+    Ghi metrics ra file (JSON hoặc Prometheus text), ghi file tạm rồi thay thế để bộ thu
+    thập không bao giờ đọc phải file đang ghi dở.
+    """
+    output_format = output_format or infer_format(path)
+    if output_format == 'prometheus':
+        content = render_prometheus(metrics)
+    else:
+        content = json.dumps(metrics, indent=2) + "\n"
+    target = Path(path)
+    if target.parent and not target.parent.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + '.tmp')
+    with tmp_path.open('w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(str(tmp_path), str(target))
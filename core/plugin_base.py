@@ -1,26 +1,50 @@
-import argparse
-from abc import ABC, abstractmethod
-
-
-class ExportCodePlugin(ABC):
-    """Lớp cơ sở cho tất cả plugin của export-code."""
-
-    @property
-    @abstractmethod
-    def command(self) -> str:
-        """Tên cờ lệnh chính mà plugin sử dụng, ví dụ: ``--my-tool``."""
-        raise NotImplementedError
-
-    @abstractmethod
-    def register_command(self, parser: argparse.ArgumentParser):
-        """Thêm các tham số dòng lệnh của plugin vào ``parser``."""
-        raise NotImplementedError
-
-    @abstractmethod
-    def execute(self, args: argparse.Namespace, t: 'Translator'):
-        """Thực thi logic chính của plugin khi cờ tương ứng được kích hoạt."""
-        raise NotImplementedError
-
-    def arg_dest(self) -> str:
-        """Trả về tên thuộc tính trong ``args`` tương ứng với cờ ``command``."""
-        return self.command.lstrip('-').replace('-', '_')
+import argparse
+from abc import ABC, abstractmethod
+
+
+class ExportCodePlugin(ABC):
+    """Lớp cơ sở cho tất cả plugin của export-code."""
+
+    #: Đặt ``True`` nếu ``on_file`` có thể được gọi đồng thời từ nhiều luồng đọc file.
+    parallel_safe: bool = False
+
+    @property
+    @abstractmethod
+    def command(self) -> str:
+        """Tên cờ lệnh chính mà plugin sử dụng, ví dụ: ``--my-tool``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def register_command(self, parser: argparse.ArgumentParser):
+        """Thêm các tham số dòng lệnh của plugin vào ``parser``."""
+        raise NotImplementedError
+
+    def execute(self, args: argparse.Namespace, t: 'Translator'):
+        """
+        Thực thi logic chính của plugin khi cờ tương ứng được kích hoạt.
+
+        Plugin chỉ dùng các hook theo file (``on_file``/``finalize``) không cần override
+        hàm này: core sẽ gọi các hook đó trong lượt đọc file chung thay vì ``execute``.
+        """
+        raise NotImplementedError
+
+    def begin(self, args: argparse.Namespace, t: 'Translator') -> None:
+        """Hook tùy chọn, được gọi một lần trước lượt đọc file chung."""
+
+    def on_file(self, path: str, content: str) -> None:
+        """
+        Hook tùy chọn, được gọi với mỗi file trong lượt đọc chung.
+
+        ``path`` là đường dẫn tương đối (dạng posix) so với thư mục dự án.
+        """
+
+    def finalize(self) -> None:
+        """Hook tùy chọn, được gọi một lần sau khi mọi file đã được đưa qua ``on_file``."""
+
+    def uses_file_hooks(self) -> bool:
+        """Trả về True nếu plugin override ``on_file`` và muốn tham gia lượt đọc chung."""
+        return type(self).on_file is not ExportCodePlugin.on_file
+
+    def arg_dest(self) -> str:
+        """Trả về tên thuộc tính trong ``args`` tương ứng với cờ ``command``."""
+        return self.command.lstrip('-').replace('-', '_')
@@ -1,48 +1,269 @@
-import os
-import importlib.util
-import inspect
-import logging
-from typing import List, Optional
-from pathlib import Path
-from .plugin_base import ExportCodePlugin
-
-def load_plugins(plugin_dir: Optional[str] = None) -> List[ExportCodePlugin]:
-    """
-    Quét một thư mục, tự động tải các plugin và trả về một danh sách các instance.
-    """
-    if not plugin_dir:
-        plugin_dir_path = Path.home() / '.export-code' / 'plugins'
-    else:
-        plugin_dir_path = Path(plugin_dir)
-
-    plugins: List[ExportCodePlugin] = []
-    
-    if not plugin_dir_path.is_dir():
-        logging.debug(f"Thư mục plugin '{plugin_dir_path}' không tồn tại. Bỏ qua việc tải plugin ngoài.")
-        return plugins
-
-    logging.info(f"🔍 Đang quét plugin trong: {plugin_dir_path}")
-    for filename in os.listdir(str(plugin_dir_path)):
-        if filename.endswith('.py') and not filename.startswith('_'):
-            module_name = filename[:-3]
-            file_path = plugin_dir_path / filename
-            
-            try:
-                # Tải module động từ đường dẫn file
-                spec = importlib.util.spec_from_file_location(module_name, file_path)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-
-                # Tìm tất cả các class trong module vừa tải
-                for name, obj in inspect.getmembers(module, inspect.isclass):
-                    # Kiểm tra xem class có phải là con của ExportCodePlugin không
-                    # và không phải chính class ExportCodePlugin
-                    if issubclass(obj, ExportCodePlugin) and obj is not ExportCodePlugin:
-                        plugin_instance = obj() # Tạo một instance của class plugin
-                        plugins.append(plugin_instance)
-                        logging.info(f"   -> Đã tải thành công plugin: '{plugin_instance.command}'")
-
-            except Exception as e:
-                logging.error(f"   -> ❌ Lỗi khi tải plugin từ file '{filename}': {e}", exc_info=True)
-
-    return plugins
+import os
+import json
+import hashlib
+import argparse
+import importlib.util
+import inspect
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+from .plugin_base import ExportCodePlugin
+
+MANIFEST_VERSION = 2
+MANIFEST_FILENAME = '.plugin-manifest.json'
+
+# Các hàm `type=` được phép lưu vào manifest (theo tên); callable khác khiến plugin không thể cache.
+_SERIALIZABLE_TYPES = {'int': int, 'float': float, 'str': str}
+
+
+class _UncacheableRegistration(Exception):
+    """Plugin đăng ký tham số theo cách không thể ghi lại vào manifest."""
+
+
+class _RecordingParser:
+    """
+    Parser giả chỉ hỗ trợ ``add_argument`` để ghi lại đặc tả tham số của plugin.
+
+    Mỗi lời gọi vẫn được chuyển cho một ``ArgumentParser`` thật để kiểm tra tính hợp lệ.
+    Mọi API khác (nhóm tham số, subparser, ...) làm plugin bị đánh dấu là không thể cache.
+    """
+
+    def __init__(self) -> None:
+        self.calls: List[Tuple[List[Any], Dict[str, Any]]] = []
+        self._parser = argparse.ArgumentParser(add_help=False)
+
+    def add_argument(self, *args: Any, **kwargs: Any) -> argparse.Action:
+        action = self._parser.add_argument(*args, **kwargs)
+        self.calls.append((list(args), _encode_kwargs(kwargs)))
+        return action
+
+    def __getattr__(self, name: str) -> Any:
+        raise _UncacheableRegistration(name)
+
+
+def _encode_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    encoded = dict(kwargs)
+    arg_type = encoded.get('type')
+    if arg_type is not None:
+        type_name = getattr(arg_type, '__name__', None)
+        if _SERIALIZABLE_TYPES.get(type_name) is not arg_type:
+            raise _UncacheableRegistration(f"type={arg_type!r}")
+        encoded['type'] = {'__type__': type_name}
+    try:
+        json.dumps(encoded)
+    except (TypeError, ValueError) as e:
+        raise _UncacheableRegistration(str(e))
+    return encoded
+
+
+def _decode_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    decoded = dict(kwargs)
+    if isinstance(decoded.get('type'), dict):
+        decoded['type'] = _SERIALIZABLE_TYPES[decoded['type']['__type__']]
+    return decoded
+
+
+def _file_digest(file_path: Path) -> str:
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+def _exec_plugin_module(module_name: str, file_path: Path) -> Any:
+    """Tải module động từ đường dẫn file."""
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _plugin_classes(module: Any) -> List[type]:
+    # Tìm tất cả các class là con của ExportCodePlugin (và không phải chính ExportCodePlugin)
+    return [obj for _, obj in inspect.getmembers(module, inspect.isclass)
+            if issubclass(obj, ExportCodePlugin) and obj is not ExportCodePlugin]
+
+
+class ManifestPlugin(ExportCodePlugin):
+    """
+    Plugin đại diện được dựng từ manifest cache.
+
+    Đăng ký cờ lệnh mà không cần import module của plugin; module chỉ được nạp khi
+    ``execute`` (hoặc một thuộc tính riêng của plugin) thực sự được dùng tới.
+    """
+
+    def __init__(self, file_path: Path, module_name: str, entry: Dict[str, Any]) -> None:
+        self._file_path = file_path
+        self._module_name = module_name
+        self._entry = entry
+        self._instance: Optional[ExportCodePlugin] = None
+
+    @property
+    def command(self) -> str:
+        return self._entry['command']
+
+    def register_command(self, parser: argparse.ArgumentParser):
+        for args, kwargs in self._entry['arguments']:
+            parser.add_argument(*args, **_decode_kwargs(kwargs))
+
+    def execute(self, args: argparse.Namespace, t: 'Translator'):
+        return self.load().execute(args, t)
+
+    def arg_dest(self) -> str:
+        return self._entry.get('dest') or super().arg_dest()
+
+    @property
+    def parallel_safe(self) -> bool:
+        return self._entry.get('parallel_safe', False)
+
+    def uses_file_hooks(self) -> bool:
+        return self._entry.get('file_hooks', False)
+
+    def begin(self, args: argparse.Namespace, t: 'Translator') -> None:
+        self.load().begin(args, t)
+
+    def on_file(self, path: str, content: str) -> None:
+        self.load().on_file(path, content)
+
+    def finalize(self) -> None:
+        self.load().finalize()
+
+    def load(self) -> ExportCodePlugin:
+        """Import module của plugin (một lần) và trả về instance thật."""
+        if self._instance is None:
+            logging.debug(f"Đang import plugin '{self.command}' từ {self._file_path}")
+            module = _exec_plugin_module(self._module_name, self._file_path)
+            for cls in _plugin_classes(module):
+                if cls.__name__ == self._entry['class']:
+                    self._instance = cls()
+                    break
+            else:
+                raise ImportError(f"Plugin class '{self._entry['class']}' not found in {self._file_path}")
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+def _describe_plugin(plugin: ExportCodePlugin) -> Optional[Dict[str, Any]]:
+    """Ghi lại đặc tả tham số của một plugin; trả về None nếu không thể cache."""
+    recorder = _RecordingParser()
+    try:
+        plugin.register_command(recorder)
+    except Exception as e:
+        # Lỗi đăng ký thật sự sẽ được báo lại khi main() đăng ký plugin vào parser chính.
+        logging.debug(f"Plugin '{plugin.command}' không thể cache manifest ({e}).")
+        return None
+    return {
+        'class': type(plugin).__name__,
+        'command': plugin.command,
+        'dest': plugin.arg_dest(),
+        'file_hooks': plugin.uses_file_hooks(),
+        'parallel_safe': bool(plugin.parallel_safe),
+        'arguments': recorder.calls,
+    }
+
+
+def _load_manifest(manifest_path: Path) -> Dict[str, Any]:
+    try:
+        with manifest_path.open('r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {'version': MANIFEST_VERSION, 'files': {}}
+
+
+def _save_manifest(manifest_path: Path, manifest: Dict[str, Any]) -> None:
+    try:
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(str(tmp_path), str(manifest_path))
+    except OSError as e:
+        logging.debug(f"Không thể ghi manifest plugin '{manifest_path}': {e}")
+
+
+def _is_entry_fresh(entry: Optional[Dict[str, Any]], file_path: Path, stat: os.stat_result) -> bool:
+    """Kiểm tra manifest còn hợp lệ: so mtime/size trước, chỉ băm nội dung khi chúng khác."""
+    if not entry or not entry.get('cacheable'):
+        return False
+    if entry.get('mtime_ns') == stat.st_mtime_ns and entry.get('size') == stat.st_size:
+        return True
+    if entry.get('sha256') == _file_digest(file_path):
+        entry['mtime_ns'], entry['size'] = stat.st_mtime_ns, stat.st_size
+        return True
+    return False
+
+
+def load_plugins(plugin_dir: Optional[str] = None, manifest_path: Optional[str] = None) -> List[ExportCodePlugin]:
+    """
+    Quét một thư mục, tự động tải các plugin và trả về một danh sách các instance.
+
+    Đặc tả cờ lệnh của từng plugin được lưu trong một manifest (mặc định là
+    ``<plugin_dir>/.plugin-manifest.json``). Khi file plugin không đổi (theo mtime/size,
+    hoặc SHA-256 nếu mtime thay đổi), plugin được trả về dưới dạng ``ManifestPlugin`` và
+    module của nó chỉ được import khi cờ tương ứng thực sự được dùng.
+    """
+    if not plugin_dir:
+        plugin_dir_path = Path.home() / '.export-code' / 'plugins'
+    else:
+        plugin_dir_path = Path(plugin_dir)
+
+    plugins: List[ExportCodePlugin] = []
+
+    if not plugin_dir_path.is_dir():
+        logging.debug(f"Thư mục plugin '{plugin_dir_path}' không tồn tại. Bỏ qua việc tải plugin ngoài.")
+        return plugins
+
+    manifest_file = Path(manifest_path) if manifest_path else plugin_dir_path / MANIFEST_FILENAME
+    manifest = _load_manifest(manifest_file)
+    cached_files = manifest['files']
+    fresh_files: Dict[str, Any] = {}
+    manifest_changed = False
+
+    logging.info(f"🔍 Đang quét plugin trong: {plugin_dir_path}")
+    for filename in sorted(os.listdir(str(plugin_dir_path))):
+        if filename.endswith('.py') and not filename.startswith('_'):
+            module_name = filename[:-3]
+            file_path = plugin_dir_path / filename
+
+            try:
+                stat = file_path.stat()
+                entry = cached_files.get(filename)
+                cached_stat = (entry.get('mtime_ns'), entry.get('size')) if entry else None
+                if _is_entry_fresh(entry, file_path, stat):
+                    fresh_files[filename] = entry
+                    manifest_changed = manifest_changed or cached_stat != (stat.st_mtime_ns, stat.st_size)
+                    for plugin_entry in entry['plugins']:
+                        plugins.append(ManifestPlugin(file_path, module_name, plugin_entry))
+                        logging.debug(f"   -> Đã nạp plugin '{plugin_entry['command']}' từ manifest")
+                    continue
+
+                module = _exec_plugin_module(module_name, file_path)
+                descriptions, cacheable = [], True
+                for obj in _plugin_classes(module):
+                    plugin_instance = obj() # Tạo một instance của class plugin
+                    plugins.append(plugin_instance)
+                    logging.info(f"   -> Đã tải thành công plugin: '{plugin_instance.command}'")
+                    description = _describe_plugin(plugin_instance)
+                    cacheable = cacheable and description is not None
+                    descriptions.append(description)
+
+                fresh_files[filename] = {
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'sha256': _file_digest(file_path),
+                    'cacheable': cacheable,
+                    'plugins': descriptions if cacheable else [],
+                }
+                manifest_changed = True
+
+            except Exception as e:
+                logging.error(f"   -> ❌ Lỗi khi tải plugin từ file '{filename}': {e}", exc_info=True)
+
+    if manifest_changed or set(fresh_files) != set(cached_files):
+        manifest['files'] = fresh_files
+        _save_manifest(manifest_file, manifest)
+
+    return plugins
@@ -0,0 +1,107 @@
+"""
+Tìm file trước trong nền cho chế độ tương tác.
+
+Trong lúc người dùng còn trả lời các câu hỏi (hành động, nguồn file, profile, ...),
+``DiscoveryPrefetch`` duyệt dự án một lần để lấy mọi file không bị loại trừ (``snapshot``),
+rồi đọc trước nội dung các file văn bản để hệ điều hành giữ chúng trong page cache. Khi có đủ
+câu trả lời, ``files`` chỉ việc lọc snapshot theo đuôi file hoặc theo kết quả kiểm tra file
+văn bản đã làm sẵn, thay vì duyệt lại cả cây.
+"""
+import logging
+import threading
+from array import array
+from typing import List, Optional, Set
+
+from .file_index import FileIndex
+from .utils import find_file_index, is_text_file
+
+# Tổng số byte tối đa được đọc trước vào page cache.
+DEFAULT_WARM_BYTES = 256 * 1024 * 1024
+# Số byte đầu file dùng để nhận biết file văn bản, giống ``is_text_file``.
+SNIFF_BYTES = 1024
+_READ_CHUNK = 1024 * 1024
+# ``str.endswith('')`` luôn đúng: snapshot gồm mọi file không bị loại trừ.
+_ALL_NAMES = ['']
+_UNKNOWN, _BINARY, _TEXT = -1, 0, 1
+
+
+class DiscoveryPrefetch:
+    """
+    Luồng nền tìm file và làm nóng page cache cho một dự án.
+
+    Args:
+        project_path: Thư mục gốc của dự án.
+        exclude_dirs: Các thư mục cần loại trừ (như ``find_project_files``).
+        warm_bytes: Giới hạn số byte đọc trước; 0 để chỉ tìm file.
+    """
+
+    def __init__(self, project_path: str, exclude_dirs: Set[str], warm_bytes: int = DEFAULT_WARM_BYTES) -> None:
+        self.project_path = project_path
+        self.exclude_dirs = set(exclude_dirs)
+        self.warm_bytes = warm_bytes
+        self.snapshot: Optional[FileIndex] = None
+        self.bytes_warmed = 0
+        self._text = array('b')
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='export-code-prefetch', daemon=True)
+
+    def start(self) -> 'DiscoveryPrefetch':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Dừng việc đọc trước (snapshot đã có vẫn dùng được)."""
+        self._stop.set()
+
+    def _run(self) -> None:
+        try:
+            snapshot = find_file_index(self.project_path, self.exclude_dirs, False, _ALL_NAMES)
+        except Exception as e:
+            logging.debug(f"Không thể tìm file trước trong nền: {e}")
+            self._ready.set()
+            return
+        self._text = array('b', [_UNKNOWN]) * len(snapshot)
+        self.snapshot = snapshot
+        self._ready.set()
+        self._warm(snapshot)
+
+    def _warm(self, snapshot: FileIndex) -> None:
+        buffer = bytearray(_READ_CHUNK)
+        view = memoryview(buffer)
+        for position, path in enumerate(snapshot.paths()):
+            if self._stop.is_set() or self.bytes_warmed >= self.warm_bytes:
+                return
+            try:
+                with open(path, 'rb', buffering=0) as f:
+                    n = f.readinto(view[:SNIFF_BYTES])
+                    if n and buffer.find(b'\x00', 0, n) >= 0:
+                        # File nhị phân không được bundle nên không cần đọc tiếp.
+                        self._text[position] = _BINARY
+                        continue
+                    self._text[position] = _TEXT
+                    self.bytes_warmed += n
+                    while n and not self._stop.is_set() and self.bytes_warmed < self.warm_bytes:
+                        n = f.readinto(view)
+                        self.bytes_warmed += n
+            except OSError:
+                self._text[position] = _BINARY
+
+    def files(self, use_all_text_files: bool, extensions: List[str]) -> FileIndex:
+        """
+        Các file được chọn, cùng kết quả và thứ tự với ``find_file_index`` với cùng tham số. Chờ
+        luồng nền tìm xong nếu cần, rồi dừng việc đọc trước để không tranh I/O với lượt chạy chính.
+        """
+        self._ready.wait()
+        self.stop()
+        snapshot = self.snapshot
+        if snapshot is None:
+            return find_file_index(self.project_path, self.exclude_dirs, use_all_text_files, extensions)
+        if use_all_text_files:
+            text = self._text
+            keep = [position for position, path in enumerate(snapshot.paths())
+                    if text[position] == _TEXT or (text[position] == _UNKNOWN and is_text_file(path))]
+        else:
+            suffixes = tuple(extensions)
+            keep = [position for position, name in enumerate(snapshot.names()) if name.endswith(suffixes)]
+        return snapshot.select(keep)
@@ -0,0 +1,141 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+
+CACHE_VERSION = 1
+
+# Các file cấu hình có thể làm thay đổi kết quả của formatter/linter. Chúng được băm cùng
+# với câu lệnh, nên sửa cấu hình sẽ làm toàn bộ bản ghi của công cụ đó mất hiệu lực.
+TOOL_CONFIG_FILES = [
+    'package.json', '.editorconfig',
+    '.prettierrc', '.prettierrc.json', '.prettierrc.js', '.prettierrc.cjs', '.prettierrc.yml', '.prettierrc.yaml',
+    'prettier.config.js', 'prettier.config.cjs', '.prettierignore',
+    '.eslintrc', '.eslintrc.js', '.eslintrc.cjs', '.eslintrc.json', '.eslintrc.yml', '.eslintrc.yaml',
+    'eslint.config.js', 'eslint.config.mjs', 'eslint.config.cjs', '.eslintignore',
+    'pyproject.toml', 'setup.cfg', 'tox.ini', '.flake8',
+    '.golangci.yml', '.golangci.yaml', 'analysis_options.yaml',
+]
+
+
+def _default_cache_dir() -> Path:
+    return Path.home() / '.export-code' / 'cache' / 'quality'
+
+
+def _content_hash(file_path: str) -> Optional[str]:
+    try:
+        with open(file_path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+
+def tool_config_hash(command: str, project_path: str) -> str:
+    """Băm câu lệnh của công cụ cùng nội dung các file cấu hình liên quan trong thư mục dự án."""
+    digest = hashlib.blake2b(command.encode('utf-8'), digest_size=16)
+    project_root = Path(project_path)
+    for name in sorted(TOOL_CONFIG_FILES):
+        config_path = project_root / name
+        try:
+            data = config_path.read_bytes()
+        except OSError:
+            continue
+        digest.update(b'\0' + name.encode('utf-8') + b'\0' + data)
+    return digest.hexdigest()
+
+
+class QualityCache:
+    """
+    Lưu các file đã vượt qua formatter/linter ở lần chạy trước, theo từng profile và công cụ.
+
+    Mỗi bản ghi gồm (hash nội dung, hash công cụ, size, mtime_ns). Một file chỉ được bỏ qua
+    khi cả nội dung lẫn câu lệnh/cấu hình của công cụ đều không đổi; size/mtime chỉ dùng để
+    tránh phải băm lại những file chắc chắn chưa bị chạm tới.
+    """
+
+    def __init__(self, project_path: str, cache_dir: Optional[str] = None) -> None:
+        project_root = Path(project_path).resolve()
+        self.project_root = project_root
+        key = hashlib.sha1(str(project_root).encode('utf-8')).hexdigest()[:12]
+        self.cache_path = Path(cache_dir or _default_cache_dir()) / f"{project_root.name}-{key}.json"
+        self._records: Dict[str, Dict[str, List[Any]]] = {}
+        self._dirty = False
+        try:
+            with self.cache_path.open('r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self._records = data.get('records', {})
+        except (OSError, ValueError):
+            pass
+
+    def _bucket(self, profile: str, tool_key: str) -> Dict[str, List[Any]]:
+        return self._records.setdefault(f"{profile}/{tool_key}", {})
+
+    def _relative(self, file_path: str) -> str:
+        try:
+            return Path(file_path).resolve().relative_to(self.project_root).as_posix()
+        except ValueError:
+            return str(Path(file_path).resolve())
+
+    def split_unchanged(self, profile: str, tool_key: str, tool_hash: str, files: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Tách danh sách file thành (cần chạy lại, có thể bỏ qua).
+        """
+        bucket = self._bucket(profile, tool_key)
+        to_run, unchanged = [], []
+        for file_path in files:
+            record = bucket.get(self._relative(file_path))
+            if not record or record[1] != tool_hash:
+                to_run.append(file_path)
+                continue
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                to_run.append(file_path)
+                continue
+            if record[2] == stat.st_size and record[3] == stat.st_mtime_ns:
+                unchanged.append(file_path)
+            elif _content_hash(file_path) == record[0]:
+                record[2], record[3] = stat.st_size, stat.st_mtime_ns
+                self._dirty = True
+                unchanged.append(file_path)
+            else:
+                to_run.append(file_path)
+        return to_run, unchanged
+
+    def record_results(self, profile: str, tool_key: str, tool_hash: str, results: List[Dict[str, Any]]) -> None:
+        """Ghi nhận các lô chạy sạch (exit code 0) và xóa bản ghi của các file còn lỗi."""
+        bucket = self._bucket(profile, tool_key)
+        for result in results:
+            clean = result.get('returncode') == 0 and not result.get('timed_out') and not result.get('error')
+            for file_path in result['files']:
+                relative_path = self._relative(file_path)
+                if not clean:
+                    bucket.pop(relative_path, None)
+                    continue
+                # Băm sau khi chạy vì formatter có thể đã ghi lại nội dung file.
+                content_hash = _content_hash(file_path)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    content_hash = None
+                if content_hash is None:
+                    bucket.pop(relative_path, None)
+                    continue
+                bucket[relative_path] = [content_hash, tool_hash, stat.st_size, stat.st_mtime_ns]
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'records': self._records}, f)
+            os.replace(str(tmp_path), str(self.cache_path))
+            self._dirty = False
+        except OSError as e:
+            logging.debug(f"Không thể ghi cache formatter/linter '{self.cache_path}': {e}")
@@ -1,48 +1,267 @@
-import logging
-import subprocess
-import shlex
-
-def run_quality_tool(t, tool_name, command, files_to_process):
-    """
-    Hàm chung để chạy một công cụ chất lượng code (formatter hoặc linter).
-    """
-    if not command:
-        logging.warning(t.get('warn_tool_not_configured', tool=tool_name))
-        return
-        
-    if not files_to_process:
-        logging.info(t.get('info_no_files_for_tool', tool=tool_name))
-        return
-
-    try:
-        command_parts = shlex.split(command)
-    except ValueError as e:
-        logging.error(f"❌ Lỗi phân tách lệnh: {e}")
-        return
-
-    tool_command_name = command_parts[0]
-    logging.info(f"\n▶️  {t.get('info_running_tool', tool=tool_command_name, count=len(files_to_process))}")
-    
-    full_command = command_parts + files_to_process
-     
-    try:
-        result = subprocess.run(full_command, capture_output=True, text=True, shell=False, check=False, timeout=300)  # 5 minutes timeout
-
-        if result.stdout:
-            logging.info(result.stdout.strip())
-        
-        if result.stderr:
-            logging.error(f"--- {t.get('header_tool_error')} ---")
-            logging.error(result.stderr.strip())
- 
-        if result.returncode != 0:
-            logging.warning(f"⚠️  {t.get('warn_tool_completed_with_issues', tool=tool_command_name, code=result.returncode)}")
-        else:
-            logging.info(f"✅ {t.get('info_tool_completed_ok', tool=tool_command_name)}")
-
-    except subprocess.TimeoutExpired:
-        logging.error(f"⏰ {t.get('error_tool_timeout', tool=tool_command_name)}: Command exceeded timeout of 300 seconds.")
-    except FileNotFoundError:
-        logging.error(t.get('error_command_not_found', command=tool_command_name))
-    except Exception as e:
-        logging.error(t.get('error_unexpected_tool_error', tool=tool_command_name, error=e), exc_info=True)
\ No newline at end of file
+import os
+import sys
+import logging
+import subprocess
+import shlex
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .quality_cache import QualityCache, tool_config_hash
+from . import instrumentation
+
+DEFAULT_TOOL_JOBS = os.cpu_count() or 1
+DEFAULT_CHUNK_TIMEOUT = 300  # giây cho mỗi lô file; 0 hoặc None = không giới hạn
+# Thời gian chờ luồng đọc output sau khi tiến trình kết thúc: tiến trình cháu còn sống có thể
+# giữ pipe mở mãi.
+_READER_JOIN_TIMEOUT = 5
+
+# Giới hạn độ dài dòng lệnh của CreateProcess trên Windows (ký tự).
+_WINDOWS_COMMAND_LIMIT = 32767
+# Chừa lại một khoảng an toàn cho những gì hệ điều hành thêm vào ngoài argv/env.
+_ARGV_SAFETY_MARGIN = 8192
+
+
+def _max_argv_bytes() -> int:
+    """Ước lượng số byte tối đa dành cho argv của một tiến trình con."""
+    if sys.platform == 'win32':
+        return _WINDOWS_COMMAND_LIMIT - 2048
+    try:
+        arg_max = os.sysconf('SC_ARG_MAX')
+    except (AttributeError, ValueError, OSError):
+        arg_max = 128 * 1024
+    if arg_max <= 0:
+        arg_max = 128 * 1024
+    # Biến môi trường dùng chung vùng nhớ với argv (kèm một con trỏ cho mỗi mục).
+    env_bytes = sum(len(k) + len(v) + 2 + 8 for k, v in os.environ.items())
+    return max(4096, arg_max - env_bytes - _ARGV_SAFETY_MARGIN)
+
+
+def _arg_cost(arg: str) -> int:
+    if sys.platform == 'win32':
+        return len(arg) + 3  # dấu cách và cặp ngoặc kép có thể có
+    return len(os.fsencode(arg)) + 1 + 8  # chuỗi + NUL + con trỏ argv
+
+
+def chunk_files_for_command(command_parts: List[str], files: List[str], jobs: int = 1, max_bytes: Optional[int] = None) -> List[List[str]]:
+    """
+    Chia danh sách file thành các lô sao cho mỗi lệnh không vượt quá giới hạn argv.
+
+    Khi ``jobs`` > 1 các lô còn được giới hạn số file để công việc được chia đều
+    cho các tiến trình chạy song song.
+
+    Args:
+        command_parts: Lệnh (đã tách) sẽ được đặt trước danh sách file.
+        files: Danh sách file cần xử lý.
+        jobs: Số tiến trình dự kiến chạy song song.
+        max_bytes: Giới hạn byte của argv (mặc định: ước lượng theo hệ điều hành).
+
+    Returns:
+        Danh sách các lô file, giữ nguyên thứ tự ban đầu.
+    """
+    budget = (max_bytes or _max_argv_bytes()) - sum(_arg_cost(part) for part in command_parts)
+    max_files = max(1, -(-len(files) // max(1, jobs))) if jobs > 1 else len(files) or 1
+
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_bytes = 0
+    for file_path in files:
+        cost = _arg_cost(file_path)
+        if current and (current_bytes + cost > budget or len(current) >= max_files):
+            chunks.append(current)
+            current, current_bytes = [], 0
+        current.append(file_path)
+        current_bytes += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _pump_stream(stream: Any, log_level: int, prefix: str) -> None:
+    for line in iter(stream.readline, ''):
+        line = line.rstrip()
+        if line:
+            logging.log(log_level, f"{prefix}{line}")
+    stream.close()
+
+
+def _kill_process_tree(process: subprocess.Popen) -> None:
+    """Dừng tiến trình cùng mọi tiến trình con của nó (shim, wrapper, ...)."""
+    if sys.platform == 'win32':
+        subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    else:
+        try:
+            # Tiến trình được chạy trong session riêng nên process group của nó có id = pid.
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    if process.poll() is None:
+        process.kill()
+
+
+def _run_chunk(t: Any, command_parts: List[str], files: List[str], prefix: str, timeout: Optional[float]) -> Dict[str, Any]:
+    """Chạy công cụ cho một lô file, phát trực tiếp stdout/stderr ra log."""
+    result: Dict[str, Any] = {'files': files, 'returncode': None, 'timed_out': False, 'error': None}
+    # Chạy trong process group riêng để khi hết thời gian có thể dừng cả cây tiến trình.
+    if sys.platform == 'win32':
+        group_options: Dict[str, Any] = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group_options = {'start_new_session': True}
+    try:
+        process = subprocess.Popen(command_parts + files, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, encoding='utf-8', errors='replace', shell=False, **group_options)
+    except FileNotFoundError:
+        result['error'] = 'not_found'
+        return result
+    except OSError as e:
+        result['error'] = str(e)
+        return result
+
+    readers = [
+        threading.Thread(target=_pump_stream, args=(process.stdout, logging.INFO, prefix), daemon=True),
+        threading.Thread(target=_pump_stream, args=(process.stderr, logging.ERROR, prefix), daemon=True),
+    ]
+    for reader in readers: reader.start()
+    try:
+        result['returncode'] = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_process_tree(process)
+        process.wait()
+        result['timed_out'] = True
+        logging.error(f"⏰ {prefix}{t.get('error_tool_timeout', tool=command_parts[0], seconds=timeout)}")
+    for reader in readers: reader.join(_READER_JOIN_TIMEOUT)
+    return result
+
+
+def run_quality_tool(t, tool_name, command, files_to_process, jobs: Optional[int] = None, chunk_timeout: Optional[float] = DEFAULT_CHUNK_TIMEOUT) -> List[Dict[str, Any]]:
+    """
+    Hàm chung để chạy một công cụ chất lượng code (formatter hoặc linter).
+
+    Danh sách file được chia thành các lô vừa với giới hạn argv và chạy song song tối đa
+    ``jobs`` tiến trình. Khi không chỉ định ``jobs``, file chỉ được chia khi một lệnh không
+    chứa đủ (công cụ khởi động chậm chỉ chạy một lần), và các lô đó chạy song song tối đa
+    ``DEFAULT_TOOL_JOBS`` tiến trình. Output được phát trực tiếp ra log, mỗi lô có timeout
+    riêng và một bản tổng kết được in ra ở cuối.
+
+    Returns:
+        Danh sách kết quả của từng lô (``files``, ``returncode``, ``timed_out``, ``error``).
+    """
+    if not command:
+        logging.warning(t.get('warn_tool_not_configured', tool=tool_name))
+        return []
+
+    if not files_to_process:
+        logging.info(t.get('info_no_files_for_tool', tool=tool_name))
+        return []
+
+    try:
+        command_parts = shlex.split(command)
+    except ValueError as e:
+        logging.error(f"❌ Lỗi phân tách lệnh: {e}")
+        return []
+
+    tool_command_name = command_parts[0]
+    timeout = chunk_timeout or None
+    if jobs:
+        jobs = max(1, jobs)
+        chunks = chunk_files_for_command(command_parts, list(files_to_process), jobs)
+    else:
+        chunks = chunk_files_for_command(command_parts, list(files_to_process))
+        jobs = DEFAULT_TOOL_JOBS
+    logging.info(f"\n▶️  {t.get('info_running_tool', tool=tool_command_name, count=len(files_to_process))}")
+    if len(chunks) > 1:
+        logging.info(t.get('info_tool_batches', count=len(chunks), jobs=min(jobs, len(chunks))))
+
+    def run(index_and_files):
+        index, files = index_and_files
+        prefix = f"[{index}/{len(chunks)}] " if len(chunks) > 1 else ""
+        return _run_chunk(t, command_parts, files, prefix, timeout)
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(jobs, len(chunks))) as executor:
+            results = list(executor.map(run, enumerate(chunks, 1)))
+    except Exception as e:
+        logging.error(t.get('error_unexpected_tool_error', tool=tool_command_name, error=e), exc_info=True)
+        return []
+
+    if any(r['error'] == 'not_found' for r in results):
+        logging.error(t.get('error_command_not_found', command=tool_command_name))
+        return results
+    for r in results:
+        if r['error']:
+            logging.error(t.get('error_unexpected_tool_error', tool=tool_command_name, error=r['error']))
+
+    failed = [r for r in results if r['returncode'] not in (0, None)]
+    timed_out = [r for r in results if r['timed_out']]
+    errored = [r for r in results if r['error']]
+    if len(chunks) > 1:
+        ok = len(results) - len(failed) - len(timed_out) - len(errored)
+        logging.info(t.get('info_tool_summary', tool=tool_command_name, ok=ok,
+                           failed=len(failed), timed_out=len(timed_out), errored=len(errored), total=len(results)))
+
+    if failed:
+        worst = max(r['returncode'] for r in failed)
+        logging.warning(f"⚠️  {t.get('warn_tool_completed_with_issues', tool=tool_command_name, code=worst)}")
+    elif not timed_out and not errored:
+        logging.info(f"✅ {t.get('info_tool_completed_ok', tool=tool_command_name)}")
+    return results
+
+
+def run_quality_for_profiles(
+    t: Any,
+    tool_key: str,
+    profiles: Dict[str, Any],
+    profile_names: List[str],
+    files: List[str],
+    project_path: str,
+    jobs: Optional[int] = None,
+    chunk_timeout: Optional[float] = DEFAULT_CHUNK_TIMEOUT,
+    full: bool = False,
+    cache_dir: Optional[str] = None
+) -> None:
+    """
+    Chạy formatter/linter của từng profile trên các file phù hợp, theo chế độ tăng dần.
+
+    Các file đã chạy sạch ở lần trước mà nội dung lẫn câu lệnh/cấu hình công cụ không đổi
+    sẽ được bỏ qua, trừ khi ``full`` là True.
+
+    Args:
+        t: Đối tượng Translator.
+        tool_key: 'formatter' hoặc 'linter'.
+        profiles: Dict chứa tất cả các profile.
+        profile_names: Các profile được chọn.
+        files: Danh sách file đã chọn.
+        project_path: Thư mục dự án (dùng làm khóa cache và nơi tìm file cấu hình).
+        jobs: Số tiến trình chạy song song (xem ``run_quality_tool``).
+        chunk_timeout: Timeout cho mỗi lô file.
+        full: Bỏ qua cache và chạy trên toàn bộ file.
+        cache_dir: Thư mục cache (mặc định: ``~/.export-code/cache/quality``).
+    """
+    cache = QualityCache(project_path, cache_dir)
+    for profile_name in profile_names:
+        tool_info = profiles.get(profile_name, {}).get(tool_key)
+        if not (tool_info and tool_info.get('command') and tool_info.get('extensions')):
+            logging.info(t.get('info_profile_no_tool', profile=profile_name, tool=tool_key))
+            continue
+
+        command, exts_for_tool = tool_info['command'], tool_info['extensions']
+        files_for_tool = [f for f in files if f.endswith(tuple(exts_for_tool))]
+        if not files_for_tool:
+            continue
+
+        tool_hash = tool_config_hash(command, project_path)
+        if not full:
+            files_for_tool, unchanged = cache.split_unchanged(profile_name, tool_key, tool_hash, files_for_tool)
+            instrumentation.count('quality.files_cached', len(unchanged))
+            if unchanged:
+                logging.info(t.get('info_tool_skipped_unchanged', tool=command.split()[0], count=len(unchanged)))
+            if not files_for_tool:
+                continue
+
+        instrumentation.count('quality.files_run', len(files_for_tool))
+        with instrumentation.phase(f'quality.{tool_key}'):
+            results = run_quality_tool(t, tool_key, command, files_for_tool, jobs=jobs, chunk_timeout=chunk_timeout)
+        cache.record_results(profile_name, tool_key, tool_hash, results)
+    cache.save()
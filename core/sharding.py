@@ -0,0 +1,159 @@
+import os
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Pattern, Set, Tuple
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+DEFAULT_SHARD_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+# Với các tokenizer BPE thông dụng, mã nguồn trung bình khoảng 4 byte cho mỗi token.
+BYTES_PER_TOKEN = 4
+
+# Số byte UTF-8 của các tiền tố trong cây thư mục: '│   ' = 6, '├── ' / '└── ' = 10.
+_TREE_INDENT_BYTES = len('│   '.encode('utf-8'))
+_TREE_CONNECTOR_BYTES = len('├── '.encode('utf-8'))
+
+
+def estimate_tokens(num_bytes: int) -> int:
+    """
+    Ước lượng số token từ số byte, không cần tokenizer (làm tròn lên).
+
+    Đủ nhanh để áp dụng cho kích thước file lấy từ ``stat`` trong lượt duyệt file.
+    """
+    return (num_bytes + BYTES_PER_TOKEN - 1) // BYTES_PER_TOKEN
+
+
+def byte_budget(max_bytes: Optional[int], max_tokens: Optional[int]) -> Optional[int]:
+    """Gộp ``--max-bytes`` và ``--max-tokens`` thành một giới hạn byte duy nhất cho mỗi shard."""
+    limits = [limit for limit in (max_bytes, max_tokens * BYTES_PER_TOKEN if max_tokens else None) if limit]
+    return min(limits) if limits else None
+
+
+class _TreeCost:
+    """Đếm chính xác số byte mà các file thêm vào cây thư mục của một shard."""
+
+    def __init__(self) -> None:
+        self.dirs = set()
+
+    def added_bytes(self, relative_path: str) -> int:
+        parts = relative_path.split('/')
+        cost = 0
+        for level in range(len(parts) - 1):
+            if '/'.join(parts[:level + 1]) not in self.dirs:
+                cost += _TREE_INDENT_BYTES * level + _TREE_CONNECTOR_BYTES + len(parts[level].encode('utf-8')) + 2
+        return cost + _TREE_INDENT_BYTES * (len(parts) - 1) + _TREE_CONNECTOR_BYTES + len(parts[-1].encode('utf-8')) + 1
+
+    def add(self, relative_path: str) -> None:
+        parts = relative_path.split('/')
+        for level in range(len(parts) - 1):
+            self.dirs.add('/'.join(parts[:level + 1]))
+
+
+def plan_shards(
+    items: List[Tuple[str, int]],
+    budget: int,
+    header_bytes: int,
+    entry_overhead: Any,
+    include_tree: bool = True
+) -> Tuple[List[List[str]], List[str]]:
+    """
+    Chia các file thành các shard liên tiếp theo thứ tự, cắt ở ranh giới file.
+
+    Args:
+        items: Danh sách (đường dẫn tương đối, kích thước byte) đã sắp xếp.
+        budget: Số byte tối đa của một shard.
+        header_bytes: Số byte của phần đầu shard (không tính cây thư mục).
+        entry_overhead: Hàm trả về số byte của phần bao quanh nội dung một file.
+        include_tree: Có tính cây thư mục của shard vào giới hạn hay không.
+
+    Returns:
+        (danh sách shard, các file một mình đã vượt giới hạn). File quá lớn vẫn được
+        đặt vào một shard riêng thay vì bị bỏ qua.
+    """
+    shards: List[List[str]] = []
+    oversized: List[str] = []
+    current: List[str] = []
+    current_bytes = header_bytes
+    tree = _TreeCost()
+
+    for relative_path, size in items:
+        cost = size + entry_overhead(relative_path)
+        if include_tree:
+            cost += tree.added_bytes(relative_path)
+        if current and current_bytes + cost > budget:
+            shards.append(current)
+            current, current_bytes, tree = [], header_bytes, _TreeCost()
+            cost = size + entry_overhead(relative_path) + (tree.added_bytes(relative_path) if include_tree else 0)
+        if not current and header_bytes + cost > budget:
+            oversized.append(relative_path)
+        current.append(relative_path)
+        current_bytes += cost
+        if include_tree:
+            tree.add(relative_path)
+    if current:
+        shards.append(current)
+    return shards, oversized
+
+
+def shard_output_paths(output_path: Path, count: int) -> List[Path]:
+    """Đặt tên các shard theo dạng ``<tên>-001.<đuôi>``."""
+    width = max(3, len(str(count)))
+    return [output_path.with_name(f"{output_path.stem}-{i:0{width}d}{output_path.suffix}") for i in range(1, count + 1)]
+
+
+def shard_manifest_path(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.shards.json")
+
+
+def shard_output_names(output_path: Path) -> Tuple[Set[str], Pattern[str]]:
+    """
+    Tên các file mà bundle chia shard ghi cạnh ``output_path``: manifest (cùng file tạm của nó)
+    và các shard có trong manifest hiện có, kèm regex khớp mọi tên do ``shard_output_paths`` đặt.
+    """
+    manifest_path = shard_manifest_path(output_path)
+    names = {manifest_path.name, manifest_path.name + '.tmp'}
+    try:
+        with manifest_path.open('r', encoding='utf-8') as f:
+            names.update(shard.get('file') for shard in json.load(f).get('shards', []) if shard.get('file'))
+    except (OSError, ValueError, AttributeError):
+        pass
+    pattern = re.compile(f"{re.escape(output_path.stem)}-[0-9]{{3,}}{re.escape(output_path.suffix)}")
+    return names, pattern
+
+
+def remove_stale_shards(manifest_path: Path, keep: List[Path]) -> None:
+    """Xóa các shard do lần chạy trước tạo ra (theo manifest cũ) nhưng không còn dùng nữa."""
+    try:
+        with manifest_path.open('r', encoding='utf-8') as f:
+            old_manifest = json.load(f)
+    except (OSError, ValueError):
+        return
+    keep_names = {p.name for p in keep}
+    for shard in old_manifest.get('shards', []):
+        name = shard.get('file')
+        if name and Path(name).name == name and name not in keep_names:
+            try:
+                (manifest_path.parent / name).unlink()
+            except OSError:
+                pass
+
+
+def write_shard_manifest(manifest_path: Path, project_name: str, output_format: str,
+                         max_bytes: Optional[int], max_tokens: Optional[int], shards: List[Dict[str, Any]]) -> None:
+    """Ghi manifest mô tả shard nào chứa file nào (ghi ra file tạm rồi thay thế)."""
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'project': project_name,
+        'format': output_format,
+        'max_bytes': max_bytes,
+        'max_tokens': max_tokens,
+        'bytes_per_token': BYTES_PER_TOKEN,
+        'shards': shards,
+    }
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with tmp_path.open('w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(str(tmp_path), str(manifest_path))
+    logging.debug(f"Đã ghi manifest shard: {manifest_path}")
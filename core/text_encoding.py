@@ -0,0 +1,82 @@
+import codecs
+from typing import Dict, Optional, Tuple
+
+# Cách xử lý file không phải UTF-8 hợp lệ:
+#   skip            - bỏ qua file (ghi cảnh báo), giống hành vi trước đây.
+#   bom             - chuyển sang UTF-8 nếu file có BOM UTF-16/UTF-32, nếu không thì bỏ qua.
+#   surrogateescape - chép nguyên byte vào bundle; --apply ghi lại đúng từng byte.
+NON_UTF8_POLICIES = ('skip', 'bom', 'surrogateescape')
+DEFAULT_NON_UTF8_POLICY = 'skip'
+
+# Kết quả xử lý một file, cũng là tên bộ đếm ``encoding.<kết quả>`` trong instrumentation.
+OUTCOMES = ('passthrough', 'transcoded', 'escaped', 'skipped')
+
+VALIDATE_CHUNK_SIZE = 64 * 1024
+
+# BOM UTF-32 phải được xét trước vì BOM UTF-32 LE bắt đầu bằng BOM UTF-16 LE.
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+class NotUtf8Error(ValueError):
+    """File không phải UTF-8 hợp lệ và bị bỏ qua theo chính sách đang dùng."""
+
+
+def is_valid_utf8(data: bytes, chunk_size: int = VALIDATE_CHUNK_SIZE) -> bool:
+    """
+    Kiểm tra ``data`` có phải UTF-8 hợp lệ không mà không giữ lại chuỗi đã giải mã.
+
+    File chỉ gồm ASCII được nhận ngay; các file khác được giải mã dần từng khối
+    ``chunk_size`` byte và bỏ kết quả, nên bộ nhớ phụ chỉ cỡ một khối.
+    """
+    if data.isascii():
+        return True
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    view = memoryview(data)
+    try:
+        for start in range(0, len(data), chunk_size):
+            decoder.decode(view[start:start + chunk_size], start + chunk_size >= len(data))
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_bom(data: bytes) -> Optional[str]:
+    """Trả về codec (``utf-16``/``utf-32``) nếu ``data`` bắt đầu bằng BOM tương ứng."""
+    for bom, codec in _BOMS:
+        if data.startswith(bom):
+            return codec
+    return None
+
+
+def normalize_bytes(data: bytes, policy: str = DEFAULT_NON_UTF8_POLICY) -> Tuple[Optional[bytes], str]:
+    """
+    Chuẩn bị nội dung một file để ghi thẳng vào bundle dạng bytes.
+
+    Args:
+        data: Nội dung gốc của file.
+        policy: Một trong ``NON_UTF8_POLICIES``.
+
+    Returns:
+        ``(bytes để ghi hoặc None nếu bỏ qua, kết quả)`` với kết quả thuộc ``OUTCOMES``.
+    """
+    if is_valid_utf8(data):
+        return data, 'passthrough'
+    if policy == 'surrogateescape':
+        return data, 'escaped'
+    if policy == 'bom':
+        codec = detect_bom(data)
+        if codec is not None:
+            try:
+                return data.decode(codec).encode('utf-8'), 'transcoded'
+            except UnicodeError:
+                pass
+    return None, 'skipped'
+
+
+def new_counts() -> Dict[str, int]:
+    return dict.fromkeys(OUTCOMES, 0)
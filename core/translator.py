@@ -1,93 +1,93 @@
-import json
-import os
-import logging
-from typing import Dict, Optional, Any
-from pathlib import Path
-
-class Translator:
-    def __init__(self, locales_dir: str = 'locales', settings_dir: Optional[str] = None) -> None:
-        """
-        Khởi tạo bộ dịch.
-        """
-        # Đường dẫn tới thư mục cài đặt của tool
-        script_dir = Path(__file__).resolve().parent.parent
-
-        # 1. Tải file dữ liệu dịch (strings.json)
-        self.strings_path = script_dir / locales_dir / 'strings.json'
-        self._strings = {}
-        try:
-            with open(self.strings_path, 'r', encoding='utf-8') as f:
-                self._strings = json.load(f)
-        except Exception as e:
-            logging.error(f"Không thể tải file dịch thuật tại {self.strings_path}: {e}")
-
-        # 2. Tải file cấu hình ngôn ngữ của người dùng
-        if not settings_dir:
-            settings_dir = Path.home() / '.export-code'
-        else:
-            settings_dir = Path(settings_dir)
-
-        settings_dir.mkdir(parents=True, exist_ok=True)
-        self.settings_path = settings_dir / 'settings.json'
-        self.lang = 'en' # Ngôn ngữ mặc định
-        
-        try:
-            if self.settings_path.exists():
-                with self.settings_path.open('r', encoding='utf-8') as f:
-                    settings = json.load(f)
-                    self.lang = settings.get('language', 'en')
-        except Exception as e:
-            logging.warning(f"Không thể đọc file cài đặt ngôn ngữ, sử dụng mặc định 'en'. Lỗi: {e}")
-    
-    def set_language(self, lang_code: str) -> None:
-        """
-        Thay đổi ngôn ngữ hiện tại và lưu lại cho các lần chạy sau.
-        
-        Args:
-            lang_code: Mã ngôn ngữ ('en' hoặc 'vi').
-        """
-        if lang_code in ['en', 'vi']: # Kiểm tra ngôn ngữ hợp lệ
-            self.lang = lang_code
-            try:
-                with self.settings_path.open('w', encoding='utf-8') as f:
-                    json.dump({'language': self.lang}, f, indent=2)
-                logging.info(f"Đã đổi ngôn ngữ sang: {'Tiếng Việt' if lang_code == 'vi' else 'English'}")
-            except Exception as e:
-                logging.error(f"Không thể lưu cài đặt ngôn ngữ: {e}")
-        else:
-            logging.warning(f"Mã ngôn ngữ '{lang_code}' không được hỗ trợ.")
-
-    def get(self, key: str, default: Optional[str] = None, **kwargs: Any) -> str:
-        """
-        Lấy chuỗi văn bản đã được dịch, có hỗ trợ giá trị mặc định và định dạng chuỗi.
-        
-        Args:
-            key: Khóa của chuỗi cần dịch.
-            default: Giá trị mặc định nếu không tìm thấy khóa.
-            **kwargs: Các tham số để định dạng chuỗi (template string).
-            
-        Returns:
-            Chuỗi văn bản đã được dịch và định dạng.
-        """
-        entry = self._strings.get(key)
-        template = None
-
-        if isinstance(entry, dict):
-            template = entry.get(self.lang) or entry.get('en')
-            if template is None:
-                logging.debug(f"Thiếu bản dịch cho key '{key}' ở ngôn ngữ '{self.lang}', dùng fallback.")
-        elif isinstance(entry, str):
-            template = entry
-
-        if template is None:
-            if default is not None:
-                template = default
-            else:
-                template = f"[{key}]"
-            logging.debug(f"Không tìm thấy key dịch '{key}'.")
-
-        try:
-            return template.format(**kwargs)
-        except KeyError as e:
-            logging.error(f"Thiếu tham số định dạng '{e}' cho key '{key}'")
+import json
+import os
+import logging
+from typing import Dict, Optional, Any
+from pathlib import Path
+
+class Translator:
+    def __init__(self, locales_dir: str = 'locales', settings_dir: Optional[str] = None) -> None:
+        """
+        Khởi tạo bộ dịch.
+        """
+        # Đường dẫn tới thư mục cài đặt của tool
+        script_dir = Path(__file__).resolve().parent.parent
+
+        # 1. Tải file dữ liệu dịch (strings.json)
+        self.strings_path = script_dir / locales_dir / 'strings.json'
+        self._strings = {}
+        try:
+            with open(self.strings_path, 'r', encoding='utf-8') as f:
+                self._strings = json.load(f)
+        except Exception as e:
+            logging.error(f"Không thể tải file dịch thuật tại {self.strings_path}: {e}")
+
+        # 2. Tải file cấu hình ngôn ngữ của người dùng
+        if not settings_dir:
+            settings_dir = Path.home() / '.export-code'
+        else:
+            settings_dir = Path(settings_dir)
+
+        settings_dir.mkdir(parents=True, exist_ok=True)
+        self.settings_path = settings_dir / 'settings.json'
+        self.lang = 'en' # Ngôn ngữ mặc định
+        
+        try:
+            if self.settings_path.exists():
+                with self.settings_path.open('r', encoding='utf-8') as f:
+                    settings = json.load(f)
+                    self.lang = settings.get('language', 'en')
+        except Exception as e:
+            logging.warning(f"Không thể đọc file cài đặt ngôn ngữ, sử dụng mặc định 'en'. Lỗi: {e}")
+    
+    def set_language(self, lang_code: str) -> None:
+        """
+        Thay đổi ngôn ngữ hiện tại và lưu lại cho các lần chạy sau.
+        
+        Args:
+            lang_code: Mã ngôn ngữ ('en' hoặc 'vi').
+        """
+        if lang_code in ['en', 'vi']: # Kiểm tra ngôn ngữ hợp lệ
+            self.lang = lang_code
+            try:
+                with self.settings_path.open('w', encoding='utf-8') as f:
+                    json.dump({'language': self.lang}, f, indent=2)
+                logging.info(f"Đã đổi ngôn ngữ sang: {'Tiếng Việt' if lang_code == 'vi' else 'English'}")
+            except Exception as e:
+                logging.error(f"Không thể lưu cài đặt ngôn ngữ: {e}")
+        else:
+            logging.warning(f"Mã ngôn ngữ '{lang_code}' không được hỗ trợ.")
+
+    def get(self, key: str, default: Optional[str] = None, **kwargs: Any) -> str:
+        """
+        Lấy chuỗi văn bản đã được dịch, có hỗ trợ giá trị mặc định và định dạng chuỗi.
+        
+        Args:
+            key: Khóa của chuỗi cần dịch.
+            default: Giá trị mặc định nếu không tìm thấy khóa.
+            **kwargs: Các tham số để định dạng chuỗi (template string).
+            
+        Returns:
+            Chuỗi văn bản đã được dịch và định dạng.
+        """
+        entry = self._strings.get(key)
+        template = None
+
+        if isinstance(entry, dict):
+            template = entry.get(self.lang) or entry.get('en')
+            if template is None:
+                logging.debug(f"Thiếu bản dịch cho key '{key}' ở ngôn ngữ '{self.lang}', dùng fallback.")
+        elif isinstance(entry, str):
+            template = entry
+
+        if template is None:
+            if default is not None:
+                template = default
+            else:
+                template = f"[{key}]"
+            logging.debug(f"Không tìm thấy key dịch '{key}'.")
+
+        try:
+            return template.format(**kwargs)
+        except KeyError as e:
+            logging.error(f"Thiếu tham số định dạng '{e}' cho key '{key}'")
             return template
\ No newline at end of file
@@ -0,0 +1,239 @@
+import os
+import time
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from pathlib import Path
+
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+from watchdog.events import FileSystemEventHandler
+
+from .bundler import create_code_bundle
+from .dir_cache import scan_tree
+from .ignore import IgnoreRules
+from .utils import get_gitignore_spec, is_text_file
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def _is_excluded_dir(name: str, relative_path: str, rules: IgnoreRules) -> bool:
+    """Cùng quy tắc bỏ qua thư mục như khi tìm file: tên bị loại trừ, thư mục ẩn, hoặc khớp .gitignore."""
+    if rules.excludes_dir_name(name):
+        return True
+    return rules.has_gitignore and (rules.ignores_dir(relative_path) or rules.ignores(relative_path + '/'))
+
+
+def plan_watches(project_root: Path, exclude_dirs: Set[str], gitignore_spec: Optional[Any],
+                 start: Optional[Path] = None, rules: Optional[IgnoreRules] = None) -> List[Tuple[str, bool]]:
+    """
+    Chọn các thư mục cần theo dõi trong cây ``start`` (mặc định là cả dự án).
+
+    Thư mục bị loại trừ không được theo dõi. Thư mục có thư mục con bị loại trừ (ở bất kỳ độ
+    sâu nào) được theo dõi không đệ quy; các nhánh còn lại được theo dõi đệ quy từ gốc của
+    nhánh, nên số watch (mỗi watch là một thread và một instance inotify) vẫn nhỏ.
+
+    Returns:
+        Danh sách ``(đường dẫn, đệ quy hay không)``.
+    """
+    start = start or project_root
+    rules = rules or IgnoreRules(exclude_dirs, gitignore_spec)
+    base = start.relative_to(project_root).as_posix()
+    base = '' if base == '.' else base + '/'
+    children: Dict[str, List[str]] = {}
+    dirty: Set[str] = set()
+    for dirpath, dirnames, _, _ in scan_tree(str(start)):
+        key = Path(dirpath).relative_to(start).as_posix()
+        prefix = '' if key == '.' else key + '/'
+        kept = [d for d in dirnames if not _is_excluded_dir(d, base + prefix + d, rules)]
+        if len(kept) != len(dirnames):
+            # Thư mục này và mọi thư mục cha của nó không thể được theo dõi đệ quy.
+            parts = [] if key == '.' else key.split('/')
+            dirty.add('.')
+            for i in range(1, len(parts) + 1):
+                dirty.add('/'.join(parts[:i]))
+        dirnames[:] = kept
+        children[key] = [prefix + d for d in kept]
+
+    watches = []
+    stack = ['.']
+    while stack:
+        key = stack.pop()
+        path = str(start if key == '.' else start / key)
+        if key in dirty:
+            watches.append((path, False))
+            stack.extend(children.get(key, []))
+        else:
+            watches.append((path, True))
+    return watches
+
+
+class ScopedWatches:
+    """
+    Các watch của một observer trên những thư mục được chọn theo ``plan_watches``, cập nhật khi
+    thư mục được tạo, xóa hoặc di chuyển.
+    """
+
+    def __init__(self, observer: Any, handler: FileSystemEventHandler, project_root: Path,
+                 exclude_dirs: Set[str], gitignore_spec: Optional[Any]) -> None:
+        self.observer = observer
+        self.handler = handler
+        self.project_root = project_root
+        self.exclude_dirs = set(exclude_dirs)
+        self.rules = IgnoreRules(exclude_dirs, gitignore_spec)
+        self.watches: Dict[str, Tuple[Any, bool]] = {}
+
+    def add_tree(self, start: Path) -> None:
+        for path, recursive in plan_watches(self.project_root, self.exclude_dirs, None, start, self.rules):
+            if path not in self.watches:
+                self.watches[path] = (self.observer.schedule(self.handler, path, recursive=recursive), recursive)
+
+    def remove_tree(self, path: Path) -> None:
+        prefix = os.path.join(str(path), '')
+        for watched in [p for p in self.watches if p == str(path) or p.startswith(prefix)]:
+            watch, _ = self.watches.pop(watched)
+            try:
+                self.observer.unschedule(watch)
+            except (KeyError, OSError):
+                pass
+
+    def _recursive_owner(self, path: Path) -> Optional[Path]:
+        for parent in path.parents:
+            entry = self.watches.get(str(parent))
+            if entry is not None:
+                return parent if entry[1] else None
+        return None
+
+    def directory_created(self, path: Path) -> None:
+        try:
+            relative_path = path.relative_to(self.project_root).as_posix()
+        except ValueError:
+            return
+        excluded = _is_excluded_dir(path.name, relative_path, self.rules)
+        owner = self._recursive_owner(path)
+        if owner is not None:
+            # Watch đệ quy đã tự theo dõi thư mục mới; chỉ cần chia lại khi nó bị loại trừ
+            # (ví dụ node_modules vừa được tạo bởi npm install).
+            if excluded:
+                self.remove_tree(owner)
+                try:
+                    self.add_tree(owner)
+                except OSError as e:
+                    logging.warning(f"⚠️  Không thể theo dõi thư mục {owner}: {e}")
+        elif not excluded and str(path.parent) in self.watches:
+            try:
+                self.add_tree(path)
+            except OSError as e:
+                logging.warning(f"⚠️  Không thể theo dõi thư mục mới {relative_path}: {e}")
+
+    def directory_deleted(self, path: Path) -> None:
+        self.remove_tree(path)
+
+    def counts(self) -> Tuple[int, int]:
+        """``(số watch, số watch đệ quy)``."""
+        return len(self.watches), sum(1 for _, recursive in self.watches.values() if recursive)
+
+
+class ChangeHandler(FileSystemEventHandler):
+    def __init__(self, t, project_path, output_file, extensions, exclude_dirs, use_all_text_files, output_format='txt', compression=None, compression_level=None, non_utf8='skip', hash_algorithm='sha256'):
+        self.t = t
+        self.project_path = project_path
+        self.output_file = output_file
+        self.extensions = extensions
+        self.exclude_dirs = exclude_dirs
+        self.use_all_text_files = use_all_text_files
+        self.output_format = output_format
+        self.compression = compression
+        self.compression_level = compression_level
+        self.non_utf8 = non_utf8
+        self.hash_algorithm = hash_algorithm
+        self.watches: Optional[ScopedWatches] = None
+        self.ignore_rules = IgnoreRules(exclude_dirs)
+        # Khi quét định kỳ, file mới chỉ sinh sự kiện "created" (không kèm "modified" như inotify).
+        self.rebundle_on_create = False
+
+        from .compression import compressed_path
+        self.output_filepath = compressed_path(Path(output_file).with_suffix(f'.{output_format}'), compression).resolve()
+        logging.info(self.t.get("info_watch_start"))
+
+    def on_created(self, event):
+        if event.is_directory:
+            if self.watches is not None:
+                self.watches.directory_created(Path(event.src_path))
+        elif self.rebundle_on_create:
+            self.on_modified(event)
+
+    def on_deleted(self, event):
+        if event.is_directory and self.watches is not None:
+            self.watches.directory_deleted(Path(event.src_path))
+
+    def on_moved(self, event):
+        if event.is_directory and self.watches is not None:
+            self.watches.directory_deleted(Path(event.src_path))
+            self.watches.directory_created(Path(event.dest_path))
+
+    def on_modified(self, event):
+        if event.is_directory: return
+        src_path = Path(event.src_path).resolve()
+        if src_path == self.output_filepath: return
+
+        try:
+            rel_path = src_path.relative_to(Path(self.project_path).resolve()).as_posix()
+        except ValueError:
+            return
+
+        if any(self.ignore_rules.excludes_dir_name(part) for part in rel_path.split('/')[:-1]): return
+
+        should_rebundle = False
+        if self.use_all_text_files:
+            if is_text_file(event.src_path): should_rebundle = True
+        elif any(event.src_path.endswith(ext) for ext in self.extensions): should_rebundle = True
+
+        if should_rebundle:
+            logging.info(self.t.get("info_watch_change_detected").format(path=rel_path))
+            try:
+                create_code_bundle(self.t, self.project_path, self.output_file, set(self.exclude_dirs), self.use_all_text_files, self.extensions, include_tree=False, output_format=self.output_format,
+                                   compression=self.compression, compression_level=self.compression_level, non_utf8=self.non_utf8,
+                                   hash_algorithm=self.hash_algorithm)
+                logging.info(self.t.get("info_watch_success"))
+            except Exception as e:
+                logging.error(self.t.get("error_watch_rebundle_failed").format(error=e), exc_info=True)
+
+def _start_observer(t: Any, event_handler: ChangeHandler, project_root: Path, exclude_dirs: Set[str], poll_interval: Optional[float]) -> Any:
+    observer = Observer() if poll_interval is None else PollingObserver(timeout=poll_interval)
+    watches = ScopedWatches(observer, event_handler, project_root, exclude_dirs, get_gitignore_spec(str(project_root)))
+    watches.add_tree(project_root)
+    event_handler.watches = watches
+    event_handler.rebundle_on_create = poll_interval is not None
+    try:
+        # inotify chỉ được mở khi observer bắt đầu chạy.
+        observer.start()
+    except OSError as e:
+        if poll_interval is not None:
+            raise
+        observer.unschedule_all()
+        logging.warning(t.get("warn_watch_polling_fallback", error=e, interval=DEFAULT_POLL_INTERVAL))
+        return _start_observer(t, event_handler, project_root, exclude_dirs, DEFAULT_POLL_INTERVAL)
+    total, recursive = watches.counts()
+    logging.info(t.get("info_watch_scope", count=total, recursive=recursive))
+    return observer
+
+def watch_and_rebundle(t: Any, project_path: str, output_file: str, extensions: List[str], exclude_dirs: Set[str], use_all_text_files: bool, output_format: str = 'txt',
+                       compression: Optional[str] = None, compression_level: Optional[int] = None,
+                       non_utf8: str = 'skip', hash_algorithm: Optional[str] = 'sha256', poll_interval: Optional[float] = None) -> None:
+    """
+    Theo dõi thư mục dự án và tạo lại bundle mỗi khi có file thay đổi (chặn cho tới khi Ctrl+C).
+
+    Chỉ các thư mục không bị loại trừ (``exclude_dirs``, thư mục ẩn, .gitignore) được theo dõi,
+    xem ``plan_watches``. ``poll_interval`` (giây) dùng cơ chế quét định kỳ thay cho thông báo
+    của hệ điều hành; cơ chế này cũng được dùng tự động khi không đặt được watch (ví dụ hệ
+    thống file không hỗ trợ inotify hoặc đã hết giới hạn).
+    """
+    event_handler = ChangeHandler(t, project_path, output_file, extensions, exclude_dirs, use_all_text_files, output_format=output_format,
+                                  compression=compression, compression_level=compression_level, non_utf8=non_utf8,
+                                  hash_algorithm=hash_algorithm)
+    observer = _start_observer(t, event_handler, Path(project_path).resolve(), exclude_dirs, poll_interval)
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        observer.stop(); logging.info("\n🛑 Đã dừng theo dõi.")
+    observer.join()
@@ -0,0 +1,48 @@
+"""
+Plugin ví dụ dùng hook theo file.
+
+Sao chép file này vào ``~/.export-code/plugins/`` rồi chạy::
+
+    export-code --count-lines -p python
+
+Plugin không tự duyệt thư mục: core gọi ``on_file`` cho từng file trong lượt đọc chung,
+nên nhiều plugin dạng này có thể chạy cùng nhau mà chỉ tốn một lượt I/O.
+"""
+import threading
+from collections import Counter
+from pathlib import Path
+
+from core.plugin_base import ExportCodePlugin
+
+
+class LineCounterPlugin(ExportCodePlugin):
+    # on_file chỉ cập nhật Counter dưới khóa nên có thể chạy trong các luồng đọc.
+    parallel_safe = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lines = Counter()
+        self._files = Counter()
+        self._output = 'line_counts.txt'
+
+    @property
+    def command(self):
+        return "--count-lines"
+
+    def register_command(self, parser):
+        parser.add_argument(self.command, action="store_true", help="Count lines per file extension.")
+
+    def begin(self, args, t):
+        self._output = args.output or self._output
+
+    def on_file(self, path, content):
+        ext = Path(path).suffix or "(no extension)"
+        line_count = content.count("\n") + (1 if content and not content.endswith("\n") else 0)
+        with self._lock:
+            self._lines[ext] += line_count
+            self._files[ext] += 1
+
+    def finalize(self):
+        with open(self._output, 'w', encoding='utf-8') as outfile:
+            for ext, lines in self._lines.most_common():
+                outfile.write(f"{ext:<15} {self._files[ext]:>8,} file(s) {lines:>12,} line(s)\n")
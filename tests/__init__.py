@@ -1 +1 @@
-"""Test suite for export-code."""
+"""Test suite for export-code."""
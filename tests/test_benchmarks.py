@@ -0,0 +1,26 @@
+from benchmarks.suite import compare_results
+from benchmarks.synthetic_repo import generate_repo
+
+
+def _snapshot(root):
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in sorted(root.rglob("*")) if p.is_file()}
+
+
+def test_synthetic_repo_is_deterministic(tmp_path):
+    shape = {"files": 120, "depth": 3, "binary_ratio": 0.1, "scene_ratio": 0.1, "gitignore_ratio": 0.5}
+    info = generate_repo(str(tmp_path / "a"), **shape)
+    generate_repo(str(tmp_path / "b"), **shape)
+
+    assert _snapshot(tmp_path / "a") == _snapshot(tmp_path / "b")
+    assert info["source"] + info["binary"] + info["scene"] + info["ignored"] == 120
+    assert any(name.endswith(".tscn") for name in _snapshot(tmp_path / "a"))
+    assert (tmp_path / "a" / ".gitignore").exists()
+
+
+def test_compare_results_flags_only_real_regressions():
+    baseline = {"results": {"walk": {"min": 1.0}, "tree": {"min": 0.001}, "todo": {"min": 1.0}}}
+    current = {"results": {"walk": {"min": 1.5}, "tree": {"min": 0.003}, "todo": {"min": 1.05}}}
+
+    rows = {row["scenario"]: row["regressed"] for row in compare_results(current, baseline, threshold=0.15)}
+
+    assert rows == {"walk": True, "tree": False, "todo": False}
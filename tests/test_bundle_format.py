@@ -1,29 +1,75 @@
-from core.bundle_format import (
-    BUNDLE_HEADER_MARKER,
-    SECTION_DIVIDER,
-    iter_bundle_sections,
-    strip_bundle_header,
-)
-
-
-def test_strip_bundle_header_removes_marker_and_bom():
-    content = "\ufeff" + BUNDLE_HEADER_MARKER + "\nHello"
-    assert strip_bundle_header(content) == "Hello"
-
-
-def test_iter_bundle_sections_parses_multiple_files():
-    body = "\n".join(
-        [
-            "--- FILE: foo.py ---",
-            "print('foo')",
-            SECTION_DIVIDER.strip(),
-            "--- FILE: bar/baz.txt ---",
-            "content",
-        ]
-    )
-
-    sections = list(iter_bundle_sections(body))
-    assert sections == [
-        ("foo.py", "print('foo')"),
-        ("bar/baz.txt", "content"),
-    ]
+from core.bundle_format import (
+    BUNDLE_HEADER_MARKER,
+    SECTION_DIVIDER,
+    iter_bundle_sections,
+    strip_bundle_header,
+)
+
+
+def test_strip_bundle_header_removes_marker_and_bom():
+    content = "\ufeff" + BUNDLE_HEADER_MARKER + "\nHello"
+    assert strip_bundle_header(content) == "Hello"
+
+
+def test_iter_bundle_sections_parses_multiple_files():
+    body = "\n".join(
+        [
+            "--- FILE: foo.py ---",
+            "print('foo')",
+            SECTION_DIVIDER.strip(),
+            "--- FILE: bar/baz.txt ---",
+            "content",
+        ]
+    )
+
+    sections = list(iter_bundle_sections(body))
+    assert sections == [
+        ("foo.py", "print('foo')"),
+        ("bar/baz.txt", "content"),
+    ]
+
+
+def test_iter_bundle_sections_resolves_duplicate_references():
+    body = "\n".join(
+        [
+            "--- FILE: a.js ---",
+            "shared()",
+            SECTION_DIVIDER.strip(),
+            "--- FILE: b.js (same as a.js) ---",
+            SECTION_DIVIDER.strip(),
+            "--- FILE: c (same as missing.js) ---",
+            "literal",
+        ]
+    )
+
+    assert list(iter_bundle_sections(body)) == [
+        ("a.js", "shared()"),
+        ("b.js", "shared()"),
+        ("c (same as missing.js)", "literal"),
+    ]
+
+
+def test_dedup_bundle_round_trips_through_parse(tmp_path):
+    from core.applier import parse_bundle_file
+    from core.bundler import create_code_bundle
+
+    class DummyTranslator:
+        def get(self, key, default=None, **kwargs):
+            return key
+
+    project = tmp_path / "proj"
+    for name in ("vendor_a/lib.js", "vendor_b/lib.js", "app.js"):
+        (project / name).parent.mkdir(parents=True, exist_ok=True)
+    shared = "export const answer = () => 42;\n" * 20
+    (project / "vendor_a/lib.js").write_text(shared, encoding="utf-8")
+    (project / "vendor_b/lib.js").write_text(shared, encoding="utf-8")
+    (project / "app.js").write_text("import './vendor_a/lib.js';\n", encoding="utf-8")
+
+    output = tmp_path / "bundle"
+    create_code_bundle(DummyTranslator(), str(project), str(output), set(), extensions=[".js"], dedup=True)
+    text = (tmp_path / "bundle.txt").read_text(encoding="utf-8")
+
+    assert text.count("export const answer") == 20
+    assert "--- FILE: vendor_b/lib.js (same as vendor_a/lib.js) ---" in text
+    parsed = parse_bundle_file(DummyTranslator(), str(tmp_path / "bundle.txt"))
+    assert parsed["vendor_b/lib.js"] == parsed["vendor_a/lib.js"] == shared.rstrip("\n")
@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from core.bundler import create_code_bundle, iter_bundle_chunks
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "proj"
+    (project / "pkg").mkdir(parents=True)
+    for i in range(20):
+        (project / "pkg" / f"mod{i:02d}.py").write_text(f"# módulo {i}\n" + "x = 1\n" * (50 * i), encoding="utf-8")
+    return project
+
+
+@pytest.mark.parametrize("output_format", ["txt", "md"])
+def test_iter_bundle_chunks_matches_file_output(project, tmp_path, output_format):
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "bundle"), set(), extensions=[".py"], output_format=output_format)
+
+    chunks = list(iter_bundle_chunks(DummyTranslator(), str(project), set(), extensions=[".py"], output_format=output_format, chunk_size=1024))
+
+    assert b"".join(chunks) == (tmp_path / f"bundle.{output_format}").read_bytes()
+    assert b"--- FILE" not in chunks[0] and b"<details>\n<summary><code>pkg" not in chunks[0]
+    # Mỗi khối chỉ vượt chunk_size tối đa một mục file.
+    assert max(len(chunk) for chunk in chunks) < 1024 + 6 * 50 * 20
+
+
+def test_dash_output_streams_to_stdout(project, tmp_path, capsysbinary):
+    create_code_bundle(DummyTranslator(), str(project), "-", set(), extensions=[".py"], dedup=True)
+
+    out = capsysbinary.readouterr().out
+    assert out.startswith(b"### EXPORT_CODE_BUNDLE_V1 ###\n")
+    assert out.count(b"--- FILE: ") == 20
+    assert not list(tmp_path.glob("-*"))
+
+
+def test_closed_stdout_pipe_is_not_reported_as_done(tmp_path):
+    project = tmp_path / "big"
+    project.mkdir()
+    for i in range(40):
+        (project / f"mod{i:02d}.py").write_text("x = 1\n" * 20000, encoding="utf-8")
+    home = tmp_path / "home"
+    home.mkdir()
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home))
+    process = subprocess.Popen([sys.executable, "-m", "core", str(project), "-e", ".py", "-o", "-"],
+                               cwd=str(Path(__file__).resolve().parent.parent), env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # Như ``| head``: đọc phần đầu rồi đóng pipe.
+    assert process.stdout.read(64).startswith(b"### EXPORT_CODE_BUNDLE_V1 ###")
+    process.stdout.close()
+    stderr = process.stderr.read().decode("utf-8", "replace")
+    process.wait(timeout=60)
+
+    assert "🎉" not in stderr
+
+
+@pytest.mark.parametrize("method, suffix", [("gzip", ".gz"), ("xz", ".xz"), ("bz2", ".bz2")])
+def test_compressed_bundle_round_trips_through_parse(project, tmp_path, method, suffix):
+    from core.applier import parse_bundle_file
+
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "bundle"), set(), extensions=[".py"],
+                       compression=method, compression_level=1)
+    compressed = tmp_path / f"bundle.txt{suffix}"
+    plain = b"".join(iter_bundle_chunks(DummyTranslator(), str(project), set(), extensions=[".py"]))
+
+    assert compressed.exists() and not (tmp_path / "bundle.txt").exists()
+    assert compressed.stat().st_size < len(plain)
+    parsed = parse_bundle_file(DummyTranslator(), str(compressed))
+    assert parsed["pkg/mod03.py"] == (project / "pkg" / "mod03.py").read_text(encoding="utf-8").rstrip("\n")
+
+
+@pytest.fixture
+def mixed_project(tmp_path):
+    project = tmp_path / "mixed"
+    project.mkdir()
+    (project / "crlf.txt").write_bytes("línea uno\r\nlínea dos\r\n".encode("utf-8"))
+    (project / "latin1.txt").write_bytes("café crème\n".encode("latin-1"))
+    (project / "wide.txt").write_bytes("wide текст\n".encode("utf-16"))
+    return project
+
+
+@pytest.mark.parametrize("policy, present, missing", [
+    ("skip", [], ["latin1.txt", "wide.txt"]),
+    ("bom", ["wide.txt"], ["latin1.txt"]),
+    ("surrogateescape", ["latin1.txt", "wide.txt"], []),
+])
+def test_non_utf8_policies(mixed_project, tmp_path, policy, present, missing):
+    from core.applier import parse_bundle_file
+
+    create_code_bundle(DummyTranslator(), str(mixed_project), str(tmp_path / "bundle"), set(), extensions=[".txt"], non_utf8=policy)
+    data = (tmp_path / "bundle.txt").read_bytes()
+
+    # UTF-8 được chép nguyên byte, kể cả CRLF.
+    assert "línea uno\r\nlínea dos\r\n".encode("utf-8") in data
+    for name in present:
+        assert f"--- FILE: {name} ---".encode() in data
+    for name in missing:
+        assert f"--- FILE: {name} ---".encode() not in data
+    if policy == "bom":
+        assert "wide текст".encode("utf-8") in data
+    if "latin1.txt" in present:
+        parsed = parse_bundle_file(DummyTranslator(), str(tmp_path / "bundle.txt"))
+        assert parsed["latin1.txt"].encode("utf-8", "surrogateescape") == "café crème".encode("latin-1")
+
+
+def test_utf8_validation_across_chunk_boundaries():
+    from core.text_encoding import is_valid_utf8
+
+    data = "ừ".encode("utf-8") * 1000
+    assert is_valid_utf8(data, chunk_size=7)
+    assert not is_valid_utf8(data[:-1], chunk_size=7)
+    assert not is_valid_utf8(data + b"\xff", chunk_size=7)
+
+
+def test_output_inside_project_is_not_bundled(project, tmp_path):
+    (project / "notes").mkdir()
+    (project / "notes" / "bundle.md").write_text("# same name, different file\n", encoding="utf-8")
+    output = project / "bundle"
+
+    for _ in range(2):
+        create_code_bundle(DummyTranslator(), str(project), str(output), set(), extensions=[".py", ".md"], output_format="md")
+
+    content = (project / "bundle.md").read_text(encoding="utf-8")
+    assert "<code>notes/bundle.md</code>" in content
+    assert "<code>bundle.md</code>" not in content
@@ -0,0 +1,105 @@
+import os
+import socket
+import tempfile
+import threading
+
+import pytest
+
+from core import daemon
+from core.bundler import create_code_bundle
+
+
+class DummyTranslator:
+    lang = 'en'
+
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "proj"
+    (project / "pkg").mkdir(parents=True)
+    (project / "main.py").write_text("print('main')\n", encoding="utf-8")
+    (project / "pkg" / "util.py").write_text("VALUE = 1\n", encoding="utf-8")
+    return project
+
+
+def test_project_index_caches_listing_until_structural_event(project):
+    index = daemon.ProjectIndex(project, set())
+    assert len(index.files(False, [".py"])) == 2
+
+    (project / "extra.py").write_text("x = 1\n", encoding="utf-8")
+    assert len(index.files(False, [".py"])) == 2
+    index.handle_event('modified', str(project / "main.py"), '', False)
+    assert len(index.files(False, [".py"])) == 2
+    index.handle_event('created', str(project / "extra.py"), '', False)
+    assert len(index.files(False, [".py"])) == 3
+
+
+def test_project_index_ignores_events_in_excluded_directories(project):
+    (project / ".git").mkdir()
+    (project / "node_modules" / "lib").mkdir(parents=True)
+    (project / ".gitignore").write_text("*.log\n", encoding="utf-8")
+    index = daemon.ProjectIndex(project, {"node_modules"})
+    index.start()
+    try:
+        watched = index._watches.watches
+        assert watched[str(project)][1] is False
+        assert {os.path.relpath(path, project) for path in watched} == {".", "pkg"}
+    finally:
+        index.stop()
+
+    listing = index.files(False, [".py"])
+    index.handle_event('created', str(project / ".git" / "index.lock"), '', False)
+    index.handle_event('deleted', str(project / ".git" / "index.lock"), '', False)
+    index.handle_event('created', str(project / "node_modules" / "lib" / "x.py"), '', False)
+    index.handle_event('created', str(project / "debug.log"), '', False)
+    assert index.files(False, [".py"]) is listing
+
+    index.handle_event('moved', str(project / "node_modules" / "x.py"), str(project / "x.py"), False)
+    assert index.files(False, [".py"]) is not listing
+
+
+def test_project_index_read_bytes_revalidates_with_stat(project):
+    index = daemon.ProjectIndex(project, set())
+    path = str(project / "main.py")
+    assert index.read_bytes(path) == b"print('main')\n"
+
+    (project / "main.py").write_text("print('changed!')\n", encoding="utf-8")
+    assert index.read_bytes(path) == b"print('changed!')\n"
+
+
+def test_warm_bundle_matches_in_process_bundle(project, tmp_path):
+    t = DummyTranslator()
+    create_code_bundle(t, str(project), str(tmp_path / "cold"), set(), extensions=[".py"])
+    index = daemon.ProjectIndex(project, set())
+    for _ in range(2):
+        create_code_bundle(t, str(project), str(tmp_path / "warm"), set(), file_list=index.files(False, [".py"]), project_index=index)
+
+    assert (tmp_path / "warm.txt").read_text(encoding="utf-8") == (tmp_path / "cold.txt").read_text(encoding="utf-8")
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix domain sockets")
+def test_client_round_trip_and_fallback(project, tmp_path):
+    socket_dir = tempfile.mkdtemp(prefix="ec-")
+    socket_path = os.path.join(socket_dir, "d.sock")
+    assert daemon.run_via_daemon('tree', {'project': str(project)}, socket_path) is None
+
+    server = daemon.DaemonServer(DummyTranslator(), socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        for _ in range(100):
+            if daemon.send_request('ping', socket_path=socket_path):
+                break
+            threading.Event().wait(0.02)
+        output = str(tmp_path / "bundle")
+        response = daemon.run_via_daemon('bundle', {'project': str(project), 'exclude': [], 'extensions': ['.py'], 'output': output}, socket_path)
+        assert response['ok']
+        assert "--- FILE: pkg/util.py ---" in (tmp_path / "bundle.txt").read_text(encoding="utf-8")
+        assert daemon.send_request('bundle', {'project': str(tmp_path / "missing")}, socket_path)['ok'] is False
+    finally:
+        daemon.send_request('shutdown', socket_path=socket_path)
+        thread.join(timeout=5)
+    assert not os.path.exists(socket_path)
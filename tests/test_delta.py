@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from core import instrumentation
+from core.applier import apply_changes, parse_bundle_file
+from core.bundler import create_code_bundle
+from core.manifest import read_manifest, verify_bundle
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+@pytest.fixture
+def base(tmp_path):
+    project = tmp_path / "proj"
+    (project / "pkg").mkdir(parents=True)
+    for i in range(5):
+        (project / "pkg" / f"mod{i}.py").write_text(f"value = {i}\n", encoding="utf-8")
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "base"), set(), extensions=[".py"])
+    return project, tmp_path / "base.txt"
+
+
+def _change(project):
+    (project / "pkg" / "mod1.py").write_text("value = 100\n", encoding="utf-8")
+    (project / "pkg" / "new.py").write_text("fresh = True\n", encoding="utf-8")
+    (project / "pkg" / "mod4.py").unlink()
+    # Chỉ "touch": cùng nội dung, khác mtime -> phải được băm lại và coi là không đổi.
+    stat = os.stat(project / "pkg" / "mod2.py")
+    os.utime(project / "pkg" / "mod2.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_delta_bundle_contains_only_changes(base, tmp_path):
+    project, base_bundle = base
+    _change(project)
+
+    with instrumentation.instrument_run(DummyTranslator(), timings=True) as stats:
+        create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "delta"), set(), extensions=[".py"], delta_from=str(base_bundle))
+
+    delta_bundle = tmp_path / "delta.txt"
+    assert sorted(parse_bundle_file(DummyTranslator(), str(delta_bundle))) == ["pkg/mod1.py", "pkg/new.py"]
+    _, manifest = read_manifest(delta_bundle.read_bytes())
+    assert set(manifest["delta"]["modified"]) == {"pkg/mod1.py"}
+    assert set(manifest["delta"]["deleted"]) == {"pkg/mod4.py"}
+    assert stats.counters["delta.files_unchanged"] == 3
+    assert verify_bundle(DummyTranslator(), str(delta_bundle))
+
+
+def test_apply_delta_bundle_updates_and_deletes(base, tmp_path, monkeypatch):
+    project, base_bundle = base
+    target = tmp_path / "copy"
+    target.mkdir()
+    for path in project.rglob("*.py"):
+        (target / path.relative_to(project)).parent.mkdir(parents=True, exist_ok=True)
+        (target / path.relative_to(project)).write_bytes(path.read_bytes())
+    _change(project)
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "delta"), set(), extensions=[".py"], delta_from=str(base_bundle))
+    monkeypatch.setattr("core.applier.inquirer.prompt", lambda questions, **kwargs: {"files_to_apply": questions[0].kwargs["choices"]})
+
+    apply_changes(DummyTranslator(), str(target), str(tmp_path / "delta.txt"))
+
+    assert sorted(p.relative_to(target).as_posix() for p in target.rglob("*.py")) == sorted(
+        p.relative_to(project).as_posix() for p in project.rglob("*.py"))
+    assert (target / "pkg" / "mod1.py").read_text(encoding="utf-8").rstrip("\n") == "value = 100"
+
+
+def test_apply_delta_refuses_on_base_mismatch(base, tmp_path, monkeypatch):
+    project, base_bundle = base
+    target = tmp_path / "copy"
+    (target / "pkg").mkdir(parents=True)
+    for path in (project / "pkg").glob("*.py"):
+        (target / "pkg" / path.name).write_bytes(path.read_bytes())
+    (target / "pkg" / "mod1.py").write_text("value = -1\n", encoding="utf-8")
+    _change(project)
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "delta"), set(), extensions=[".py"], delta_from=str(base_bundle))
+    prompted = []
+    monkeypatch.setattr("core.applier.inquirer.prompt", lambda questions, **kwargs: prompted.append(questions))
+
+    apply_changes(DummyTranslator(), str(target), str(tmp_path / "delta.txt"))
+
+    assert prompted == []
+    assert (target / "pkg" / "mod4.py").exists()
+    assert (target / "pkg" / "mod1.py").read_text(encoding="utf-8") == "value = -1\n"
@@ -0,0 +1,48 @@
+import os
+import time
+
+from core import instrumentation
+from core.dir_cache import use_directory_cache
+from core.tree_generator import generate_tree
+from core.utils import find_project_files
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+def _age_dirs(root, seconds=60):
+    # Thư mục vừa tạo nằm trong cửa sổ "racy" nên chưa được tin; lùi mtime để mô phỏng cây cũ.
+    past = time.time_ns() - seconds * 10**9
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, ns=(past, past))
+
+
+def test_unchanged_directories_are_listed_from_cache(tmp_path):
+    project = tmp_path / "proj"
+    for name in ("a", "b", "b/c"):
+        (project / name).mkdir(parents=True)
+        (project / name / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    os.symlink(project / "a" / "mod.py", project / "b" / "link.py")
+    _age_dirs(project)
+    cache_dir = tmp_path / "cache"
+
+    with use_directory_cache(str(project), str(cache_dir)):
+        expected_files = sorted(find_project_files(str(project), set(), False, [".py"]))
+        expected_tree = generate_tree(str(project), set(), None)
+
+    with instrumentation.instrument_run(DummyTranslator(), timings=True) as stats:
+        with use_directory_cache(str(project), str(cache_dir)):
+            assert sorted(find_project_files(str(project), set(), False, [".py"])) == expected_files
+            assert generate_tree(str(project), set(), None) == expected_tree
+    assert stats.counters["dir_cache.hits"] == 8
+    assert "dir_cache.misses" not in stats.counters
+    assert str(project / "b" / "link.py") not in expected_files
+
+    (project / "b" / "c" / "new.py").write_text("y = 2\n", encoding="utf-8")
+    with instrumentation.instrument_run(DummyTranslator(), timings=True) as stats:
+        with use_directory_cache(str(project), str(cache_dir)):
+            files = find_project_files(str(project), set(), False, [".py"])
+    assert str(project / "b" / "c" / "new.py") in files
+    assert stats.counters["dir_cache.misses"] == 1
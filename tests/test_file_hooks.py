@@ -0,0 +1,66 @@
+import threading
+from argparse import Namespace
+
+from core.file_hooks import run_file_hooks
+from core.plugin_base import ExportCodePlugin
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+class RecordingPlugin(ExportCodePlugin):
+    def __init__(self, parallel=False, fail_on=None):
+        self.parallel_safe = parallel
+        self.fail_on = fail_on
+        self.seen = []
+        self.finalized = False
+        self._lock = threading.Lock()
+
+    @property
+    def command(self):
+        return "--recording"
+
+    def register_command(self, parser):
+        parser.add_argument(self.command, action="store_true")
+
+    def on_file(self, path, content):
+        if path == self.fail_on:
+            raise RuntimeError("boom")
+        with self._lock:
+            self.seen.append((path, content))
+
+    def finalize(self):
+        self.finalized = True
+
+
+def _make_project(tmp_path):
+    project = tmp_path / "project"
+    (project / "pkg").mkdir(parents=True)
+    files = {"a.py": "a", "pkg/b.py": "b", "pkg/c.py": "c"}
+    for relative, content in files.items():
+        (project / relative).write_text(content, encoding="utf-8")
+    return project, [str(project / relative) for relative in files]
+
+
+def test_run_file_hooks_feeds_every_plugin_from_one_pass(tmp_path):
+    project, files = _make_project(tmp_path)
+    serial, parallel = RecordingPlugin(), RecordingPlugin(parallel=True)
+
+    run_file_hooks(DummyTranslator(), Namespace(), [serial, parallel], str(project), files, max_workers=2)
+
+    expected = [("a.py", "a"), ("pkg/b.py", "b"), ("pkg/c.py", "c")]
+    assert serial.seen == expected
+    assert sorted(parallel.seen) == expected
+    assert serial.finalized and parallel.finalized
+
+
+def test_failing_plugin_is_disabled_without_stopping_others(tmp_path):
+    project, files = _make_project(tmp_path)
+    broken, healthy = RecordingPlugin(fail_on="a.py"), RecordingPlugin()
+
+    run_file_hooks(DummyTranslator(), Namespace(), [broken, healthy], str(project), files)
+
+    assert broken.seen == [] and not broken.finalized
+    assert len(healthy.seen) == 3 and healthy.finalized
@@ -0,0 +1,33 @@
+import os
+
+from core.file_index import UNKNOWN, FileIndex
+from core.utils import find_file_index, find_project_files
+
+
+def test_file_index_shares_directories_and_rebuilds_paths(tmp_path):
+    root = str(tmp_path)
+    index = FileIndex.from_paths(root, [os.path.join(root, "b", "z.py"), "a.py", os.path.join(root, "b", "c", "y.py")])
+
+    assert len(index._prefixes) == 3
+    assert list(index.relative_paths()) == ["b/z.py", "a.py", "b/c/y.py"]
+    assert index[0].path == os.path.join(root, "b", "z.py")
+    assert index[-1].name == "y.py"
+
+    ordered = index.sorted()
+    assert list(ordered.relative_paths()) == ["a.py", "b/c/y.py", "b/z.py"]
+    assert list(index.select([2]).items()) == [("b/c/y.py", os.path.join(root, "b", "c", "y.py"))]
+
+
+def test_fill_stats_and_discovery_match_path_list(tmp_path):
+    for name in ("src/app.py", "src/ui/view.py", "README.md"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n", encoding="utf-8")
+
+    index = find_file_index(str(tmp_path), set(), False, [".py"])
+    assert list(index.paths()) == find_project_files(str(tmp_path), set(), False, [".py"])
+    assert sorted(index.relative_paths()) == ["src/app.py", "src/ui/view.py"]
+
+    assert index[0].size == UNKNOWN
+    index.fill_stats()
+    assert [record.size for record in index] == [6, 6]
@@ -0,0 +1,108 @@
+import os
+import subprocess
+
+import pytest
+
+from core.bundler import create_code_bundle
+from core.git_utils import get_changed_files_since, get_revision_source, get_staged_files, parse_name_status_z
+from core.tree_generator import generate_tree_from_paths
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+def _git(repo, *args):
+    env = dict(os.environ, GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@e", GIT_COMMITTER_NAME="t", GIT_COMMITTER_EMAIL="t@e")
+    subprocess.run(["git", *args], cwd=str(repo), env=env, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    for name in ("keep.py", "edit.py", "gone.py", "old_name.py"):
+        (repo / name).write_text(f"# {name}\n" * 20, encoding="utf-8")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "base")
+    return repo
+
+
+def _stage_changes(repo):
+    (repo / "edit.py").write_text("changed\n", encoding="utf-8")
+    (repo / "new file.py").write_text("new\n", encoding="utf-8")
+    _git(repo, "rm", "-q", "gone.py")
+    _git(repo, "mv", "old_name.py", "new_name.py")
+    _git(repo, "add", "-A")
+
+
+def test_parse_name_status_z_handles_renames():
+    data = b"M\0a.py\0R100\0old.py\0new.py\0D\0gone.py\0"
+    assert parse_name_status_z(data) == [("M", "a.py", None), ("R", "new.py", "old.py"), ("D", "gone.py", None)]
+
+
+def test_get_staged_files_skips_deletions_and_follows_renames(repo):
+    _stage_changes(repo)
+
+    staged = get_staged_files(DummyTranslator(), str(repo))
+
+    assert sorted(os.path.basename(p) for p in staged) == ["edit.py", "new file.py", "new_name.py"]
+    assert all(os.path.isabs(p) for p in staged)
+
+
+def test_get_changed_files_since_uses_merge_base(repo):
+    _git(repo, "checkout", "-q", "-b", "feature")
+    _stage_changes(repo)
+    _git(repo, "commit", "-q", "-m", "feature work")
+    _git(repo, "checkout", "-q", "main")
+    (repo / "keep.py").write_text("main moved on\n", encoding="utf-8")
+    _git(repo, "commit", "-q", "-am", "main work")
+    _git(repo, "checkout", "-q", "feature")
+
+    changed = get_changed_files_since(DummyTranslator(), str(repo), "main")
+
+    assert sorted(os.path.basename(p) for p in changed) == ["edit.py", "new file.py", "new_name.py"]
+
+
+def test_get_changed_files_since_unknown_branch(repo):
+    assert get_changed_files_since(DummyTranslator(), str(repo), "does-not-exist") == []
+
+
+def test_bundle_from_revision_and_index_ignores_worktree(repo, tmp_path):
+    _git(repo, "tag", "base")
+    (repo / "edit.py").write_text("staged\n", encoding="utf-8")
+    _git(repo, "add", "edit.py")
+    (repo / "edit.py").write_text("unstaged\n", encoding="utf-8")
+    (repo / "keep.py").unlink()
+
+    for rev, expected in (("base", "# edit.py\n"), (None, "staged\n")):
+        source = get_revision_source(DummyTranslator(), str(repo), rev)
+        assert "keep.py" in source.paths
+        output = tmp_path / f"bundle-{rev}"
+        create_code_bundle(DummyTranslator(), str(repo), str(output), set(), content_source=source)
+        text = (tmp_path / f"bundle-{rev}.txt").read_text(encoding="utf-8")
+        assert f"--- FILE: edit.py ---\n{expected}" in text
+        assert "unstaged" not in text
+        assert "--- FILE: keep.py ---" in text
+
+
+def test_revision_source_in_subdirectory_uses_relative_paths(repo):
+    (repo / "pkg").mkdir()
+    (repo / "pkg" / "mod.py").write_text("x = 1\n", encoding="utf-8")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "pkg")
+
+    source = get_revision_source(DummyTranslator(), str(repo / "pkg"), "HEAD")
+
+    assert source.paths == ["mod.py"]
+    assert list(source.iter_contents()) == [("mod.py", b"x = 1\n")]
+
+
+def test_revision_source_unknown_revision(repo):
+    assert get_revision_source(DummyTranslator(), str(repo), "no-such-rev") is None
+
+
+def test_generate_tree_from_paths():
+    assert generate_tree_from_paths(["b.py", "a/x.py", "a/y.py"]) == "└── b.py\n├── a/\n│   ├── x.py\n│   └── y.py"
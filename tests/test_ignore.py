@@ -0,0 +1,31 @@
+import pathspec
+
+from core.ignore import IgnoreRules
+from core.utils import find_project_files
+
+
+def test_ignore_rules_match_pathspec():
+    lines = ["*.log", "build/", "node_modules", "/root.txt", "src/**/gen_*.py", "*.egg-info/"]
+    paths = ["a.log", "x/a.log/b.py", "build", "build/", "x/build/y.py", "node_modules", "a/node_modules/b.js",
+             "root.txt", "sub/root.txt", "src/a/b/gen_x.py", "src/gen.py", "pkg.egg-info/PKG-INFO", "pkg.egg-info", "keep.py"]
+    for negated in ([], ["!keep.log", "!build/keep.py"]):
+        spec = pathspec.GitIgnoreSpec.from_lines(lines + negated)
+        rules = IgnoreRules([], spec)
+        assert rules.negations == bool(negated)
+        for path in paths + ["x/keep.log", "build/keep.py"]:
+            assert rules.ignores(path) == spec.match_file(path), path
+    assert IgnoreRules([], pathspec.GitIgnoreSpec.from_lines(lines)).ignores_subtree("out/build")
+
+
+def test_exclude_accepts_globs(tmp_path):
+    for name in ("pkg.egg-info/PKG-INFO.py", "tmp_1/a.py", "src/main.py", ".hidden/x.py"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n", encoding="utf-8")
+
+    rules = IgnoreRules({"*.egg-info", "tmp_?"})
+    assert rules.excludes_dir_name("pkg.egg-info") and rules.excludes_dir_name(".hidden")
+    assert not rules.excludes_dir_name("src")
+
+    files = find_project_files(str(tmp_path), {"*.egg-info", "tmp_?"}, False, [".py"])
+    assert [f.replace("\\", "/").rsplit("/", 2)[-2:] for f in files] == [["src", "main.py"]]
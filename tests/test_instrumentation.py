@@ -0,0 +1,57 @@
+import pstats
+
+from core import instrumentation
+from core.utils import find_project_files
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+def _make_project(root):
+    (root / "src").mkdir(parents=True)
+    (root / "node_modules").mkdir()
+    (root / "src" / "a.py").write_text("print('a')\n", encoding="utf-8")
+    (root / "src" / "b.js").write_text("b()\n", encoding="utf-8")
+    (root / "src" / "debug.log").write_text("log\n", encoding="utf-8")
+    (root / "src" / "blob.bin").write_bytes(b"\x00\x01")
+    (root / ".gitignore").write_text("*.log\n", encoding="utf-8")
+
+
+def _instrument(tmp_path):
+    return instrumentation.instrument_run(DummyTranslator(), timings=True, profile_path=str(tmp_path / "run.prof"))
+
+
+def test_disabled_instrumentation_records_nothing(tmp_path):
+    _make_project(tmp_path)
+    assert instrumentation.active() is None
+    with instrumentation.phase("anything"):
+        instrumentation.count("ignored")
+    find_project_files(str(tmp_path), {"node_modules"}, True, [])
+    assert instrumentation.active() is None
+
+
+def test_discovery_counters_and_phases(tmp_path, capsys):
+    _make_project(tmp_path)
+
+    with _instrument(tmp_path) as stats:
+        files = find_project_files(str(tmp_path), {"node_modules"}, True, [])
+
+    assert sorted(p.rsplit("/", 1)[-1] for p in files) == [".gitignore", "a.py", "b.js"]
+    assert stats.counters["files_selected"] == 3
+    assert stats.counters["skipped.gitignore"] == 1
+    assert stats.counters["skipped.binary"] == 1
+    assert stats.counters["skipped.excluded_dir"] == 1
+    assert {"discovery", "discovery.gitignore", "discovery.sniff"} <= set(stats.phases)
+    assert "header_timings" in capsys.readouterr().err
+    assert instrumentation.active() is None
+
+
+def test_profile_run_writes_pstats(tmp_path):
+    _make_project(tmp_path)
+    with _instrument(tmp_path):
+        find_project_files(str(tmp_path), set(), False, [".py"])
+
+    functions = {func[2] for func in pstats.Stats(str(tmp_path / "run.prof")).stats}
+    assert "find_project_files" in functions
@@ -0,0 +1,92 @@
+import pytest
+
+from core import instrumentation
+from core.applier import apply_changes, parse_bundle_file
+from core.bundler import create_code_bundle
+from core.manifest import hash_bytes, read_manifest, verify_bundle, verify_entries
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "proj"
+    (project / "pkg").mkdir(parents=True)
+    for i in range(6):
+        (project / "pkg" / f"mod{i}.py").write_text(f"value = {i}\n" * 40, encoding="utf-8")
+    (project / "pkg" / "copy.py").write_text("value = 0\n" * 40, encoding="utf-8")
+    return project
+
+
+@pytest.mark.parametrize("output_format, algorithm", [("txt", "sha256"), ("md", "blake2b")])
+def test_manifest_lists_every_file_and_verifies(project, tmp_path, output_format, algorithm):
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "bundle"), set(), extensions=[".py"],
+                       output_format=output_format, dedup=True, hash_algorithm=algorithm)
+    bundle = tmp_path / f"bundle.{output_format}"
+    data = bundle.read_bytes()
+
+    _, manifest = read_manifest(data)
+    assert manifest["algorithm"] == algorithm
+    assert manifest["files"]["pkg/mod3.py"][:2] == (hash_bytes(b"value = 3\n" * 40, algorithm), 400)
+    assert manifest["files"]["pkg/copy.py"][:2] == manifest["files"]["pkg/mod0.py"][:2]
+    assert set(verify_entries(data, manifest).values()) == {"ok"}
+    assert verify_bundle(DummyTranslator(), str(bundle))
+
+    bundle.write_bytes(data.replace(b"value = 3\n", b"value = 9\n", 1))
+    assert not verify_bundle(DummyTranslator(), str(bundle))
+    results = verify_entries(bundle.read_bytes(), manifest)
+    assert results["pkg/mod3.py"] == "mismatch"
+    assert [path for path, status in results.items() if status != "ok"] == ["pkg/mod3.py"]
+
+
+def test_manifest_is_not_part_of_the_last_file(project, tmp_path):
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "bundle"), set(), extensions=[".py"], compression="gzip")
+
+    parsed = parse_bundle_file(DummyTranslator(), str(tmp_path / "bundle.txt.gz"))
+
+    assert parsed["pkg/mod5.py"] == ("value = 5\n" * 40).rstrip("\n")
+    assert verify_bundle(DummyTranslator(), str(tmp_path / "bundle.txt.gz"))
+
+
+def test_apply_skips_files_identical_to_the_manifest(project, tmp_path, monkeypatch, capsys):
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "bundle"), set(), extensions=[".py"])
+    bundle = tmp_path / "bundle.txt"
+    # Sửa một file trong bundle: file đó phải được so sánh lại dù bản trên ổ đĩa khớp manifest.
+    bundle.write_bytes(bundle.read_bytes().replace(b"value = 2\n", b"value = 7\n", 1))
+    offered = []
+    monkeypatch.setattr("core.applier.inquirer.prompt", lambda questions, **kwargs: offered.append(questions[0].kwargs["choices"]))
+
+    with instrumentation.instrument_run(DummyTranslator(), timings=True) as stats:
+        apply_changes(DummyTranslator(), str(project), str(bundle))
+
+    assert stats.counters["apply.files_unchanged_by_hash"] == 6
+    assert offered == [["pkg/mod2.py (tag_modified)"]]
+
+
+@pytest.mark.parametrize("output_format", ["txt", "md"])
+def test_marker_inside_a_file_is_not_a_manifest(tmp_path, output_format):
+    project = tmp_path / "proj"
+    project.mkdir()
+    (project / "doc.md").write_text("line1\n### EXPORT_CODE_MANIFEST sha256 ###\nline3\n", encoding="utf-8")
+    (project / "z.py").write_text("z = 1\n", encoding="utf-8")
+    create_code_bundle(DummyTranslator(), str(project), str(tmp_path / "bundle"), set(), extensions=[".md", ".py"],
+                       output_format=output_format, hash_algorithm=None)
+    bundle = tmp_path / f"bundle.{output_format}"
+    data = bundle.read_bytes()
+
+    assert read_manifest(data) == (len(data), None)
+    assert not verify_bundle(DummyTranslator(), str(bundle))
+    if output_format == "txt":
+        parsed = parse_bundle_file(DummyTranslator(), str(bundle))
+        assert parsed == {"doc.md": "line1\n### EXPORT_CODE_MANIFEST sha256 ###\nline3", "z.py": "z = 1"}
+
+
+def test_verify_fails_on_empty_manifest(tmp_path):
+    bundle = tmp_path / "bundle.txt"
+    bundle.write_bytes(b"--- FILE: a.py ---\na = 1\n--- END FILE: a.py ---\n\n### EXPORT_CODE_MANIFEST sha256 ###\n")
+
+    assert read_manifest(bundle.read_bytes())[1]["files"] == {}
+    assert not verify_bundle(DummyTranslator(), str(bundle))
@@ -0,0 +1,60 @@
+import json
+
+from core.instrumentation import RunStats, instrument_run
+from core.metrics import collect_metrics, infer_format, render_prometheus
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+def _stats():
+    stats = RunStats()
+    stats.add_time('bundle', 0.5, 0.25)
+    stats.add_time('bundle.read', 0.125)
+    stats.count('files_written', 3)
+    stats.count('quality.files_cached', 3)
+    stats.count('quality.files_run', 1)
+    return stats
+
+
+def test_collect_metrics_reports_phases_counters_and_cache_rates(tmp_path):
+    metrics = collect_metrics(_stats(), 'bundle', str(tmp_path), errors=2, started_at=1000.0)
+
+    assert metrics['mode'] == 'bundle'
+    assert metrics['phases']['bundle'] == {'wall_seconds': 0.5, 'cpu_seconds': 0.25, 'calls': 1}
+    assert metrics['phases']['bundle.read']['cpu_seconds'] is None
+    assert metrics['counters']['files_written'] == 3
+    assert metrics['caches']['quality'] == {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+    assert metrics['errors'] == 2
+
+
+def test_render_prometheus_skips_missing_values_and_escapes_labels():
+    metrics = collect_metrics(_stats(), 'bundle', '.', errors=0, started_at=1000.0)
+    metrics['project'] = 'C:\\proj "x"'
+    text = render_prometheus(metrics)
+    labels = 'mode="bundle",project="C:\\\\proj \\"x\\""'
+
+    assert f'export_code_phase_cpu_seconds{{{labels},phase="bundle"}} 0.250000' in text
+    assert 'phase="bundle.read"} ' not in text.split('# HELP export_code_phase_cpu_seconds')[1].split('# HELP')[0]
+    assert f'export_code_quality_files_cached{{{labels}}} 3' in text
+    assert f'export_code_cache_hit_ratio{{{labels},cache="quality"}} 0.750000' in text
+    assert '# TYPE export_code_errors gauge' in text
+    assert infer_format('run.prom') == 'prometheus' and infer_format('run.json') == 'json'
+
+
+def test_instrument_run_writes_metrics_and_counts_errors(tmp_path):
+    import logging
+    out = tmp_path / 'metrics' / 'run.json'
+
+    with instrument_run(DummyTranslator(), metrics_path=str(out), mode='stats', project=str(tmp_path)) as stats:
+        assert stats is not None
+        stats.count('files_analyzed', 4)
+        logging.error("boom")
+
+    data = json.loads(out.read_text(encoding='utf-8'))
+    assert data['mode'] == 'stats'
+    assert data['counters'] == {'files_analyzed': 4}
+    assert data['errors'] == 1
+    assert not (tmp_path / 'metrics' / 'run.json.tmp').exists()
@@ -1,61 +1,123 @@
-import argparse
-import textwrap
-
-from core.plugin_loader import load_plugins
-
-
-PLUGIN_TEMPLATE = """\
-from core.plugin_base import ExportCodePlugin
-
-class SamplePlugin(ExportCodePlugin):
-    def __init__(self):
-        self.executed = False
-
-    @property
-    def command(self):
-        return "--sample-plugin"
-
-    def register_command(self, parser):
-        parser.add_argument(self.command, action="store_true")
-
-    def execute(self, args, t):
-        self.executed = True
-"""
-
-
-def test_load_plugins_returns_instances(tmp_path):
-    plugin_dir = tmp_path / "plugins"
-    plugin_dir.mkdir()
-    plugin_file = plugin_dir / "sample_plugin.py"
-    plugin_file.write_text(textwrap.dedent(PLUGIN_TEMPLATE), encoding="utf-8")
-
-    plugins = load_plugins(str(plugin_dir))
-
-    assert len(plugins) == 1
-    plugin = plugins[0]
-    assert plugin.command == "--sample-plugin"
-
-    parser = argparse.ArgumentParser()
-    plugin.register_command(parser)
-    args = parser.parse_args(["--sample-plugin"])
-    assert getattr(args, plugin.arg_dest()) is True
-
-
-def test_plugin_execute_is_callable(tmp_path):
-    plugin_dir = tmp_path / "plugins"
-    plugin_dir.mkdir()
-    plugin_file = plugin_dir / "sample_plugin.py"
-    plugin_file.write_text(textwrap.dedent(PLUGIN_TEMPLATE), encoding="utf-8")
-
-    plugin = load_plugins(str(plugin_dir))[0]
-
-    class DummyTranslator:
-        def get(self, key, **kwargs):
-            return key
-
-    parser = argparse.ArgumentParser()
-    plugin.register_command(parser)
-    args = parser.parse_args([])
-
-    plugin.execute(args, DummyTranslator())
-    assert plugin.executed is True
+import argparse
+import textwrap
+
+from core.plugin_loader import load_plugins
+
+
+PLUGIN_TEMPLATE = """\
+from core.plugin_base import ExportCodePlugin
+
+class SamplePlugin(ExportCodePlugin):
+    def __init__(self):
+        self.executed = False
+
+    @property
+    def command(self):
+        return "--sample-plugin"
+
+    def register_command(self, parser):
+        parser.add_argument(self.command, action="store_true")
+
+    def execute(self, args, t):
+        self.executed = True
+"""
+
+
+def test_load_plugins_returns_instances(tmp_path):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    plugin_file = plugin_dir / "sample_plugin.py"
+    plugin_file.write_text(textwrap.dedent(PLUGIN_TEMPLATE), encoding="utf-8")
+
+    plugins = load_plugins(str(plugin_dir))
+
+    assert len(plugins) == 1
+    plugin = plugins[0]
+    assert plugin.command == "--sample-plugin"
+
+    parser = argparse.ArgumentParser()
+    plugin.register_command(parser)
+    args = parser.parse_args(["--sample-plugin"])
+    assert getattr(args, plugin.arg_dest()) is True
+
+
+def test_plugin_execute_is_callable(tmp_path):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    plugin_file = plugin_dir / "sample_plugin.py"
+    plugin_file.write_text(textwrap.dedent(PLUGIN_TEMPLATE), encoding="utf-8")
+
+    plugin = load_plugins(str(plugin_dir))[0]
+
+    class DummyTranslator:
+        def get(self, key, **kwargs):
+            return key
+
+    parser = argparse.ArgumentParser()
+    plugin.register_command(parser)
+    args = parser.parse_args([])
+
+    plugin.execute(args, DummyTranslator())
+    assert plugin.executed is True
+
+
+COUNTING_PLUGIN_TEMPLATE = """\
+from pathlib import Path
+from core.plugin_base import ExportCodePlugin
+
+_log = Path(__file__).with_suffix(".imports")
+_log.write_text(_log.read_text() + "x" if _log.exists() else "x")
+
+class CountingPlugin(ExportCodePlugin):
+    @property
+    def command(self):
+        return "--counting"
+
+    def register_command(self, parser):
+        parser.add_argument(self.command, type=int, help="HELP_TEXT")
+
+    def execute(self, args, t):
+        return args.counting * 2
+"""
+
+
+def _import_count(plugin_dir):
+    log_file = plugin_dir / "counting_plugin.imports"
+    return len(log_file.read_text()) if log_file.exists() else 0
+
+
+def test_manifest_cache_avoids_importing_plugins(tmp_path):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "counting_plugin.py").write_text(COUNTING_PLUGIN_TEMPLATE, encoding="utf-8")
+
+    load_plugins(str(plugin_dir))
+    assert _import_count(plugin_dir) == 1
+
+    plugin = load_plugins(str(plugin_dir))[0]
+    assert _import_count(plugin_dir) == 1
+    assert plugin.command == "--counting"
+
+    parser = argparse.ArgumentParser()
+    plugin.register_command(parser)
+    args = parser.parse_args(["--counting", "21"])
+    assert _import_count(plugin_dir) == 1
+
+    assert plugin.execute(args, None) == 42
+    assert _import_count(plugin_dir) == 2
+
+
+def test_manifest_is_invalidated_when_plugin_changes(tmp_path):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    plugin_file = plugin_dir / "counting_plugin.py"
+    plugin_file.write_text(COUNTING_PLUGIN_TEMPLATE, encoding="utf-8")
+    load_plugins(str(plugin_dir))
+
+    plugin_file.write_text(COUNTING_PLUGIN_TEMPLATE.replace("HELP_TEXT", "NEW_HELP"), encoding="utf-8")
+    plugin = load_plugins(str(plugin_dir))[0]
+    assert _import_count(plugin_dir) == 2
+
+    parser = argparse.ArgumentParser()
+    plugin.register_command(parser)
+    assert "NEW_HELP" in parser.format_help()
@@ -0,0 +1,23 @@
+from core.prefetch import DiscoveryPrefetch
+from core.utils import find_file_index
+
+
+def test_prefetch_snapshot_matches_discovery(tmp_path):
+    (tmp_path / "src" / "build").mkdir(parents=True)
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / ".gitignore").write_text("*.log\n", encoding="utf-8")
+    (tmp_path / "src" / "app.py").write_text("print('hi')\n", encoding="utf-8")
+    (tmp_path / "src" / "notes.md").write_text("# notes\n", encoding="utf-8")
+    (tmp_path / "src" / "debug.log").write_text("log\n", encoding="utf-8")
+    (tmp_path / "src" / "logo.png").write_bytes(b"\x89PNG\x00\x00binary")
+    (tmp_path / "src" / "build" / "out.py").write_text("x = 1\n", encoding="utf-8")
+    (tmp_path / "node_modules" / "lib.js").write_text("x\n", encoding="utf-8")
+    exclude = {"build", "node_modules"}
+
+    prefetch = DiscoveryPrefetch(str(tmp_path), exclude).start()
+    prefetch._thread.join(timeout=10)
+    assert prefetch.bytes_warmed == len("print('hi')\n") + len("# notes\n") + len("*.log\n")
+
+    for use_all, extensions in ((True, []), (False, [".py", ".md"]), (False, [])):
+        expected = list(find_file_index(str(tmp_path), exclude, use_all, extensions).paths())
+        assert list(prefetch.files(use_all, extensions).paths()) == expected
@@ -0,0 +1,169 @@
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+from core import quality_checker
+from core.quality_cache import QualityCache, tool_config_hash
+from core.quality_checker import chunk_files_for_command, run_quality_for_profiles, run_quality_tool
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+def _python_command(code):
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(code)}"
+
+
+def test_chunks_respect_argv_budget_and_keep_order():
+    files = [f"src/file_{i:04d}.js" for i in range(500)]
+
+    chunks = chunk_files_for_command(["eslint", "--fix"], files, jobs=1, max_bytes=2000)
+
+    assert len(chunks) > 1
+    assert [f for chunk in chunks for f in chunk] == files
+    for chunk in chunks:
+        assert sum(len(f) + 9 for f in chunk) + 2 * 16 <= 2000
+
+
+def test_chunks_are_split_across_jobs():
+    files = [f"f{i}.py" for i in range(10)]
+
+    chunks = chunk_files_for_command(["black"], files, jobs=4, max_bytes=10**6)
+
+    assert len(chunks) == 4
+    assert max(len(c) for c in chunks) == 3
+
+
+def test_run_quality_tool_runs_every_batch(tmp_path):
+    files = [str(tmp_path / f"f{i}.py") for i in range(6)]
+    command = _python_command("import sys; print(len(sys.argv) - 1)")
+
+    results = run_quality_tool(DummyTranslator(), "linter", command, files, jobs=3)
+
+    assert len(results) == 3
+    assert sorted(f for r in results for f in r["files"]) == sorted(files)
+    assert all(r["returncode"] == 0 and not r["timed_out"] for r in results)
+
+
+def test_run_quality_tool_splits_by_default_only_when_argv_overflows(tmp_path, monkeypatch):
+    files = [str(tmp_path / f"f{i}.py") for i in range(6)]
+    command = _python_command("import sys; print(len(sys.argv) - 1)")
+    monkeypatch.setattr(quality_checker, "DEFAULT_TOOL_JOBS", 4)
+
+    assert len(run_quality_tool(DummyTranslator(), "linter", command, files)) == 1
+
+    budget = sum(len(part) + 9 for part in shlex.split(command)) + 3 * (len(files[0]) + 9)
+    monkeypatch.setattr(quality_checker, "_max_argv_bytes", lambda: budget)
+    results = run_quality_tool(DummyTranslator(), "linter", command, files)
+    assert [len(r["files"]) for r in results] == [3, 3]
+
+
+def test_run_quality_tool_times_out_per_batch(tmp_path):
+    command = _python_command("import time; time.sleep(30)")
+
+    results = run_quality_tool(DummyTranslator(), "linter", command, ["a.py"], jobs=1, chunk_timeout=0.5)
+
+    assert results[0]["timed_out"] is True
+
+
+def test_timeout_kills_grandchildren_holding_the_pipes(tmp_path):
+    pid_file = tmp_path / "grandchild.pid"
+    # Một "shim" khởi chạy tiến trình con dùng chung stdout/stderr rồi chờ nó.
+    code = ("import subprocess, sys; "
+            "p = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+            f"open({str(pid_file)!r}, 'w').write(str(p.pid)); p.wait()")
+
+    start = time.monotonic()
+    results = run_quality_tool(DummyTranslator(), "linter", _python_command(code), ["a.py"], jobs=1, chunk_timeout=1)
+
+    assert results[0]["timed_out"] is True
+    assert time.monotonic() - start < 20
+    grandchild = int(pid_file.read_text(encoding="utf-8"))
+    for _ in range(50):
+        if not _alive(grandchild):
+            break
+        time.sleep(0.1)
+    assert not _alive(grandchild)
+
+
+def _alive(pid):
+    if sys.platform == "win32":
+        return str(pid) in subprocess.run(["tasklist", "/FI", f"PID eq {pid}"], capture_output=True, text=True).stdout
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Tiến trình zombie (chưa được thu hồi) coi như đã dừng.
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+def test_summary_does_not_count_errored_batches_as_ok(monkeypatch):
+    outcomes = iter([{"returncode": 0, "timed_out": False, "error": None},
+                     {"returncode": 1, "timed_out": False, "error": None},
+                     {"returncode": None, "timed_out": True, "error": None},
+                     {"returncode": None, "timed_out": False, "error": "Permission denied"}])
+    monkeypatch.setattr(quality_checker, "_run_chunk", lambda t, command_parts, files, prefix, timeout: dict(next(outcomes), files=files))
+    summaries = []
+
+    class RecordingTranslator(DummyTranslator):
+        def get(self, key, default=None, **kwargs):
+            if key == "info_tool_summary":
+                summaries.append(kwargs)
+            return key
+
+    run_quality_tool(RecordingTranslator(), "linter", "lint", [f"f{i}.py" for i in range(4)], jobs=4)
+
+    assert summaries == [{"tool": "lint", "ok": 1, "failed": 1, "timed_out": 1, "errored": 1, "total": 4}]
+
+
+def _write_profile(command):
+    return {"python": {"extensions": [".py"], "linter": {"command": command, "extensions": [".py"]}}}
+
+
+def _run_counts(tmp_path, project, profiles, full=False):
+    log_file = tmp_path / "runs.log"
+    log_file.write_text("", encoding="utf-8")
+    files = sorted(str(p) for p in project.glob("*.py"))
+    run_quality_for_profiles(DummyTranslator(), "linter", profiles, ["python"], files, str(project),
+                             jobs=1, full=full, cache_dir=str(tmp_path / "cache"))
+    return [line.split() for line in log_file.read_text(encoding="utf-8").splitlines()]
+
+
+def test_incremental_runs_only_recheck_changed_files(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    for name in ("a.py", "b.py", "c.py"):
+        (project / name).write_text(f"# {name}\n", encoding="utf-8")
+    log_file = tmp_path / "runs.log"
+    code = f"import sys, os; open({str(log_file)!r}, 'a').write(' '.join(os.path.basename(a) for a in sys.argv[1:]) + '\\n')"
+    profiles = _write_profile(_python_command(code))
+
+    assert _run_counts(tmp_path, project, profiles) == [["a.py", "b.py", "c.py"]]
+    assert _run_counts(tmp_path, project, profiles) == []
+
+    (project / "b.py").write_text("# changed\n", encoding="utf-8")
+    assert _run_counts(tmp_path, project, profiles) == [["b.py"]]
+
+    assert _run_counts(tmp_path, project, profiles, full=True) == [["a.py", "b.py", "c.py"]]
+
+
+def test_failed_files_are_rechecked_next_time(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.py").write_text("x\n", encoding="utf-8")
+    profiles = _write_profile(_python_command("import sys; sys.exit(1)"))
+    files = [str(project / "a.py")]
+
+    run_quality_for_profiles(DummyTranslator(), "linter", profiles, ["python"], files, str(project), cache_dir=str(tmp_path / "cache"))
+    cache = QualityCache(str(project), str(tmp_path / "cache"))
+    tool_hash = tool_config_hash(profiles["python"]["linter"]["command"], str(project))
+
+    assert cache.split_unchanged("python", "linter", tool_hash, files) == (files, [])
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from core.bundle_format import iter_bundle_sections, strip_bundle_header
+from core.bundler import create_code_bundle
+from core.sharding import byte_budget, estimate_tokens, plan_shards
+
+
+class DummyTranslator:
+    def get(self, key, default=None, **kwargs):
+        return key
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "proj"
+    for i in range(12):
+        sub = project / f"pkg{i % 3}" / "deep"
+        sub.mkdir(parents=True, exist_ok=True)
+        (sub / f"mod{i:02d}.py").write_text(f"value_{i} = {i}\n" * (10 + 7 * i), encoding="utf-8")
+    return project
+
+
+def test_estimate_tokens_and_budget():
+    assert estimate_tokens(0) == 0
+    assert estimate_tokens(9) == 3
+    assert byte_budget(None, None) is None
+    assert byte_budget(10_000, 1_000) == 4_000
+
+
+def test_plan_shards_keeps_order_and_isolates_oversized_files():
+    items = [("a.py", 40), ("b.py", 40), ("c.py", 500), ("d.py", 10)]
+    shards, oversized = plan_shards(items, budget=120, header_bytes=10, entry_overhead=lambda path: 5, include_tree=False)
+    assert shards == [["a.py", "b.py"], ["c.py"], ["d.py"]]
+    assert oversized == ["c.py"]
+
+
+@pytest.mark.parametrize("output_format", ["txt", "md"])
+def test_sharded_bundle_respects_limit_and_manifest(project, tmp_path, output_format):
+    output = tmp_path / "out" / "bundle"
+    output.parent.mkdir()
+
+    create_code_bundle(DummyTranslator(), str(project), str(output), set(), extensions=[".py"],
+                       output_format=output_format, max_bytes=1500)
+
+    manifest = json.loads((output.parent / "bundle.shards.json").read_text(encoding="utf-8"))
+    assert manifest["max_bytes"] == 1500
+    assert len(manifest["shards"]) > 1
+
+    seen = []
+    for shard in manifest["shards"]:
+        shard_path = output.parent / shard["file"]
+        assert shard_path.stat().st_size == shard["bytes"]
+        if len(shard["files"]) > 1:
+            assert shard["bytes"] <= 1500
+        seen.extend(shard["files"])
+        if output_format == "txt":
+            text = shard_path.read_text(encoding="utf-8")
+            assert [path for path, _ in iter_bundle_sections(strip_bundle_header(text))] == shard["files"]
+    assert seen == sorted(p.relative_to(project).as_posix() for p in project.rglob("*.py"))
+
+
+def test_sharded_bundle_removes_stale_shards(project, tmp_path):
+    output = tmp_path / "bundle"
+    create_code_bundle(DummyTranslator(), str(project), str(output), set(), extensions=[".py"], max_bytes=1000)
+    many = sorted(tmp_path.glob("bundle-*.txt"))
+
+    create_code_bundle(DummyTranslator(), str(project), str(output), set(), extensions=[".py"], max_tokens=1_000_000)
+
+    assert len(many) > 1
+    assert sorted(p.name for p in tmp_path.glob("bundle-*.txt")) == ["bundle-001.txt"]
+
+
+def test_shards_inside_project_are_not_rebundled(tmp_path):
+    project = tmp_path / "proj"
+    project.mkdir()
+    for i in range(6):
+        (project / f"doc{i}.txt").write_text(f"line {i}\n" * 375, encoding="utf-8")
+    output = project / "out"
+
+    for _ in range(2):
+        create_code_bundle(DummyTranslator(), str(project), str(output), set(), use_all_text_files=True, max_bytes=8000)
+        manifest = json.loads((project / "out.shards.json").read_text(encoding="utf-8"))
+        listed = [path for shard in manifest["shards"] for path in shard["files"]]
+        assert listed == [f"doc{i}.txt" for i in range(6)]
+
+    assert sorted(p.name for p in project.glob("out-*.txt")) == [shard["file"] for shard in manifest["shards"]]
+    for shard in manifest["shards"]:
+        text = (project / shard["file"]).read_text(encoding="utf-8")
+        assert [path for path, _ in iter_bundle_sections(strip_bundle_header(text))] == shard["files"]
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Ngân sách thời gian import (ms) cho một lần khởi động lạnh của CLI. Có thể nới rộng
+# trên máy CI chậm bằng biến môi trường EXPORT_CODE_STARTUP_BUDGET_MS.
+STARTUP_BUDGET_MS = float(os.environ.get("EXPORT_CODE_STARTUP_BUDGET_MS", "400"))
+
+HEAVY_MODULES = {"git", "watchdog", "tqdm", "inquirer", "pathspec"}
+
+
+def _run_with_importtime(tmp_path, *cli_args):
+    home = tmp_path / "home"
+    home.mkdir(exist_ok=True)
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home), PYTHONDONTWRITEBYTECODE="1")
+    script = "import sys; from core.__main__ import main; sys.argv = ['export-code', *sys.argv[1:]]; main()"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script, *cli_args],
+        cwd=str(REPO_ROOT), env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    modules, total_us = set(), 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        total_us += int(self_us)
+    return modules, total_us / 1000.0
+
+
+def test_tree_only_does_not_import_heavy_subsystems(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "main.py").write_text("print('hi')\n", encoding="utf-8")
+
+    modules, _ = _run_with_importtime(tmp_path, str(project), "--tree-only")
+
+    assert not (modules & HEAVY_MODULES), sorted(modules & HEAVY_MODULES)
+
+
+def test_cold_start_import_time_within_budget(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+
+    _, total_ms = _run_with_importtime(tmp_path, str(project), "--tree-only")
+
+    assert total_ms < STARTUP_BUDGET_MS, f"startup imports took {total_ms:.1f} ms (budget {STARTUP_BUDGET_MS} ms)"
@@ -0,0 +1,54 @@
+from core.watcher import ScopedWatches, plan_watches
+
+
+class FakeObserver:
+    def __init__(self):
+        self.scheduled = {}
+
+    def schedule(self, handler, path, recursive=False):
+        self.scheduled[path] = recursive
+        return path
+
+    def unschedule(self, watch):
+        del self.scheduled[watch]
+
+
+def _make_project(tmp_path):
+    project = tmp_path / "proj"
+    for name in ("src/core", "src/ui", "web/node_modules/lib", "web/app", ".git/objects", "build", "docs"):
+        (project / name).mkdir(parents=True)
+    (project / ".gitignore").write_text("docs/\n", encoding="utf-8")
+    return project.resolve()
+
+
+def test_plan_watches_skips_excluded_directories(tmp_path):
+    import pathspec
+    project = _make_project(tmp_path)
+    spec = pathspec.GitIgnoreSpec.from_lines(["docs/"])
+
+    watches = dict(plan_watches(project, {"node_modules", "build"}, spec))
+
+    # Chỉ thư mục gốc và web/ chứa thư mục bị loại trừ; các nhánh sạch được theo dõi đệ quy.
+    assert watches == {str(project): False, str(project / "web"): False, str(project / "src"): True,
+                       str(project / "web" / "app"): True}
+
+
+def test_new_directories_update_watches(tmp_path):
+    project = _make_project(tmp_path)
+    observer = FakeObserver()
+    watches = ScopedWatches(observer, None, project, {"node_modules", "build"}, None)
+    watches.add_tree(project)
+
+    (project / "lib" / "nested").mkdir(parents=True)
+    watches.directory_created(project / "lib")
+    assert observer.scheduled[str(project / "lib")] is True
+
+    # node_modules mới trong một nhánh đang theo dõi đệ quy: nhánh đó được chia lại.
+    (project / "src" / "node_modules").mkdir()
+    watches.directory_created(project / "src" / "node_modules")
+    assert observer.scheduled[str(project / "src")] is False
+    assert str(project / "src" / "node_modules") not in observer.scheduled
+    assert observer.scheduled[str(project / "src" / "core")] is True
+
+    watches.directory_deleted(project / "src")
+    assert not any(path.startswith(str(project / "src")) for path in observer.scheduled)